@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: speaker overlay compositing per frame
+Compares the original float64 straight-alpha blend with the uint16
+fixed-point premultiplied kernel at the generator's output sizes.
+
+Usage (from backend/):
+    python benchmarks/bench_compositing.py [--iterations 300] [--sprite assets/trump.png]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.compositing import blend_premultiplied_layer
+from rendering.sprite_cache import SpriteCache
+
+FRAME_SIZES = [(480, 854), (640, 1136)]
+
+
+def legacy_overlay(background, overlay_bgra, x_pos, y_pos):
+    """The previous _overlay_image path: float64 dstack mask over the full image"""
+    h, w = overlay_bgra.shape[:2]
+    roi = background[y_pos:y_pos+h, x_pos:x_pos+w]
+    overlay_bgr = overlay_bgra[:, :, :3]
+    alpha = overlay_bgra[:, :, 3] / 255.0
+    alpha_3ch = np.dstack([alpha, alpha, alpha])
+    blended = (overlay_bgr * alpha_3ch + roi * (1 - alpha_3ch)).astype(np.uint8)
+    background[y_pos:y_pos+h, x_pos:x_pos+w] = blended
+
+
+def uncropped_bgra(sprite):
+    """Rebuild the straight-alpha full-size BGRA image the legacy path worked on"""
+    bgra = np.zeros((sprite.height, sprite.width, 4), dtype=np.uint8)
+    a = sprite.alpha.astype(np.float64)
+    straight = np.where(a[:, :, None] > 0, sprite.premultiplied * 255.0 / np.maximum(a, 1)[:, :, None], 0)
+    y0, x0 = sprite.offset_y, sprite.offset_x
+    h, w = sprite.alpha.shape
+    bgra[y0:y0+h, x0:x0+w, :3] = np.clip(straight, 0, 255).astype(np.uint8)
+    bgra[y0:y0+h, x0:x0+w, 3] = sprite.alpha
+    return bgra
+
+
+def time_per_frame(fn, iterations):
+    fn()  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--sprite", default="assets/trump.png")
+    args = parser.parse_args()
+
+    cache = SpriteCache()
+    rng = np.random.default_rng(0)
+
+    print(f"🧪 Overlay compositing: {args.sprite}, {args.iterations} iterations")
+    print(f"{'frame':>10} {'sprite':>10} {'opaque box':>12} {'legacy ms':>10} {'kernel ms':>10} {'speedup':>8}")
+    for width, height in FRAME_SIZES:
+        sprite = cache.get(args.sprite, int(height * 0.4))
+        legacy_img = uncropped_bgra(sprite)
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        x_pos = max(0, min(50, width - sprite.width))  # Same clamping as the generator
+        y_pos = height - sprite.height
+
+        legacy_ms = time_per_frame(lambda: legacy_overlay(frame, legacy_img, x_pos, y_pos), args.iterations)
+        kernel_ms = time_per_frame(lambda: blend_premultiplied_layer(frame, sprite, x_pos, y_pos), args.iterations)
+
+        frame_size = f"{width}x{height}"
+        sprite_size = f"{sprite.width}x{sprite.height}"
+        box = f"{sprite.alpha.shape[1]}x{sprite.alpha.shape[0]}"
+        print(f"{frame_size:>10} {sprite_size:>10} {box:>12} "
+              f"{legacy_ms:>10.3f} {kernel_ms:>10.3f} {legacy_ms / kernel_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Offline render benchmark: full reels from synthetic inputs
+Generates a background clip, a silent/tone WAV and speaker timelines of the
+requested lengths (no network, no assets beyond the speaker PNGs), renders
+each (mode, profile, duration) combination in a fresh process and reports
+frames per second, peak RSS and output size. Results are written as JSON so
+runs on different commits can be compared with --compare.
+
+Usage (from backend/):
+    python benchmarks/bench_render.py [--durations 10 40 180] [--profiles preview standard hd]
+                                      [--modes opencv ffmpeg] [--audio tone] [--output results.json]
+                                      [--compare previous.json]
+Results go to benchmarks/results/ (git-ignored) unless --output is given.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, BACKEND_DIR)
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")  # Git-ignored
+
+# Render modes: how the generator is driven for one reel
+RENDER_MODES = {
+    'opencv': {'render_backend': 'opencv'},
+    'opencv-chunked': {'render_backend': 'opencv', 'render_workers': max(2, os.cpu_count() or 1)},
+    'opencv-stream': {'render_backend': 'opencv', 'streaming': True},
+    'ffmpeg': {'render_backend': 'ffmpeg'},
+    'opencv-still': {'render_backend': 'opencv', 'background': 'still'},  # Image background
+}
+DEFAULT_DURATIONS = [10, 40, 180]
+SPEAKERS = ('trump', 'mrbeast')
+AUDIO_SAMPLE_RATE = 22050
+
+# The fallback timeline gives each segment 0.5 s per word plus a 0.2 s pause
+SECONDS_PER_WORD = 0.5
+SEGMENT_PAUSE = 0.2
+SEGMENT_SECONDS = 8.0
+
+
+def synthetic_script(duration):
+    """Alternating two-speaker script whose estimated timeline lasts ~duration seconds"""
+    segments = max(2, round(duration / (SEGMENT_SECONDS + SEGMENT_PAUSE)))
+    words = max(1, round((duration - SEGMENT_PAUSE * (segments - 1)) / segments / SECONDS_PER_WORD))
+    vocabulary = "folks this reel is tremendous and we are giving away one hundred cars today".split()
+    lines = []
+    for i in range(segments):
+        text = " ".join(vocabulary[(i + j) % len(vocabulary)] for j in range(words))
+        lines.append(f"**{SPEAKERS[i % 2].capitalize()}:** {text}.")
+    return "\n\n".join(lines)
+
+
+def write_background(path, seconds=5, fps=30, size=(720, 1280)):
+    """Moving gradient with a frame counter, so every frame differs"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    ramp = np.linspace(0, 255, size[0], dtype=np.float32)
+    for i in range(seconds * fps):
+        frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        frame[:, :, 0] = ramp
+        frame[:, :, 1] = (ramp + i * 4) % 256
+        frame[:, :, 2] = (i * 3) % 256
+        cv2.putText(frame, str(i), (size[0] // 4, size[1] // 2), cv2.FONT_HERSHEY_SIMPLEX, 6, (255, 255, 255), 12)
+        writer.write(frame)
+    writer.release()
+
+
+def write_still_background(path, size=(720, 1280)):
+    """Gradient image background (the first frame of write_background)"""
+    ramp = np.linspace(0, 255, size[0], dtype=np.uint8)
+    frame = np.dstack([np.tile(ramp, (size[1], 1))] * 2 + [np.zeros((size[1], size[0]), np.uint8)])
+    cv2.imwrite(path, frame)
+
+
+def write_audio(path, seconds, kind):
+    """16-bit mono WAV: a 440 Hz tone or silence"""
+    samples = int(seconds * AUDIO_SAMPLE_RATE)
+    if kind == 'tone':
+        t = np.arange(samples) / AUDIO_SAMPLE_RATE
+        data = (np.sin(2 * np.pi * 440 * t) * 8000).astype('<i2')
+    else:
+        data = np.zeros(samples, dtype='<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(AUDIO_SAMPLE_RATE)
+        f.writeframes(data.tobytes())
+
+
+def run_single(args):
+    """Child process: render one reel and print its measurements as JSON"""
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    os.chdir(BACKEND_DIR)  # Speaker assets are resolved relative to backend/
+
+    from rendering.background_cache import background_cache
+    from rendering.render_cache import render_cache
+    from rendering.render_stats import RenderStats
+    from opencv_video_generator import create_background_video_with_speaker_overlays
+
+    background_cache.cache_dir = args.cache_dir  # Chunked renders hand it on to their spawned workers
+    render_cache.enabled = False  # Every case must actually render
+    stats = RenderStats()
+    options = dict(RENDER_MODES[args.mode])
+    options.pop('background', None)
+    start = time.perf_counter()
+    create_background_video_with_speaker_overlays(
+        synthetic_script(args.duration), args.audio_path, background_video_path=args.background,
+        output_path=args.output_path, speaker_pair="trump_mrbeast", render_profile=args.profile,
+        render_stats=stats, **options)
+    seconds = time.perf_counter() - start
+
+    summary = stats.as_dict()
+    print(json.dumps({
+        'seconds': round(seconds, 3),
+        'frames': summary['frames'],
+        'stages': summary['stages'],
+        # ru_maxrss is in KiB on Linux; children are the ffmpeg encoders (largest one)
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_child_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }))
+
+
+def run_case(mode, profile, duration, background, audio_path, work_dir, cache_dir):
+    output_path = os.path.join(work_dir, f"{mode}_{profile}_{duration}s.mp4")
+    cmd = [sys.executable, os.path.abspath(__file__), '--single', '--mode', mode, '--profile', profile,
+           '--duration', str(duration), '--background', background, '--output-path', output_path,
+           '--cache-dir', cache_dir]
+    if audio_path:
+        cmd += ['--audio-path', audio_path]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'mode': mode, 'profile': profile, 'duration': duration, 'error': result.stderr.strip()[-2000:]}
+
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    from rendering.render_profiles import get_render_profile
+    fps = get_render_profile(profile).fps
+    frames = measured['frames'] or int(duration * fps)  # The filtergraph backend has no frame loop
+    if RENDER_MODES[mode].get('background') == 'still':
+        frames = int(duration * fps)  # Only state changes are composed; count output frames
+    return {
+        'mode': mode,
+        'profile': profile,
+        'duration': duration,
+        'frames': frames,
+        'seconds': measured['seconds'],
+        'render_fps': round(frames / measured['seconds'], 1),
+        'realtime_factor': round(frames / fps / measured['seconds'], 2),
+        'peak_rss_mb': measured['peak_rss_mb'],
+        'peak_child_rss_mb': measured['peak_child_rss_mb'],
+        'output_bytes': os.path.getsize(output_path),
+        'stages': measured['stages'],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = {(r['mode'], r['profile'], r['duration']): r for r in json.load(f)['results'] if 'error' not in r}
+    print(f"\n📊 Compared with {previous_path}")
+    print(f"{'mode':>15} {'profile':>9} {'dur':>5} {'fps before':>11} {'fps now':>8} {'change':>8}")
+    for r in results:
+        before = previous.get((r['mode'], r['profile'], r['duration']))
+        if before is None or 'error' in r:
+            continue
+        change = (r['render_fps'] / before['render_fps'] - 1) * 100
+        print(f"{r['mode']:>15} {r['profile']:>9} {r['duration']:>4}s {before['render_fps']:>11} "
+              f"{r['render_fps']:>8} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs='+', default=DEFAULT_DURATIONS)
+    parser.add_argument("--profiles", nargs='+', default=['preview', 'standard', 'hd'])
+    parser.add_argument("--modes", nargs='+', default=list(RENDER_MODES), choices=list(RENDER_MODES))
+    parser.add_argument("--audio", choices=['tone', 'silent', 'none'], default='tone')
+    parser.add_argument("--cold-cache", action='store_true', help="fresh background cache for every render")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "render_benchmark_results.json"))
+    parser.add_argument("--compare", help="previous results JSON to compare render fps against")
+    # Internal: one render in a child process
+    parser.add_argument("--single", action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    parser.add_argument("--duration", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--background", help=argparse.SUPPRESS)
+    parser.add_argument("--audio-path", help=argparse.SUPPRESS)
+    parser.add_argument("--output-path", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_render_") as work_dir:
+        background = os.path.join(work_dir, "background.mp4")
+        write_background(background)
+        still_background = os.path.join(work_dir, "background.png")
+        write_still_background(still_background)
+        print(f"🧪 Render benchmark: modes={args.modes} profiles={args.profiles} durations={args.durations}s "
+              f"audio={args.audio}")
+        print(f"{'mode':>15} {'profile':>9} {'dur':>5} {'frames':>7} {'sec':>7} {'fps':>7} {'x rt':>6} "
+              f"{'rss MB':>7} {'ffmpeg MB':>9} {'MB out':>7}")
+
+        for duration in args.durations:
+            audio_path = None
+            if args.audio != 'none':
+                # Slightly longer than the timeline; the render stops at the timeline end
+                audio_path = os.path.join(work_dir, f"audio_{duration}s.wav")
+                write_audio(audio_path, math.ceil(duration * 1.1) + 1, args.audio)
+            for profile in args.profiles:
+                for mode in args.modes:
+                    cache_dir = os.path.join(work_dir, "cache", f"{mode}_{profile}_{duration}" if args.cold_cache else "shared")
+                    mode_background = still_background if RENDER_MODES[mode].get('background') == 'still' else background
+                    r = run_case(mode, profile, duration, mode_background, audio_path, work_dir, cache_dir)
+                    results.append(r)
+                    if 'error' in r:
+                        print(f"{mode:>15} {profile:>9} {duration:>4}s ❌ {r['error'].splitlines()[-1]}")
+                        continue
+                    print(f"{mode:>15} {profile:>9} {duration:>4}s {r['frames']:>7} {r['seconds']:>7.2f} "
+                          f"{r['render_fps']:>7.1f} {r['realtime_factor']:>6.2f} {r['peak_rss_mb']:>7.1f} "
+                          f"{r['peak_child_rss_mb']:>9.1f} {r['output_bytes'] / 1e6:>7.2f}")
+                    os.remove(os.path.join(work_dir, f"{mode}_{profile}_{duration}s.mp4"))
+
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                    'cpu_count': os.cpu_count()},
+        'audio': args.audio,
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
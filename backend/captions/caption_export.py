@@ -0,0 +1,196 @@
+"""
+Caption Export Module for Video Generation
+Writes timed caption chunks as ASS (styled like the burned-in OpenCV
+captions), SRT and WebVTT subtitle files.
+"""
+
+import os
+import logging
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from captions.caption_renderer import CaptionRenderer, get_caption_renderer
+
+logger = logging.getLogger(__name__)
+
+# Sidecar subtitle formats written next to each reel
+CAPTION_FORMATS = ('ass', 'srt', 'vtt')
+
+
+class CaptionExporter:
+    """
+    Converts caption chunks (``text``/``speaker``/``start``/``end``) to subtitle files
+    """
+
+    def get_renderer(self, video_width: int, video_height: int) -> CaptionRenderer:
+        """Layout and speaker styles come from the shared renderer sized like the video"""
+        return get_caption_renderer(video_width, video_height)
+
+    def to_ass(self, captions: List[Dict], video_width: int, video_height: int) -> str:
+        """
+        Build an ASS script with one style per speaker.
+
+        Matches the OpenCV captions: Montserrat Bold at the renderer's font size,
+        white text on a translucent speaker-coloured box, centred at the top
+        caption margin, wrapped with the renderer's line breaking.
+        """
+        renderer = self.get_renderer(video_width, video_height)
+        font_size = round(renderer.font_size * _ass_font_scale(renderer.font))
+        box_alpha = round((1 - renderer.background_alpha) * 255)  # ASS alpha: 0 = opaque
+
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {video_width}",
+            f"PlayResY: {video_height}",
+            "WrapStyle: 2",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+        ]
+        for speaker, colors in renderer.speaker_colors.items():
+            # BorderStyle 3 draws an opaque box in OutlineColour, Outline px around the text
+            lines.append(
+                f"Style: {speaker},Montserrat,{font_size},{_ass_color(colors['text'])},"
+                f"{_ass_color(colors['text'])},{_ass_color(colors['background'], box_alpha)},"
+                f"{_ass_color((0, 0, 0), box_alpha)},-1,0,0,0,100,100,0,0,3,{renderer.background_padding},0,"
+                f"8,{renderer.caption_side_margin},{renderer.caption_side_margin},"
+                f"{renderer.caption_top_margin + renderer.background_padding},1"
+            )
+
+        lines += [
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        ]
+        for caption in captions:
+            text = caption['text'].replace('{', '(').replace('}', ')')
+            if not text.strip():
+                continue
+            style = caption['speaker'] if caption['speaker'] in renderer.speaker_colors else 'default'
+            # The OpenCV renderer puts the first line's top one text height below the box padding
+            wrapped, first_line_height = renderer.layout_caption(text)
+            margin_v = renderer.caption_top_margin + renderer.background_padding + first_line_height
+            lines.append(f"Dialogue: 0,{_ass_time(caption['start'])},{_ass_time(caption['end'])},"
+                         f"{style},,0,0,{margin_v},," + "\\N".join(wrapped))
+
+        return "\n".join(lines) + "\n"
+
+    def to_srt(self, captions: List[Dict]) -> str:
+        """SubRip cues numbered from 1, speaker-agnostic plain text"""
+        cues = []
+        for caption in _non_empty(captions):
+            cues.append(f"{len(cues) + 1}\n"
+                        f"{_timestamp(caption['start'], ',')} --> {_timestamp(caption['end'], ',')}\n"
+                        f"{caption['text'].strip()}\n")
+        return "\n".join(cues)
+
+    def to_vtt(self, captions: List[Dict]) -> str:
+        """WebVTT cues; the speaker is carried as a voice span (<v trump>) for client styling"""
+        cues = ["WEBVTT\n"]
+        for caption in _non_empty(captions):
+            text = caption['text'].strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            cues.append(f"{_timestamp(caption['start'], '.')} --> {_timestamp(caption['end'], '.')}\n"
+                        f"<v {caption['speaker']}>{text}\n")
+        return "\n".join(cues)
+
+    def write_ass(self, captions: List[Dict], output_path: str, video_width: int, video_height: int) -> str:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_ass(captions, video_width, video_height))
+        logger.info(f"📝 ASS captions written: {output_path} ({len(captions)} events)")
+        return output_path
+
+    def write_sidecars(self, captions: List[Dict], video_path: str, video_width: int, video_height: int,
+                       formats: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """
+        Write ``<video stem>.<format>`` next to the reel for each format.
+
+        Returns a format -> path mapping.
+        """
+        stem = os.path.splitext(video_path)[0]
+        paths = {}
+        for fmt in formats or CAPTION_FORMATS:
+            path = f"{stem}.{fmt}"
+            if fmt == 'ass':
+                content = self.to_ass(captions, video_width, video_height)
+            elif fmt == 'srt':
+                content = self.to_srt(captions)
+            elif fmt == 'vtt':
+                content = self.to_vtt(captions)
+            else:
+                raise ValueError(f"Unsupported caption format: {fmt}")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            paths[fmt] = path
+        logger.info(f"📝 Caption sidecars written for {video_path}: {', '.join(paths)}")
+        return paths
+
+
+def _ass_color(bgr: Tuple[int, int, int], alpha: int = 0) -> str:
+    """ASS colours are &HAABBGGRR, which is the BGR tuple order OpenCV uses"""
+    b, g, r = bgr
+    return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+
+def _ass_font_scale(font_path: str) -> float:
+    """
+    ASS font sizes are line heights (OS/2 winAscent + winDescent), PIL sizes are em
+    sizes; return the factor between them for a TrueType font (1.0 if unknown).
+    """
+    try:
+        with open(font_path, 'rb') as f:
+            data = f.read()
+        tables = {}
+        for i in range(struct.unpack('>H', data[4:6])[0]):
+            tag, _, offset, _ = struct.unpack('>4sIII', data[12 + 16 * i:28 + 16 * i])
+            tables[tag] = offset
+        units_per_em = struct.unpack('>H', data[tables[b'head'] + 18:tables[b'head'] + 20])[0]
+        win_ascent, win_descent = struct.unpack('>HH', data[tables[b'OS/2'] + 74:tables[b'OS/2'] + 78])
+        return (win_ascent + win_descent) / units_per_em
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read font metrics from {font_path}: {e}")
+        return 1.0
+
+
+def _non_empty(captions: List[Dict]) -> List[Dict]:
+    return [caption for caption in captions if caption['text'].strip()]
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    """HH:MM:SS<sep>mmm as used by SRT (',') and WebVTT ('.')"""
+    milliseconds = max(0, int(round(seconds * 1000)))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def _ass_time(seconds: float) -> str:
+    """H:MM:SS.cc"""
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+# Global instance
+caption_exporter = CaptionExporter()
+
+
+def write_ass_captions(captions: List[Dict], output_path: str, video_width: int, video_height: int) -> str:
+    """
+    Main function to write captions as an ASS subtitle file
+    """
+    return caption_exporter.write_ass(captions, output_path, video_width, video_height)
+
+
+def write_caption_sidecars(captions: List[Dict], video_path: str, video_width: int, video_height: int,
+                           formats: Optional[Sequence[str]] = None) -> Dict[str, str]:
+    """
+    Main function to write ASS/SRT/WebVTT caption files next to a reel
+    """
+    return caption_exporter.write_sidecars(captions, video_path, video_width, video_height, formats)
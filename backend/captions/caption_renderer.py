@@ -9,9 +9,18 @@ import logging
 from typing import Dict, List, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 import os
+import threading
+
+from rendering.foreground_layer import ForegroundLayer, ForegroundLayerCache
 
 logger = logging.getLogger(__name__)
 
+# Byte budget for pre-rasterized caption bitmaps (per renderer)
+CAPTION_CACHE_MAX_BYTES = int(os.getenv("CAPTION_CACHE_MAX_MB", 32)) * 1024 * 1024
+
+# Advance-sum line widths within this fraction of the font size of the wrap limit are measured exactly
+WRAP_MEASURE_TOLERANCE = 0.25
+
 class CaptionRenderer:
     """
     Renders caption overlays on video frames using OpenCV
@@ -21,11 +30,12 @@ class CaptionRenderer:
         self.video_width = video_width
         self.video_height = video_height
         
-        # Calculate scaling factor based on video size (1080p as baseline)
-        scale_factor = min(video_width / 1080, video_height / 1920)
+        # Calculate scaling factor based on video size (1080p as baseline, short side vs 1080 in any orientation)
+        scale_factor = min(min(video_width, video_height) / 1080, max(video_width, video_height) / 1920)
         
         # Caption styling settings (scaled to video size)
-        self.font = self._get_montserrat_font_path()
+        self.font_weight = 'Bold'
+        self.font = self._get_montserrat_font_path(self.font_weight)
         self.font_size = max(16, int(72 * scale_factor))  # Minimum 16px, scaled from 72px baseline
         self.font_thickness = max(1, int(3 * scale_factor))  # Minimum 1px thickness
         self.line_spacing = max(8, int(20 * scale_factor))  # Pixels between lines
@@ -111,16 +121,46 @@ class CaptionRenderer:
             }
         }
         
+        # Fonts and glyph advances loaded once per (size, weight)
+        self._fonts: Dict[Tuple[int, str], ImageFont.ImageFont] = {}
+        self._glyph_advances: Dict[Tuple[int, str], Dict[str, float]] = {}
+        self._measure_draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        # PIL FreeType fonts are not thread-safe and this renderer is shared by every render
+        # thread: the measuring/drawing helpers below expect the caller to hold this lock
+        self._font_lock = threading.RLock()
+        
+        # Rounded-corner caption box masks per box size
+        self._rounded_masks: Dict[Tuple[int, int, int], np.ndarray] = {}
+        
+        # Rasterized captions: (text, style, frame size) -> cropped premultiplied bitmap
+        self._bitmaps = ForegroundLayerCache(self._rasterize_caption, CAPTION_CACHE_MAX_BYTES)
+        self._bitmaps_lock = threading.Lock()
+        
         logger.info(f"🎨 Caption renderer initialized for {video_width}x{video_height}")
-    
-    def _get_montserrat_font_path(self) -> str:
+
+    def style_settings(self) -> Dict:
+        """Every setting that changes how captions look (used in render cache keys)"""
+        return {
+            'font': os.path.basename(self.font) if self.font else None,
+            'font_size': self.font_size,
+            'font_thickness': self.font_thickness,
+            'line_spacing': self.line_spacing,
+            'caption_top_margin': self.caption_top_margin,
+            'caption_side_margin': self.caption_side_margin,
+            'background_padding': self.background_padding,
+            'background_alpha': self.background_alpha,
+            'corner_radius': self.corner_radius,
+            'speaker_colors': self.speaker_colors,
+        }
+
+    def _get_montserrat_font_path(self, weight: str = 'Bold') -> str:
         """Get Montserrat font path from local fonts directory"""
         try:
             # Path to local Montserrat font files
             base_dir = os.path.dirname(os.path.dirname(__file__))  # Go up to backend/
             font_dir = os.path.join(base_dir, "fonts/Montserrat/static")
 
-            font_path = os.path.join(font_dir, "Montserrat-Bold.ttf")
+            font_path = os.path.join(font_dir, f"Montserrat-{weight}.ttf")
 
             if os.path.exists(font_path):
                 logger.info(f"✅ Found Montserrat font: {font_path}")
@@ -130,18 +170,40 @@ class CaptionRenderer:
             logger.warning(f"⚠️ Error finding Montserrat font: {e}")
 
 
+    def _get_font(self, size: Optional[int] = None, weight: Optional[str] = None):
+        """Return the caption font for (size, weight), loading it from disk only once"""
+        size = size or self.font_size
+        weight = weight or self.font_weight
+        key = (size, weight)
+        font = self._fonts.get(key)
+        if font is None:
+            font_path = self.font if weight == self.font_weight else self._get_montserrat_font_path(weight)
+            font = ImageFont.truetype(font_path, size) if font_path else ImageFont.load_default()
+            self._fonts[key] = font
+        return font
+    
+    def _get_glyph_advances(self, size: Optional[int] = None, weight: Optional[str] = None) -> Dict[str, float]:
+        """Per-font table of character advances, filled lazily as new characters appear"""
+        key = (size or self.font_size, weight or self.font_weight)
+        return self._glyph_advances.setdefault(key, {})
+    
+    def _advance_prefix_sum(self, text: str) -> np.ndarray:
+        """Cumulative advance widths: the run text[i:j] spans prefix[j] - prefix[i] pixels"""
+        font = self._get_font()
+        advances = self._get_glyph_advances()
+        widths = np.empty(len(text) + 1)
+        widths[0] = 0.0
+        for i, char in enumerate(text):
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = font.getlength(char)
+            widths[i + 1] = advance
+        return np.cumsum(widths)
+    
     def _get_text_size(self, text: str) -> Tuple[int, int]:
         """Get text size in pixels using PIL for Arial font"""
         try:
-            if self.font:
-                font = ImageFont.truetype(self.font, self.font_size)
-            else:
-                font = ImageFont.load_default()
-            
-            # Create temporary image to measure text
-            temp_img = Image.new('RGB', (1, 1))
-            draw = ImageDraw.Draw(temp_img)
-            bbox = draw.textbbox((0, 0), text, font=font)
+            bbox = self._measure_draw.textbbox((0, 0), text, font=self._get_font())
             
             width = bbox[2] - bbox[0]
             height = bbox[3] - bbox[1]
@@ -172,8 +234,8 @@ class CaptionRenderer:
             pil_image = Image.fromarray(frame_rgb)
             draw = ImageDraw.Draw(pil_image)
             
-            # Load Arial font
-            font = ImageFont.truetype(self.font, self.font_size)
+            # Cached caption font
+            font = self._get_font()
             
             # Convert BGR color to RGB for PIL
             rgb_color = (color[2], color[1], color[0])
@@ -211,25 +273,44 @@ class CaptionRenderer:
         """
         Wrap text to fit within max_width pixels
         Returns list of text lines
+        
+        Line widths come from a prefix sum of cached glyph advances; PIL only
+        measures a line when that estimate is too close to max_width to decide.
         """
         words = text.split()
+        joined = " ".join(words)
+        prefix = self._advance_prefix_sum(joined)
+        # Ink box vs advance sum differs by side bearings and kerning only
+        tolerance = self.font_size * WRAP_MEASURE_TOLERANCE
         lines = []
         current_line = ""
+        line_start = 0
+        word_start = 0
         
         for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            text_width, _ = self._get_text_size(test_line)
+            word_end = word_start + len(word)
+            test_line = joined[line_start:word_end]
+            estimate = prefix[word_end] - prefix[line_start]
+            if estimate < max_width - tolerance:
+                fits = True
+            elif estimate > max_width + tolerance:
+                fits = False
+            else:
+                fits = self._get_text_size(test_line)[0] <= max_width
             
-            if text_width <= max_width:
+            if fits:
                 current_line = test_line
             else:
                 if current_line:
                     lines.append(current_line)
                     current_line = word
+                    line_start = word_start
                 else:
                     # Single word is too long, use it anyway
                     lines.append(word)
                     current_line = ""
+                    line_start = word_end + 1
+            word_start = word_end + 1
         
         if current_line:
             lines.append(current_line)
@@ -239,37 +320,59 @@ class CaptionRenderer:
     def _draw_rounded_rectangle(self, frame: np.ndarray, top_left: Tuple[int, int], 
                                bottom_right: Tuple[int, int], color: Tuple[int, int, int], 
                                alpha: float = 1.0) -> None:
-        """Draw rounded rectangle with transparency"""
+        """Draw rounded rectangle with transparency (only the box region is touched)"""
         x1, y1 = top_left
         x2, y2 = bottom_right
         
-        # Create overlay for transparency
-        overlay = frame.copy()
-        
-        # Draw main rectangle
-        cv2.rectangle(overlay, (x1 + self.corner_radius, y1), 
-                     (x2 - self.corner_radius, y2), color, -1)
-        cv2.rectangle(overlay, (x1, y1 + self.corner_radius), 
-                     (x2, y2 - self.corner_radius), color, -1)
-        
-        # Draw corner circles
-        cv2.circle(overlay, (x1 + self.corner_radius, y1 + self.corner_radius), 
-                  self.corner_radius, color, -1)
-        cv2.circle(overlay, (x2 - self.corner_radius, y1 + self.corner_radius), 
-                  self.corner_radius, color, -1)
-        cv2.circle(overlay, (x1 + self.corner_radius, y2 - self.corner_radius), 
-                  self.corner_radius, color, -1)
-        cv2.circle(overlay, (x2 - self.corner_radius, y2 - self.corner_radius), 
-                  self.corner_radius, color, -1)
+        # Region of interest: the rectangle is drawn inclusive of its corners
+        roi = frame[max(0, y1):max(0, y2 + 1), max(0, x1):max(0, x2 + 1)]
+        if roi.size == 0:
+            return
+        mask = self._get_rounded_mask(x2 - x1 + 1, y2 - y1 + 1)
+        mask = mask[max(0, -y1):max(0, -y1) + roi.shape[0], max(0, -x1):max(0, -x1) + roi.shape[1]]
         
-        # Apply transparency
-        cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+        # Apply transparency inside the rounded shape
+        tint = np.empty_like(roi)
+        cv2.rectangle(tint, (0, 0), (tint.shape[1], tint.shape[0]), color, -1)
+        cv2.addWeighted(tint, alpha, roi, 1 - alpha, 0, tint)
+        cv2.copyTo(tint, mask, roi)
+    
+    def _get_rounded_mask(self, width: int, height: int) -> np.ndarray:
+        """Rounded-corner mask (0/255) for a box size, drawn once and cached"""
+        key = (width, height, self.corner_radius)
+        mask = self._rounded_masks.get(key)
+        if mask is None:
+            r = self.corner_radius
+            x2, y2 = width - 1, height - 1
+            mask = np.zeros((height, width), dtype=np.uint8)
+            
+            # Draw main rectangle
+            cv2.rectangle(mask, (r, 0), (x2 - r, y2), 255, -1)
+            cv2.rectangle(mask, (0, r), (x2, y2 - r), 255, -1)
+            
+            # Draw corner circles
+            cv2.circle(mask, (r, r), r, 255, -1)
+            cv2.circle(mask, (x2 - r, r), r, 255, -1)
+            cv2.circle(mask, (r, y2 - r), r, 255, -1)
+            cv2.circle(mask, (x2 - r, y2 - r), r, 255, -1)
+            
+            self._rounded_masks[key] = mask
+        return mask
+    
+    def layout_caption(self, caption_text: str) -> Tuple[List[str], int]:
+        """Lines a caption wraps to inside its box, and the pixel height of the first one (0 if empty)"""
+        with self._font_lock:
+            lines = self._wrap_text(caption_text, self.caption_max_width - (2 * self.background_padding))
+            return lines, self._get_text_size(lines[0])[1] if lines else 0
     
     def render_caption(self, frame: np.ndarray, caption_text: str, 
                       speaker: str = 'default') -> np.ndarray:
         """
         Render caption overlay on video frame
         
+        The caption is rasterized once per (text, speaker style, frame size)
+        and every later call only blends the cached bitmap.
+        
         Args:
             frame: Video frame (BGR format)
             caption_text: Text to display
@@ -282,6 +385,28 @@ class CaptionRenderer:
             if not caption_text.strip():
                 return frame
             
+            style = speaker if speaker in self.speaker_colors else 'default'
+            key = (caption_text, style, frame.shape[1], frame.shape[0])
+            with self._bitmaps_lock:
+                bitmap = self._bitmaps.get(key)
+            bitmap.blend_onto(frame)
+            return frame
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to render caption: {str(e)}")
+            return frame
+    
+    def _rasterize_caption(self, key) -> ForegroundLayer:
+        """Draw a caption over black and white frames and keep the cropped premultiplied result"""
+        caption_text, style, width, height = key
+        with self._font_lock:
+            on_black = self._draw_caption(np.zeros((height, width, 3), dtype=np.uint8), caption_text, style)
+            on_white = self._draw_caption(np.full((height, width, 3), 255, dtype=np.uint8), caption_text, style)
+        return ForegroundLayer.from_matte(on_black, on_white)
+    
+    def _draw_caption(self, frame: np.ndarray, caption_text: str, speaker: str) -> np.ndarray:
+        """Draw the caption box and text directly on a frame"""
+        try:
             # Get speaker colors
             colors = self.speaker_colors.get(speaker, self.speaker_colors['default'])
             
@@ -348,20 +473,21 @@ class CaptionRenderer:
             logger.error(f"❌ Failed to render caption: {str(e)}")
             return frame
     
-# Global instance - will be initialized with proper dimensions
-caption_renderer = None
+# Global instances - one per video size (render profiles use different dimensions)
+caption_renderers = {}
+
+def get_caption_renderer(video_width: int, video_height: int) -> CaptionRenderer:
+    """Return the shared renderer for a video size, creating it on first use"""
+    renderer = caption_renderers.get((video_width, video_height))
+    if renderer is None:
+        logger.info(f"🎨 Initializing caption renderer for video dimensions: {video_width}x{video_height}")
+        renderer = caption_renderers.setdefault((video_width, video_height), CaptionRenderer(video_width, video_height))
+    return renderer
 
 def render_caption_on_frame(frame: np.ndarray, caption_text: str, 
                            speaker: str = 'default') -> np.ndarray:
     """
     Main function to render caption on video frame
     """
-    global caption_renderer
-    
-    # Initialize renderer with frame dimensions if not already done
-    if caption_renderer is None:
-        video_height, video_width = frame.shape[:2]
-        logger.info(f"🎨 Initializing caption renderer for video dimensions: {video_width}x{video_height}")
-        caption_renderer = CaptionRenderer(video_width, video_height)
-    
-    return caption_renderer.render_caption(frame, caption_text, speaker)
\ No newline at end of file
+    video_height, video_width = frame.shape[:2]
+    return get_caption_renderer(video_width, video_height).render_caption(frame, caption_text, speaker)
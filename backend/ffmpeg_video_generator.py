@@ -0,0 +1,176 @@
+"""
+FFmpeg Filtergraph Video Generation
+Renders the same reels as OpenCVVideoGenerator without a Python frame loop:
+the background is a looped input, speaker sprites are switched with timed
+overlays and captions are burned in from a generated ASS file, all inside
+one native ffmpeg process.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import subprocess
+import logging
+from typing import List
+
+import cv2
+import numpy as np
+
+from captions.caption_export import write_ass_captions
+from opencv_video_generator import OpenCVVideoGenerator
+from rendering.background_source import is_still_image
+from rendering.ffmpeg_writer import get_ffmpeg_path
+from rendering.progressive_output import FRAGMENTED_MP4_ARGS, FRAGMENT_SECONDS
+from rendering.render_stats import RenderStats
+
+logger = logging.getLogger(__name__)
+
+# Transition opacity granularity for speaker overlays (out of 255)
+OVERLAY_ALPHA_STEP = 16
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "Montserrat", "static")
+
+
+class FFmpegFilterVideoGenerator(OpenCVVideoGenerator):
+    """
+    Filtergraph backend: timeline, captions, duration and sprites are prepared
+    exactly like the OpenCV backend; only the rendering step differs.
+    """
+
+    def _render_video(self, schedule, speakers, speaker_images, background_path, audio_path, output_path,
+                      render_workers, request_id, renditions=(), streaming=False, stats=None, aspect_outputs=()):
+        """Compile the schedule into one filter_complex and let ffmpeg render the whole reel"""
+        if stats is None:
+            stats = RenderStats(request_id)
+        if aspect_outputs or is_still_image(background_path):
+            # Extra aspect ratios share one background decode in the OpenCV frame loop, and
+            # still images are composed once per state change there
+            logger.info(f"📐 [{request_id}] Aspect ratio outputs or still background - using the OpenCV frame loop")
+            return super()._render_video(schedule, speakers, speaker_images, background_path, audio_path, output_path,
+                                         render_workers, request_id, renditions, streaming, stats, aspect_outputs)
+        if not os.path.exists(background_path):
+            raise Exception("Could not load background video")
+
+        work_dir = tempfile.mkdtemp(prefix=f"filtergraph_{request_id}_")
+        try:
+            cmd = self.build_command(schedule, speaker_images, background_path, audio_path, output_path, work_dir,
+                                     renditions, streaming)
+            logger.info(f"🎛️ [{request_id}] Running FFmpeg filtergraph render ({schedule.total_frames} frames)")
+            logger.info(f"🎛️ [{request_id}] FFmpeg command: {' '.join(cmd)}")
+            # Decode, overlays, captions, encode and mux all happen inside this one process
+            with stats.stage('ffmpeg_filtergraph'):
+                result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"❌ FFmpeg filtergraph render failed with return code: {result.returncode}")
+                logger.error(f"❌ FFmpeg stderr: {result.stderr}")
+                raise Exception(f"FFmpeg filtergraph render failed: {result.stderr}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def build_command(self, schedule, speaker_images, background_path, audio_path, output_path, work_dir,
+                      renditions=(), streaming=False) -> List[str]:
+        """
+        Build the ffmpeg command line; sprite PNGs and the ASS script go to work_dir.
+        The composed stream is split into one scaled output per (path, RenderProfile) rendition;
+        streaming outputs are fragmented MP4 with one fragment per FRAGMENT_SECONDS.
+        """
+        fps = self.fps
+        inputs = ['-stream_loop', '-1', '-i', background_path]
+        filters = [f"[0:v]fps={fps},scale={self.video_width}:{self.video_height}:flags=area,setsar=1[bg0]"]
+        current = 'bg0'
+        next_input = 1
+
+        for speaker_id, speaker in enumerate(schedule.speakers):
+            sprite = speaker_images.get(speaker)
+            frames = np.flatnonzero(schedule.speaker_ids == speaker_id)
+            if sprite is None or frames.size == 0:
+                continue
+
+            # One static overlay per transition opacity level: the sprite image is decoded once and
+            # reused by the overlay filter, which is far cheaper than per-frame alpha filters
+            x_pos, y_pos = self.speaker_position(speaker, sprite)
+            bgra = sprite.to_bgra()
+            levels = _quantize_alpha(schedule.overlay_alpha[frames])
+            for level in np.unique(levels):
+                sprite_path = os.path.join(work_dir, f"sprite_{speaker_id}_{level}.png")
+                layer = bgra.copy()
+                layer[:, :, 3] = (bgra[:, :, 3].astype(np.uint16) * level + 127) // 255
+                cv2.imwrite(sprite_path, layer)
+                inputs += ['-i', sprite_path]
+
+                enable = '+'.join(f"between(t,{_frame_start_time(start, fps):.6f},{_frame_start_time(end, fps):.6f})"
+                                  for start, end in _frame_runs(frames[levels == level]))
+                filters.append(f"[{current}][{next_input}:v]overlay=x={x_pos + sprite.offset_x}:"
+                               f"y={y_pos + sprite.offset_y}:enable='{enable}'[v{next_input}]")
+                current = f"v{next_input}"
+                next_input += 1
+
+        if schedule.captions:
+            ass_path = write_ass_captions(schedule.captions, os.path.join(work_dir, "captions.ass"),
+                                          self.video_width, self.video_height)
+            filters.append(f"[{current}]ass=filename={_filter_value(ass_path)}:"
+                           f"fontsdir={_filter_value(FONTS_DIR)}[vcap]")
+            current = 'vcap'
+
+        outputs = [(output_path, f"[{current}]", self.profile)]
+        if renditions:
+            split_labels = [f"[out{i}]" for i in range(len(renditions) + 1)]
+            filters.append(f"[{current}]split={len(split_labels)}{''.join(split_labels)}")
+            outputs = [(output_path, split_labels[0], self.profile)]
+            for i, (rendition_path, rendition) in enumerate(renditions, start=1):
+                filters.append(f"{split_labels[i]}fps={rendition.fps},"
+                               f"scale={rendition.width}:{rendition.height}:flags=area[r{i}]")
+                outputs.append((rendition_path, f"[r{i}]", rendition))
+
+        cmd = [get_ffmpeg_path(), '-y', '-loglevel', 'error'] + inputs
+        if audio_path:
+            cmd += ['-i', audio_path]
+        cmd += ['-filter_complex', ';'.join(filters)]
+        for path, label, profile in outputs:
+            cmd += ['-map', label]
+            if audio_path:
+                cmd += ['-map', f"{next_input}:a", '-c:a', 'aac', '-shortest']
+            else:
+                cmd += ['-an']
+            cmd += [
+                '-frames:v', str(-(-schedule.total_frames * profile.fps // self.fps)),
+                '-c:v', 'libx264',
+                '-preset', profile.preset,
+                '-crf', str(profile.crf),
+                '-pix_fmt', 'yuv420p',
+            ]
+            if streaming:
+                gop = str(profile.fps * FRAGMENT_SECONDS)
+                cmd += ['-g', gop, '-keyint_min', gop, '-sc_threshold', '0'] + FRAGMENTED_MP4_ARGS
+            cmd += [path]
+        return cmd
+
+
+def _quantize_alpha(alpha: np.ndarray) -> np.ndarray:
+    """Snap 0-255 opacities to OVERLAY_ALPHA_STEP so a fade needs only a handful of overlays"""
+    levels = np.round(alpha / OVERLAY_ALPHA_STEP) * OVERLAY_ALPHA_STEP
+    return np.minimum(levels, 255).astype(np.int64)
+
+
+def _frame_start_time(frame_num: int, fps: int) -> float:
+    """Midpoint between a frame and its predecessor, so float timestamps never miss a boundary"""
+    return max(0.0, (frame_num - 0.5) / fps)
+
+
+def _frame_runs(frames: np.ndarray):
+    """Yield [start, end) for each run of consecutive frame numbers"""
+    breaks = np.flatnonzero(np.diff(frames) > 1)
+    starts = np.concatenate(([frames[0]], frames[breaks + 1]))
+    ends = np.concatenate((frames[breaks], [frames[-1]])) + 1
+    return zip(starts.tolist(), ends.tolist())
+
+
+def _filter_value(value: str) -> str:
+    """Escape a filter option value, then the filtergraph level, for use inside filter_complex"""
+    value = re.sub(r"([\\':])", r"\\\1", value)
+    return re.sub(r"([\\'\[\],;])", r"\\\1", value)
+
+
+# Global instance (using fast mode, like the OpenCV backend)
+ffmpeg_video_generator = FFmpegFilterVideoGenerator(fast_mode=True)
@@ -1,6 +1,9 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.exception_handlers import request_validation_exception_handler
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import os
@@ -8,12 +11,19 @@ import tempfile
 import logging
 import sys
 import shutil
+import uuid
 from datetime import datetime
+from typing import List, Literal, Optional
 
 from opencv_video_generator import test_video_overlay
 from llm import generate_script, generate_conversational_script, test_api_key, generate_case_study_summary, translate_text
 from conversational_tts import generate_conversational_voiceover, SPEAKER_PAIRS
-from opencv_video_generator import create_background_video_with_speaker_overlays
+from opencv_video_generator import create_background_video_with_speaker_overlays, RENDER_BACKENDS, DEFAULT_RENDER_BACKEND
+from captions.caption_export import CAPTION_FORMATS
+from rendering.render_profiles import RENDER_PROFILES, get_render_profile, rendition_output_path, resolve_renditions
+from rendering.layouts import ASPECT_RATIOS, aspect_output_path, resolve_aspects
+from rendering.progressive_output import progressive_outputs
+from rendering.render_stats import RenderStats, stage_histograms
 from article_extractor import extract_article_from_url
 from topic_search import search_and_extract_topic
 from case_study_processor import process_case_study_file, process_case_study_text
@@ -60,20 +70,106 @@ async def test_endpoint():
         "timestamp": datetime.now().isoformat()
     }
 
+# Request values accepted for the render options; anything else is rejected with 400
+RenderBackendName = Literal[RENDER_BACKENDS]
+RenderProfileName = Literal[tuple(RENDER_PROFILES)]
+AspectName = Literal[tuple(ASPECT_RATIOS)]
+RENDER_OPTION_FIELDS = {'render_backend', 'render_profile', 'renditions', 'aspects'}
+
+@app.exception_handler(RequestValidationError)
+async def render_option_validation_handler(request, exc):
+    """Unknown render backends / profiles / renditions / aspect ratios are a bad request, not a 422 schema error"""
+    if any(RENDER_OPTION_FIELDS.intersection(map(str, error.get('loc', ()))) for error in exc.errors()):
+        return JSONResponse(status_code=400, content={"detail": jsonable_encoder(exc.errors())})
+    return await request_validation_exception_handler(request, exc)
+
+def check_render_options(render_backend=None, render_profile=None, renditions=None, aspects=None):
+    """Reject render options the generator would refuse (e.g. a rendition larger than the profile) with 400"""
+    render_backend = render_backend or DEFAULT_RENDER_BACKEND
+    if render_backend not in RENDER_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown render backend '{render_backend}' "
+                                                    f"(expected one of {', '.join(RENDER_BACKENDS)})")
+    try:
+        profile = get_render_profile(render_profile)
+        resolve_renditions(profile, renditions)
+        resolve_aspects(profile, aspects)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 class ArticleInput(BaseModel):
     url: str = None
     text: str = None
     title: str = None
     speaker_pair: str = "trump_mrbeast"  # Default to Trump & MrBeast
+    render_backend: Optional[RenderBackendName] = None  # "opencv" (frame loop, default) or "ffmpeg" (single filtergraph)
+    burn_captions: bool = True  # False: captions only as ASS/SRT/WebVTT sidecar files
+    render_profile: Optional[RenderProfileName] = None  # "preview", "standard" (default) or "hd"
+    renditions: Optional[List[RenderProfileName]] = None  # Smaller profiles encoded from the same render pass, e.g. ["preview"]
+    aspects: Optional[List[AspectName]] = None  # Other aspect ratios framed from the same background pass, e.g. ["1:1", "16:9"]
 
 class TopicInput(BaseModel):
     topic: str
     speaker_pair: str = "trump_mrbeast"  # Default to Trump & MrBeast
+    render_backend: Optional[RenderBackendName] = None  # "opencv" (frame loop, default) or "ffmpeg" (single filtergraph)
+    burn_captions: bool = True  # False: captions only as ASS/SRT/WebVTT sidecar files
+    render_profile: Optional[RenderProfileName] = None  # "preview", "standard" (default) or "hd"
+    renditions: Optional[List[RenderProfileName]] = None  # Smaller profiles encoded from the same render pass, e.g. ["preview"]
+    aspects: Optional[List[AspectName]] = None  # Other aspect ratios framed from the same background pass, e.g. ["1:1", "16:9"]
 
 class ReelResponse(BaseModel):
     script: str
     audio_url: str
     video_url: str = None
+    caption_urls: dict = None  # Caption format ("ass", "srt", "vtt") -> download URL
+    rendition_urls: dict = None  # Extra render profile name -> download URL
+    aspect_urls: dict = None  # Extra aspect ratio ("1:1", "16:9") -> download URL
+    render_stats: dict = None  # Seconds spent per render stage (see rendering.render_stats)
+
+class StreamingReelResponse(BaseModel):
+    script: str
+    stream_url: str  # Fragmented MP4, playable while the render is running
+    status_url: str  # "rendering" / "done" / "failed", preview URLs, plus the ReelResponse URLs once done
+
+# Content types for caption sidecars served through /download
+CAPTION_MEDIA_TYPES = {'.ass': 'text/x-ssa', '.srt': 'application/x-subrip', '.vtt': 'text/vtt'}
+
+def _publish_sidecar(source_path, filename, target_dirs):
+    """Copy a file written next to the rendered video into the published folders, then remove it"""
+    for target_dir in target_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.copy2(source_path, os.path.join(target_dir, filename))
+    os.remove(source_path)
+    return f"/download/{filename}"
+
+def publish_caption_sidecars(video_path, video_filename, *target_dirs):
+    """Copy the caption files written next to video_path under the published video's name"""
+    caption_urls = {}
+    source_stem = os.path.splitext(video_path)[0]
+    target_stem = os.path.splitext(video_filename)[0]
+    for fmt in CAPTION_FORMATS:
+        source_path = f"{source_stem}.{fmt}"
+        if os.path.exists(source_path):
+            caption_urls[fmt] = _publish_sidecar(source_path, f"{target_stem}.{fmt}", target_dirs)
+    return caption_urls
+
+def publish_renditions(video_path, video_filename, *target_dirs):
+    """Copy the extra renditions written next to video_path under the published video's name"""
+    rendition_urls = {}
+    for name, profile in RENDER_PROFILES.items():
+        source_path = rendition_output_path(video_path, profile)
+        if os.path.exists(source_path):
+            rendition_urls[name] = _publish_sidecar(source_path, rendition_output_path(video_filename, profile),
+                                                    target_dirs)
+    return rendition_urls
+
+def publish_aspects(video_path, video_filename, *target_dirs):
+    """Copy the other aspect ratios written next to video_path under the published video's name"""
+    aspect_urls = {}
+    for aspect in ASPECT_RATIOS:
+        source_path = aspect_output_path(video_path, aspect)
+        if os.path.exists(source_path):
+            aspect_urls[aspect] = _publish_sidecar(source_path, aspect_output_path(video_filename, aspect), target_dirs)
+    return aspect_urls
 
 @app.on_event("startup")
 async def startup_event():
@@ -94,6 +190,69 @@ async def startup_event():
     
     logger.info("🏥 Health check endpoint available at /health")
     logger.info("📝 Generate reel endpoint available at /generate-reel")
+    logger.info("📡 Streaming reel endpoint available at /generate-reel-stream")
+
+def save_reel_outputs(request_id, script, audio_path, video_path, render_stats=None):
+    """Save script, audio, video and sidecars to the organized output folders and static/"""
+    logger.info(f"💾 [{request_id}] Step 5: Saving files to organized folder structure")
+    
+    # Create organized output directories
+    output_base = os.path.expanduser("~/Downloads/info_reeler_outputs")
+    scripts_dir = os.path.join(output_base, "scripts")
+    audio_dir = os.path.join(output_base, "audio")
+    videos_dir = os.path.join(output_base, "videos")
+    
+    for directory in [scripts_dir, audio_dir, videos_dir]:
+        os.makedirs(directory, exist_ok=True)
+    
+    # Create better filenames with timestamp and request ID
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    script_filename = f"script_{timestamp}_{request_id}.txt"
+    audio_filename = f"audio_{timestamp}_{request_id}.wav"
+    video_filename = f"video_{timestamp}_{request_id}.mp4"
+    
+    # Save script to organized folder
+    script_path = os.path.join(scripts_dir, script_filename)
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(script)
+    logger.info(f"📝 [{request_id}] Script saved: {script_path}")
+    
+    # Move audio and video to organized folders
+    audio_url = os.path.join(audio_dir, audio_filename)
+    video_url = os.path.join(videos_dir, video_filename)
+    
+    shutil.move(audio_path, audio_url)
+    shutil.move(video_path, video_url)
+    
+    # Also save to static dir for web access
+    static_dir = "static"
+    os.makedirs(static_dir, exist_ok=True)
+    static_audio_url = os.path.join(static_dir, audio_filename)
+    static_video_url = os.path.join(static_dir, video_filename)
+    
+    # Copy files to static directory for web access
+    shutil.copy2(audio_url, static_audio_url)
+    shutil.copy2(video_url, static_video_url)
+    caption_urls = publish_caption_sidecars(video_path, video_filename, videos_dir, static_dir)
+    rendition_urls = publish_renditions(video_path, video_filename, videos_dir, static_dir)
+    aspect_urls = publish_aspects(video_path, video_filename, videos_dir, static_dir)
+    
+    logger.info(f"✅ [{request_id}] Reel generation completed successfully!")
+    logger.info(f"📁 [{request_id}] Files saved to organized folders:")
+    logger.info(f"📝 Script: {script_path}")
+    logger.info(f"🎵 Audio: {audio_url}")
+    logger.info(f"🎬 Video: {video_url}")
+    logger.info(f"📊 [{request_id}] File sizes: Audio={os.path.getsize(audio_url)} bytes, Video={os.path.getsize(video_url)} bytes")
+    
+    return ReelResponse(
+        script=script,
+        audio_url=f"/download/{audio_filename}",
+        video_url=f"/download/{video_filename}",
+        caption_urls=caption_urls,
+        rendition_urls=rendition_urls,
+        aspect_urls=aspect_urls,
+        render_stats=render_stats.as_dict() if render_stats else None
+    )
 
 @app.post("/generate-reel", response_model=ReelResponse)
 async def generate_info_reel(article: ArticleInput):
@@ -101,6 +260,8 @@ async def generate_info_reel(article: ArticleInput):
     logger.info(f"🔄 [{request_id}] Starting reel generation process")
     logger.info(f"📄 [{request_id}] Input: URL={article.url}, Text length={len(article.text) if article.text else 0}")
     
+    check_render_options(article.render_backend, article.render_profile, article.renditions, article.aspects)
+    
     try:
         # Step 1: Extract/clean content
         logger.info(f"📖 [{request_id}] Step 1: Extracting content")
@@ -128,74 +289,116 @@ async def generate_info_reel(article: ArticleInput):
         
         # Step 4: Create video with default background
         logger.info(f"🎬 [{request_id}] Step 4: Creating video with default background")
-        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, article.speaker_pair, timing_data)
+        render_stats = RenderStats(request_id)
+        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, article.speaker_pair, timing_data, None, article.render_backend, article.burn_captions, article.render_profile, article.renditions, False, None, render_stats, article.aspects)
         logger.info(f"🎬 [{request_id}] Video created: {video_path}")
         
         # Save all content to organized folder structure
-        logger.info(f"💾 [{request_id}] Step 5: Saving files to organized folder structure")
-        
-        # Create organized output directories
-        output_base = os.path.expanduser("~/Downloads/info_reeler_outputs")
-        scripts_dir = os.path.join(output_base, "scripts")
-        audio_dir = os.path.join(output_base, "audio")
-        videos_dir = os.path.join(output_base, "videos")
-        
-        for directory in [scripts_dir, audio_dir, videos_dir]:
-            os.makedirs(directory, exist_ok=True)
-        
-        # Create better filenames with timestamp and request ID
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        script_filename = f"script_{timestamp}_{request_id}.txt"
-        audio_filename = f"audio_{timestamp}_{request_id}.wav"
-        video_filename = f"video_{timestamp}_{request_id}.mp4"
-        
-        # Save script to organized folder
-        script_path = os.path.join(scripts_dir, script_filename)
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(script)
-        logger.info(f"📝 [{request_id}] Script saved: {script_path}")
-        
-        # Move audio and video to organized folders
-        audio_url = os.path.join(audio_dir, audio_filename)
-        video_url = os.path.join(videos_dir, video_filename)
-        
-        shutil.move(audio_path, audio_url)
-        shutil.move(video_path, video_url)
+        return save_reel_outputs(request_id, script, audio_path, video_path, render_stats)
+    except Exception as e:
+        logger.error(f"❌ [{request_id}] Error during reel generation: {str(e)}")
+        logger.error(f"❌ [{request_id}] Error type: {type(e).__name__}")
+        logger.error(f"❌ [{request_id}] Full error details: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/generate-reel-stream", response_model=StreamingReelResponse)
+async def generate_streaming_reel(article: ArticleInput):
+    """
+    Same pipeline as /generate-reel, but returns as soon as rendering starts:
+    stream_url serves the fragmented MP4 while it is encoded, status_url
+    reports the poster/animated preview URLs as soon as they exist and the
+    published URLs once the render is done.
+    """
+    request_id = f"req_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    logger.info(f"🔄 [{request_id}] Starting streaming reel generation process")
+    
+    check_render_options(article.render_backend, article.render_profile, article.renditions, article.aspects)
+    
+    try:
+        # Step 1: Extract/clean content
+        if article.url:
+            logger.info(f"🌐 [{request_id}] Extracting from URL: {article.url}")
+            content = extract_article_from_url(article.url)
+        else:
+            content = article.text
+        logger.info(f"📄 [{request_id}] Content length: {len(content)} characters")
         
-        # Also save to static dir for web access
-        static_dir = "static"
-        os.makedirs(static_dir, exist_ok=True)
-        static_audio_url = os.path.join(static_dir, audio_filename)
-        static_video_url = os.path.join(static_dir, video_filename)
+        # Step 2: Generate script (async)
+        loop = asyncio.get_event_loop()
+        script = await loop.run_in_executor(None, generate_conversational_script, content, article.speaker_pair, False)
+        logger.info(f"📜 [{request_id}] Script generated: {len(script)} characters")
         
-        # Copy files to static directory for web access
-        shutil.copy2(audio_url, static_audio_url)
-        shutil.copy2(video_url, static_video_url)
+        # Step 3: Generate audio
+        audio_path, timing_data = await loop.run_in_executor(None, generate_conversational_voiceover, script, None, article.speaker_pair)
+        logger.info(f"🎵 [{request_id}] Audio generated: {audio_path}")
         
-        logger.info(f"✅ [{request_id}] Reel generation completed successfully!")
-        logger.info(f"📁 [{request_id}] Files saved to organized folders:")
-        logger.info(f"📝 Script: {script_path}")
-        logger.info(f"🎵 Audio: {audio_url}")
-        logger.info(f"🎬 Video: {video_url}")
-        logger.info(f"📊 [{request_id}] File sizes: Audio={os.path.getsize(audio_url)} bytes, Video={os.path.getsize(video_url)} bytes")
+        # Step 4: Start the render in the background, writing fragmented MP4
+        # request_id only has one-second resolution: a uuid keeps concurrent streams apart
+        video_path = os.path.join(tempfile.gettempdir(), f"stream_{request_id}_{uuid.uuid4().hex}.mp4")
+        output = progressive_outputs.create(video_path)
+        output.task = asyncio.ensure_future(_render_streaming_reel(request_id, article, script, audio_path, timing_data, output))
+        logger.info(f"📡 [{request_id}] Streaming render started: /stream/{output.stream_id}")
         
-        return ReelResponse(
+        return StreamingReelResponse(
             script=script,
-            audio_url=f"/download/{audio_filename}",
-            video_url=f"/download/{video_filename}"
+            stream_url=f"/stream/{output.stream_id}",
+            status_url=f"/stream/{output.stream_id}/status"
         )
     except Exception as e:
-        logger.error(f"❌ [{request_id}] Error during reel generation: {str(e)}")
-        logger.error(f"❌ [{request_id}] Error type: {type(e).__name__}")
-        logger.error(f"❌ [{request_id}] Full error details: {e}")
+        logger.error(f"❌ [{request_id}] Error during streaming reel generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _render_streaming_reel(request_id, article, script, audio_path, timing_data, output):
+    """Background half of /generate-reel-stream: render, publish, then point the stream at the published file"""
+    loop = asyncio.get_event_loop()
+
+    def publish_preview(preview_paths):
+        # Runs on the render thread, before the full render starts
+        output.preview = {
+            "poster_url": _publish_sidecar(preview_paths['poster'], f"poster_{output.stream_id}.jpg", ["static"]),
+            "preview_url": _publish_sidecar(preview_paths['preview'], f"preview_{output.stream_id}.mp4", ["static"]),
+        }
+        logger.info(f"🖼️ [{request_id}] Preview published: {output.preview}")
+
+    try:
+        render_stats = RenderStats(request_id)
+        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, output.path, article.speaker_pair, timing_data, None, article.render_backend, article.burn_captions, article.render_profile, article.renditions, True, publish_preview, render_stats, article.aspects)
+        response = save_reel_outputs(request_id, script, audio_path, video_path, render_stats)
+        output.finish(response.dict(), path=os.path.join("static", os.path.basename(response.video_url)))
+    except Exception as e:
+        logger.error(f"❌ [{request_id}] Streaming render failed: {str(e)}")
+        output.fail(str(e))
+
+@app.get("/stream/{stream_id}")
+async def stream_video(stream_id: str):
+    """Serve a reel while it is being rendered (fragmented MP4, read as it grows)"""
+    output = progressive_outputs.get(stream_id)
+    if output is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    if output.error:
+        raise HTTPException(status_code=500, detail=output.error)
+    return StreamingResponse(output.iter_bytes(), media_type="video/mp4")
+
+@app.get("/metrics/render")
+async def render_metrics():
+    """Per-frame render stage histograms accumulated over all renders of this process"""
+    return stage_histograms.as_dict()
+
+@app.get("/stream/{stream_id}/status")
+async def stream_status(stream_id: str):
+    output = progressive_outputs.get(stream_id)
+    if output is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return {"status": output.status, "error": output.error, **output.preview, **output.result}
+
 @app.post("/generate-conversational-reel", response_model=ReelResponse)
 async def generate_conversational_reel(article: ArticleInput):
     request_id = f"req_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     logger.info(f"🔄 [{request_id}] Starting conversational reel generation process")
     logger.info(f"📄 [{request_id}] Input: URL={article.url}, Text length={len(article.text) if article.text else 0}")
     
+    check_render_options(article.render_backend, article.render_profile, article.renditions, article.aspects)
+    
     try:
         # Step 1: Extract/clean content
         logger.info(f"📖 [{request_id}] Step 1: Extracting content")
@@ -228,7 +431,8 @@ async def generate_conversational_reel(article: ArticleInput):
         # Step 4: Create conversational video with background and speaker overlays
         logger.info(f"🎬 [{request_id}] Step 4: Creating conversational video with background and speaker overlays")
         logger.info(f"🎭 [{request_id}] VIDEO GENERATION - Using speaker_pair for conversational-reel: {speaker_pair}")
-        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, speaker_pair, timing_data)
+        render_stats = RenderStats(request_id)
+        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, speaker_pair, timing_data, None, article.render_backend, article.burn_captions, article.render_profile, article.renditions, False, None, render_stats, article.aspects)
         logger.info(f"🎬 [{request_id}] Conversational video with background created: {video_path}")
         
         # Save all content to organized folder structure
@@ -271,6 +475,9 @@ async def generate_conversational_reel(article: ArticleInput):
         # Copy files to static directory for web access
         shutil.copy2(audio_url, static_audio_url)
         shutil.copy2(video_url, static_video_url)
+        caption_urls = publish_caption_sidecars(video_path, video_filename, videos_dir, static_dir)
+        rendition_urls = publish_renditions(video_path, video_filename, videos_dir, static_dir)
+        aspect_urls = publish_aspects(video_path, video_filename, videos_dir, static_dir)
         
         logger.info(f"✅ [{request_id}] Conversational reel generation completed successfully!")
         logger.info(f"📁 [{request_id}] Files saved to organized folders:")
@@ -282,7 +489,11 @@ async def generate_conversational_reel(article: ArticleInput):
         return ReelResponse(
             script=script,
             audio_url=f"/download/{audio_filename}",
-            video_url=f"/download/{video_filename}"
+            video_url=f"/download/{video_filename}",
+            caption_urls=caption_urls,
+            rendition_urls=rendition_urls,
+            aspect_urls=aspect_urls,
+            render_stats=render_stats.as_dict()
         )
     except Exception as e:
         logger.error(f"❌ [{request_id}] Error during conversational reel generation: {str(e)}")
@@ -310,6 +521,8 @@ async def generate_article_reel(article: ArticleInput):
     else:
         logger.error(f"❌ [{request_id}] - SPEAKER_PAIR ATTRIBUTE NOT FOUND IN ARTICLE OBJECT!")
     
+    check_render_options(article.render_backend, article.render_profile, article.renditions, article.aspects)
+    
     try:
         # Step 1: Extract article content from URL
         logger.info(f"📖 [{request_id}] Step 1: Extracting article content")
@@ -348,7 +561,8 @@ async def generate_article_reel(article: ArticleInput):
         # Step 4: Create conversational video with background and speaker overlays
         logger.info(f"🎬 [{request_id}] Step 4: Creating conversational video with background and speaker overlays")
         logger.info(f"🎭 [{request_id}] VIDEO GENERATION - Using speaker_pair: {speaker_pair}")
-        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, speaker_pair, timing_data)
+        render_stats = RenderStats(request_id)
+        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, speaker_pair, timing_data, None, article.render_backend, article.burn_captions, article.render_profile, article.renditions, False, None, render_stats, article.aspects)
         logger.info(f"🎬 [{request_id}] Video with background created successfully: {video_path}")
         
         # Step 5: Save files to outputs directory
@@ -375,8 +589,20 @@ async def generate_article_reel(article: ArticleInput):
         # Ensure outputs directory exists
         os.makedirs("outputs", exist_ok=True)
         
+        # Add metadata (including where the render spent its time) to the timeline
+        timeline_with_metadata = {
+            "metadata": {
+                "source_title": title,
+                "source_url": article.url,
+                "speaker_pair": speaker_pair,
+                "generated": datetime.now().isoformat(),
+                "render_stats": render_stats.as_dict()
+            },
+            "timeline": timeline
+        }
+        
         with open(timeline_path, 'w', encoding='utf-8') as f:
-            json.dump(timeline, f, indent=2)
+            json.dump(timeline_with_metadata, f, indent=2)
         logger.info(f"⏰ [{request_id}] Timeline saved: {timeline_path}")
         
         # Copy audio to outputs
@@ -389,6 +615,9 @@ async def generate_article_reel(article: ArticleInput):
         video_filename = f"article_video_{timestamp}.mp4"
         video_output_path = os.path.join("outputs", video_filename)
         shutil.copy2(video_path, video_output_path)
+        caption_urls = publish_caption_sidecars(video_path, video_filename, "outputs")
+        rendition_urls = publish_renditions(video_path, video_filename, "outputs")
+        aspect_urls = publish_aspects(video_path, video_filename, "outputs")
         logger.info(f"🎬 [{request_id}] Video saved: {video_output_path}")
         
         # Clean up temporary files
@@ -404,7 +633,11 @@ async def generate_article_reel(article: ArticleInput):
         return ReelResponse(
             script=script,
             audio_url=f"/download/{audio_filename}",
-            video_url=f"/download/{video_filename}"
+            video_url=f"/download/{video_filename}",
+            caption_urls=caption_urls,
+            rendition_urls=rendition_urls,
+            aspect_urls=aspect_urls,
+            render_stats=render_stats.as_dict()
         )
         
     except Exception as e:
@@ -422,6 +655,9 @@ async def generate_topic_reel(topic_input: TopicInput):
     logger.info(f"🎯 [{request_id}] Topic: {topic_input.topic}")
     logger.info(f"🎭 [{request_id}] Speaker pair: {topic_input.speaker_pair}")
     
+    check_render_options(topic_input.render_backend, topic_input.render_profile, topic_input.renditions,
+                         topic_input.aspects)
+    
     try:
         # Step 1: Search for articles about the topic
         logger.info(f"🔍 [{request_id}] Step 1: Searching for articles about '{topic_input.topic}'")
@@ -456,7 +692,8 @@ async def generate_topic_reel(topic_input: TopicInput):
         
         # Step 4: Create conversational video with background and speaker overlays
         logger.info(f"🎬 [{request_id}] Step 4: Creating conversational video with background and speaker overlays")
-        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, speaker_pair, timing_data)
+        render_stats = RenderStats(request_id)
+        video_path = await loop.run_in_executor(None, create_background_video_with_speaker_overlays, script, audio_path, None, None, speaker_pair, timing_data, None, topic_input.render_backend, topic_input.burn_captions, topic_input.render_profile, topic_input.renditions, False, None, render_stats, topic_input.aspects)
         logger.info(f"🎬 [{request_id}] Video with background created successfully: {video_path}")
         
         # Step 5: Save files to outputs directory
@@ -495,7 +732,8 @@ async def generate_topic_reel(topic_input: TopicInput):
                 "source_url": source_url,
                 "speaker_pair": speaker_pair,
                 "search_rank": article_data.get('search_rank', 'N/A'),
-                "generated": datetime.now().isoformat()
+                "generated": datetime.now().isoformat(),
+                "render_stats": render_stats.as_dict()
             },
             "timeline": timeline
         }
@@ -514,6 +752,9 @@ async def generate_topic_reel(topic_input: TopicInput):
         video_filename = f"topic_video_{timestamp}.mp4"
         video_output_path = os.path.join("outputs", video_filename)
         shutil.copy2(video_path, video_output_path)
+        caption_urls = publish_caption_sidecars(video_path, video_filename, "outputs")
+        rendition_urls = publish_renditions(video_path, video_filename, "outputs")
+        aspect_urls = publish_aspects(video_path, video_filename, "outputs")
         logger.info(f"🎬 [{request_id}] Video saved: {video_output_path}")
         
         # Clean up temporary files
@@ -531,7 +772,11 @@ async def generate_topic_reel(topic_input: TopicInput):
         return ReelResponse(
             script=script,
             audio_url=f"/download/{audio_filename}",
-            video_url=f"/download/{video_filename}"
+            video_url=f"/download/{video_filename}",
+            caption_urls=caption_urls,
+            rendition_urls=rendition_urls,
+            aspect_urls=aspect_urls,
+            render_stats=render_stats.as_dict()
         )
         
     except HTTPException:
@@ -550,13 +795,13 @@ async def download_file(filename: str):
     outputs_path = os.path.join("outputs", filename)
     if os.path.exists(outputs_path):
         logger.info(f"✅ File found in outputs: {outputs_path}")
-        return FileResponse(outputs_path)
+        return FileResponse(outputs_path, media_type=CAPTION_MEDIA_TYPES.get(os.path.splitext(filename)[1]))
     
     # Fallback to static directory (for legacy files)
     static_path = os.path.join("static", filename)
     if os.path.exists(static_path):
         logger.info(f"✅ File found in static: {static_path}")
-        return FileResponse(static_path)
+        return FileResponse(static_path, media_type=CAPTION_MEDIA_TYPES.get(os.path.splitext(filename)[1]))
     
     logger.error(f"❌ File not found in outputs or static: {filename}")
     raise HTTPException(status_code=404, detail="File not found")
@@ -704,12 +949,16 @@ async def get_speaker_pairs():
 
 # Case Study Endpoints (Full Video Generation) - Legacy synchronous endpoints
 @app.post("/generate-case-study")
-async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pair: str = Form(None)):
+async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pair: str = Form(None), render_backend: str = Form(None), burn_captions: bool = Form(True), render_profile: str = Form(None), renditions: str = Form(None), aspects: str = Form(None)):
     """Generate case study summary, script, and FULL VIDEO from uploaded file"""
     request_id = f"casestudy_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     logger.info(f"🔄 [{request_id}] Starting case study processing from file: {file.filename}")
     logger.info(f"🔄 [{request_id}] Speaker pair: {speaker_pair}")
     
+    renditions = [name.strip() for name in renditions.split(',')] if renditions else None
+    aspects = [aspect.strip() for aspect in aspects.split(',')] if aspects else None
+    check_render_options(render_backend, render_profile, renditions, aspects)
+    
     try:
         if not file:
             logger.error(f"❌ [{request_id}] No file uploaded")
@@ -734,6 +983,10 @@ async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pa
             # If speaker pair is provided, generate full video
             video_url = None
             audio_url = None
+            caption_urls = None
+            render_stats = None
+            rendition_urls = None
+            aspect_urls = None
             logger.info(f"🎭 [{request_id}] DEBUG - Checking video generation conditions:")
             logger.info(f"🎭 [{request_id}] DEBUG - speaker_pair: '{speaker_pair}' (type: {type(speaker_pair)})")
             logger.info(f"🎭 [{request_id}] DEBUG - case_study_data['script']: '{case_study_data['script']}' (length: {len(case_study_data['script']) if case_study_data['script'] else 0})")
@@ -753,9 +1006,11 @@ async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pa
                     
                     # Step 2: Create video with speaker overlays
                     logger.info(f"🎬 [{request_id}] Starting video generation...")
+                    render_stats = RenderStats(request_id)
                     video_path = await loop.run_in_executor(
                         None, create_background_video_with_speaker_overlays, 
-                        case_study_data["script"], audio_path, None, None, speaker_pair, timing_data
+                        case_study_data["script"], audio_path, None, None, speaker_pair, timing_data, None, render_backend, burn_captions, render_profile,
+                        renditions, False, None, render_stats, aspects
                     )
                     logger.info(f"🎬 [{request_id}] Case study video created: {video_path}")
                     
@@ -809,6 +1064,9 @@ async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pa
                     # Copy files to static directory for web access
                     shutil.copy2(final_audio_path, static_audio_path)
                     shutil.copy2(final_video_path, static_video_path)
+                    caption_urls = publish_caption_sidecars(video_path, video_filename, videos_dir, static_dir)
+                    rendition_urls = publish_renditions(video_path, video_filename, videos_dir, static_dir)
+                    aspect_urls = publish_aspects(video_path, video_filename, videos_dir, static_dir)
                     
                     # Set URLs for response
                     video_url = f"/download/{video_filename}"
@@ -832,6 +1090,10 @@ async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pa
                 "processed_at": case_study_data["processed_at"],
                 "video_url": video_url,
                 "audio_url": audio_url,
+                "caption_urls": caption_urls,
+                "rendition_urls": rendition_urls,
+                "aspect_urls": aspect_urls,
+                "render_stats": render_stats.as_dict() if render_stats else None,
                 "status": "success" if video_url and audio_url else "partial_success"
             }
             
@@ -854,6 +1116,11 @@ async def generate_case_study_from_file(file: UploadFile = File(...), speaker_pa
 class CaseStudyTextRequest(BaseModel):
     text: str
     speaker_pair: str = None
+    render_backend: Optional[RenderBackendName] = None  # "opencv" (frame loop, default) or "ffmpeg" (single filtergraph)
+    burn_captions: bool = True  # False: captions only as ASS/SRT/WebVTT sidecar files
+    render_profile: Optional[RenderProfileName] = None  # "preview", "standard" (default) or "hd"
+    renditions: Optional[List[RenderProfileName]] = None  # Smaller profiles encoded from the same render pass, e.g. ["preview"]
+    aspects: Optional[List[AspectName]] = None  # Other aspect ratios framed from the same background pass, e.g. ["1:1", "16:9"]
 
 @app.post("/generate-case-study-text")
 async def generate_case_study_from_text(request: CaseStudyTextRequest):
@@ -861,6 +1128,8 @@ async def generate_case_study_from_text(request: CaseStudyTextRequest):
     request_id = f"casestudy_text_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     logger.info(f"🔄 [{request_id}] Starting case study processing from text")
     
+    check_render_options(request.render_backend, request.render_profile, request.renditions, request.aspects)
+    
     try:
         if not request.text:
             raise HTTPException(status_code=400, detail="No text content provided")
@@ -874,6 +1143,10 @@ async def generate_case_study_from_text(request: CaseStudyTextRequest):
         # If speaker pair is provided, generate full video
         video_url = None
         audio_url = None
+        caption_urls = None
+        render_stats = None
+        rendition_urls = None
+        aspect_urls = None
         logger.info(f"🎭 [{request_id}] DEBUG - Checking video generation conditions:")
         logger.info(f"🎭 [{request_id}] DEBUG - speaker_pair: '{speaker_pair}' (type: {type(speaker_pair)})")
         logger.info(f"🎭 [{request_id}] DEBUG - case_study_data['script']: '{case_study_data['script']}' (length: {len(case_study_data['script']) if case_study_data['script'] else 0})")
@@ -893,9 +1166,10 @@ async def generate_case_study_from_text(request: CaseStudyTextRequest):
                 
                 # Step 2: Create video with speaker overlays
                 logger.info(f"🎬 [{request_id}] Starting video generation...")
+                render_stats = RenderStats(request_id)
                 video_path = await loop.run_in_executor(
                     None, create_background_video_with_speaker_overlays, 
-                    case_study_data["script"], audio_path, None, None, speaker_pair, timing_data
+                    case_study_data["script"], audio_path, None, None, speaker_pair, timing_data, None, request.render_backend, request.burn_captions, request.render_profile, request.renditions, False, None, render_stats, request.aspects
                 )
                 logger.info(f"🎬 [{request_id}] Case study video created: {video_path}")
                 
@@ -949,6 +1223,9 @@ async def generate_case_study_from_text(request: CaseStudyTextRequest):
                 # Copy files to static directory for web access
                 shutil.copy2(final_audio_path, static_audio_path)
                 shutil.copy2(final_video_path, static_video_path)
+                caption_urls = publish_caption_sidecars(video_path, video_filename, videos_dir, static_dir)
+                rendition_urls = publish_renditions(video_path, video_filename, videos_dir, static_dir)
+                aspect_urls = publish_aspects(video_path, video_filename, videos_dir, static_dir)
                 
                 # Set URLs for response
                 video_url = f"/download/{video_filename}"
@@ -972,6 +1249,10 @@ async def generate_case_study_from_text(request: CaseStudyTextRequest):
             "processed_at": case_study_data["processed_at"],
             "video_url": video_url,
             "audio_url": audio_url,
+            "caption_urls": caption_urls,
+            "rendition_urls": rendition_urls,
+            "aspect_urls": aspect_urls,
+            "render_stats": render_stats.as_dict() if render_stats else None,
             "status": "success" if video_url and audio_url else "partial_success"
         }
         
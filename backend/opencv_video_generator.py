@@ -9,80 +9,164 @@ import os
 import tempfile
 import subprocess
 import logging
-from PIL import Image, ImageDraw
 from datetime import datetime
 import json
+import shutil
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-from captions.caption_processor import enhance_timeline_with_captions, get_current_caption
-from captions.caption_renderer import render_caption_on_frame
+from captions.caption_processor import enhance_timeline_with_captions
+from captions.caption_renderer import render_caption_on_frame, get_caption_renderer
+from captions.caption_export import write_caption_sidecars
+from rendering.background_source import (SequentialBackgroundSource, StillBackgroundSource, is_still_image,
+                                         load_still_background, solid_background_frame)
+from rendering.background_cache import background_cache
+from rendering.ffmpeg_writer import FFmpegPipeWriter, FFmpegRunWriter, concat_chunks
+from rendering.sprite_cache import sprite_cache
+from rendering.compositing import BlendScratch, blend_premultiplied_layer
+from rendering.render_schedule import RenderSchedule, NO_SPEAKER, NO_CAPTION
+from rendering.foreground_layer import ForegroundLayer, ForegroundLayerCache
+from rendering.render_profiles import RenderProfile, get_render_profile, resolve_renditions, rendition_output_path
+from rendering.progressive_output import FRAGMENTED_MP4_ARGS, FRAGMENT_SECONDS
+from rendering.render_stats import RenderStats, stage_histograms
+from rendering.audio_probe import probe_audio_duration_us
+from rendering.render_cache import render_cache
+from rendering.frame_pipeline import FramePipeline, pipeline_pool_size, PIPELINE_QUEUE_FRAMES
+from rendering.frame_pool import FramePool
+from rendering.layouts import AspectLayout, aspect_output_path, background_canvas, resolve_aspects
 
 logger = logging.getLogger(__name__)
 
+# Speaker overlay images and the side of the screen each speaker stands on
+SPEAKER_ASSETS = {
+    'elon': {'path': "assets/elon.png", 'side': 'right'},
+    'trump': {'path': "assets/trump.png", 'side': 'left'},
+    'samay': {'path': "assets/samay.png", 'side': 'right'},
+    'baburao': {'path': "assets/baburao.png", 'side': 'left'},
+    'arpit': {'path': "assets/arpit.png", 'side': 'left'},
+    'mrbeast': {'path': "assets/mrbeast.png", 'side': 'right'},
+    'ronaldo': {'path': "assets/ronaldo.png", 'side': 'left'},
+    'ishowspeed': {'path': "assets/speed.png", 'side': 'right'},
+}
+
+# Render backends: Python frame loop ("opencv") or a single ffmpeg filtergraph ("ffmpeg")
+RENDER_BACKENDS = ('opencv', 'ffmpeg')
+DEFAULT_RENDER_BACKEND = os.getenv("RENDER_BACKEND", "opencv")
+
+# Parallel chunked rendering: worker processes per reel (1 = render in-process)
+DEFAULT_RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 1))
+CHUNK_GOP_SECONDS = 2  # Keyframe interval of chunk encodes; chunks start on a GOP boundary
+
+# Preview stage: poster JPEG plus a low-fps, low-resolution animated preview of the reel
+PREVIEW_FPS = 3
+PREVIEW_HEIGHT = 320
+POSTER_JPEG_QUALITY = 85
+
+# Part of every render cache key - bump when a change alters the frames or files a render produces
+GENERATOR_VERSION = 2
+
+# Batch rendering: reels sharing one background decode pass (each keeps an ffmpeg encoder running)
+BATCH_MAX_ACTIVE_REELS = int(os.getenv("BATCH_MAX_ACTIVE_REELS", 16))
+QUEUE_WAIT_SECONDS = 30  # A pooled buffer is always free within one encoder write; this only catches bugs
+BATCH_JOB_FIELDS = ('script_text', 'audio_path', 'timing_data', 'speaker_pair', 'output_path')
+
+
+class ReelOutput:
+    """
+    One encoded output of a shared background pass - a reel of a batch, or one aspect
+    ratio of a reel: its schedule, foreground layers, frame buffers and encoder.
+    generator lays out and encodes this output (its frame size, sprites and captions).
+    """
+
+    def __init__(self, request_id, output_path, audio_path, schedule, speaker_images, generator, layout=None,
+                 captions=(), cache_key=None, renditions=(), streaming=False):
+        self.request_id = request_id
+        self.output_path = output_path
+        self.audio_path = audio_path
+        self.schedule = schedule
+        self.speaker_images = speaker_images
+        self.generator = generator
+        self.layout = layout  # Framing of the shared background; None = use it as is
+        self.captions = captions
+        self.cache_key = cache_key
+        self.renditions = renditions
+        self.streaming = streaming
+        self.foreground_layers = None
+        self.frame_pool = None
+        self.writer = None
+        self.frames_written = 0
+        self.finished = False
+        self._state = None
+        self._foreground = None
+
+    @property
+    def total_frames(self):
+        return self.schedule.total_frames
+
+    @property
+    def frame_shape(self):
+        return (self.generator.video_height, self.generator.video_width, 3)
+
+    def open(self, stats):
+        """Foreground layer cache, frame buffers and encoder for this output"""
+        generator = self.generator
+        self.foreground_layers = ForegroundLayerCache(
+            lambda state: generator._build_foreground_layer(self.schedule, self.speaker_images, *state, stats=stats))
+        # One buffer in compose, one being written, the rest queued for the encoder thread
+        self.frame_pool = FramePool(self.frame_shape, PIPELINE_QUEUE_FRAMES + 2)
+        self.writer = FFmpegPipeWriter(self.output_path, generator.video_width, generator.video_height, generator.fps,
+                                       audio_path=self.audio_path, crf=generator.profile.crf,
+                                       preset=generator.profile.preset, renditions=self.renditions,
+                                       output_args=FRAGMENTED_MP4_ARGS if self.streaming else None,
+                                       gop_seconds=FRAGMENT_SECONDS if self.streaming else None)
+
+    def compose(self, frame_num, background_frame, scratch):
+        """This output's frame: the shared background (framed for its layout) with its foreground blended on"""
+        frame = self.frame_pool.acquire(timeout=QUEUE_WAIT_SECONDS)
+        if frame is None:
+            raise Exception(f"No free frame buffer for {self.output_path}")
+        if self.layout is None:
+            np.copyto(frame, background_frame)
+        else:
+            self.layout.frame_background(background_frame, frame)
+        schedule = self.schedule
+        state = (int(schedule.speaker_ids[frame_num]), int(schedule.overlay_alpha[frame_num]),
+                 int(schedule.caption_ids[frame_num]))
+        if state != self._state:
+            self._foreground = self.foreground_layers.get(state)
+            self._state = state
+        self._foreground.blend_onto(frame, scratch)
+        return frame
+
 class OpenCVVideoGenerator:
     """
     Professional video generation using OpenCV and FFmpeg
     Much more stable than MoviePy
     """
     
-    def __init__(self, fast_mode=True):
-        if fast_mode:
-            self.fps = 15  # ULTRA LOW FPS for maximum speed
-            self.video_width = 480   # ULTRA SMALL resolution for speed
-            self.video_height = 854  # ULTRA SMALL resolution for speed
-            logger.info(f"🎬 OpenCV Video Generator initialized (ULTRA FAST MODE)")
+    def __init__(self, fast_mode=True, profile=None):
+        # Render profile (name or RenderProfile); fast_mode picks between the mobile and HD profiles when none is given
+        if isinstance(profile, RenderProfile):
+            self.profile = profile
         else:
-            self.fps = 20  # Reduced from 30 to 20 for faster processing
-            self.video_width = 640   # Reduced from 1080 to 640 for faster processing
-            self.video_height = 1136 # Reduced from 1920 to 1136 for faster processing
-            logger.info(f"🎬 OpenCV Video Generator initialized (FAST MODE)")
-        
-        logger.info(f"📐 Output format: {self.video_width}x{self.video_height} @ {self.fps}fps (ULTRA OPTIMIZED FOR SPEED)")
-        logger.info(f"🚀 ULTRA FAST MODE: Captions disabled, minimal processing, maximum speed")
+            self.profile = get_render_profile(profile or ('standard' if fast_mode else 'hd'))
+        self.fps = self.profile.fps
+        self.video_width = self.profile.width
+        self.video_height = self.profile.height
+        self.layout = AspectLayout.for_frame(self.video_width, self.video_height)
+        self._aspect_generators = {}
+        logger.info(f"🎬 OpenCV Video Generator initialized ({self.profile.name.upper()} PROFILE)")
+        logger.info(f"📐 Output format: {self.video_width}x{self.video_height} @ {self.fps}fps "
+                    f"(crf {self.profile.crf}, {self.profile.preset})")
     
-    def load_and_resize_image(self, image_path):
-        """Load and resize image using PIL and OpenCV"""
-        try:
-            # Load with PIL first for better format support
-            pil_img = Image.open(image_path)
-
-            if pil_img.mode == 'RGBA':
-                pass
-            elif pil_img.mode == 'LA':
-                pil_img = pil_img.convert('RGBA')
-            else:
-                pil_img = pil_img.convert('RGB')
-
-            # Calculate target height as 40% of screen height
-            target_height = int(self.video_height * 0.4)  # 40% of 1280 = 512 pixels
-
-            # Calculate proportional width based on target height
-            original_width, original_height = pil_img.size
-            aspect_ratio = original_width / original_height
-            target_width = int(target_height * aspect_ratio)
-            target_size = (target_width, target_height)
-            
-            # Resize using PIL
-            pil_img = pil_img.resize(target_size, Image.Resampling.LANCZOS)
-            
-            # Convert to OpenCV format
-            img_array = np.array(pil_img)
-            if len(img_array.shape) == 3 and img_array.shape[2] == 4:
-                # RGBA image - convert to BGRA for OpenCV
-                cv_img = cv2.cvtColor(img_array, cv2.COLOR_RGBA2BGRA)
-                logger.info(f"✅ Image loaded with alpha: {image_path} -> {target_size}")
-            else:
-                # RGB image - convert to BGR for OpenCV
-                cv_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-                logger.info(f"✅ Image loaded: {image_path} -> {target_size}")
-            
-            return cv_img
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to load image {image_path}: {str(e)}")
-            # Create placeholder
-            placeholder = np.zeros((target_size[1], target_size[0], 3), dtype=np.uint8)
-            placeholder[:] = (128, 128, 128)  # Gray
-            return placeholder
+    def load_speaker_sprite(self, speaker):
+        """Fetch a speaker overlay (40% of screen height) from the process-wide sprite cache"""
+        return sprite_cache.get(SPEAKER_ASSETS[speaker]['path'], self.layout.sprite_height)
+    
+    def load_speaker_sprites(self, speakers):
+        """Fetch the sprites for the given speakers only"""
+        return {speaker: self.load_speaker_sprite(speaker) for speaker in speakers if speaker in SPEAKER_ASSETS}
     
     def load_background_video(self, video_path):
         """Load background video using OpenCV"""
@@ -109,6 +193,32 @@ class OpenCVVideoGenerator:
             logger.error(f"❌ Failed to load background video: {str(e)}")
             return None, 0
     
+    def open_background_source(self, video_path, use_cache=True, frames_needed=None, size=None):
+        """
+        Open the background as a memory-mapped cached source, falling back to sequential decoding.
+        Images (and videos without frames, as a solid colour) open as still sources.
+        frames_needed is the reel length; reels longer than the background cache decode directly.
+        size is the (width, height) to decode at, the output frame size by default.
+        """
+        width, height = size or (self.video_width, self.video_height)
+        if is_still_image(video_path):
+            image = load_still_background(video_path, width, height)
+            return StillBackgroundSource(image) if image is not None else None
+        if use_cache:
+            cached_source = background_cache.open_source(video_path, width, height, self.fps, frames_needed)
+            if cached_source is not None:
+                return cached_source
+            logger.warning(f"⚠️ Background cache not available - decoding {video_path} directly")
+
+        background_cap, duration = self.load_background_video(video_path)
+        if background_cap is None:
+            return None
+        if duration <= 0:
+            background_cap.release()
+            logger.warning(f"⚠️ Background video has no frames - using a solid colour: {video_path}")
+            return StillBackgroundSource(solid_background_frame(width, height))
+        return SequentialBackgroundSource(background_cap, width, height, self.fps)
+    
     def get_audio_duration(self, audio_path, timeline=None):
         """Get audio duration using timeline first, then fallback methods"""
 
@@ -141,7 +251,15 @@ class OpenCVVideoGenerator:
             except Exception as e:
                 logger.warning(f"⚠️ Timeline duration extraction failed: {str(e)}")
         
-        # Method 2: Try local ffprobe binary
+        # Method 2: Read the WAV/MP3 headers in-process (exact, no subprocess)
+        try:
+            duration_us = probe_audio_duration_us(audio_path)
+            logger.info(f"🎵 Audio duration (header probe): {duration_us / 1e6:.6f}s ({duration_us} µs)")
+            return duration_us / 1e6
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Header probe failed for {audio_path}: {str(e)}")
+
+        # Method 3: Other containers - ask ffprobe
         try:
             ffprobe_path = './ffprobe' if os.path.exists('./ffprobe') else 'ffprobe'
             cmd = [
@@ -158,283 +276,109 @@ class OpenCVVideoGenerator:
                 logger.warning(f"⚠️ FFprobe method failed (exit {result.returncode}): {result.stderr}")
         except Exception as e:
             logger.warning(f"⚠️ FFprobe method failed: {str(e)}")
-        
-        # Method 3: Try using OpenCV to read as video (some audio files work)
-        try:
-            cap = cv2.VideoCapture(audio_path)
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                if fps > 0 and frame_count > 0:
-                    duration = frame_count / fps
-                    cap.release()
-                    logger.info(f"🎵 Audio duration (OpenCV): {duration:.2f}s")
-                    return duration
-                cap.release()
-        except Exception as e:
-            logger.warning(f"⚠️ OpenCV method failed: {str(e)}")
-        
-        # Method 4: Estimate based on file size (much better estimation)
-        try:
-            file_size = os.path.getsize(audio_path)
-            if file_size > 100000:  # If file is larger than 100KB
-                # Estimate ~14KB per second for WAV files (rough estimate)
-                estimated_duration = file_size / 14000
-                logger.warning(f"⚠️ Using file-size-based estimate: {estimated_duration:.2f}s ({file_size} bytes)")
-                return estimated_duration
-            elif file_size > 50000:  # Smaller file, more conservative estimate
-                estimated_duration = 30.0  # Assume at least 30 seconds for decent-sized files
-                logger.warning(f"⚠️ Using conservative estimate: {estimated_duration}s")
-                return estimated_duration
-        except Exception:
-            pass
-        
+
         logger.error(f"❌ Could not determine audio duration for {audio_path}")
         return 0
     
 
 
-    def create_video_with_overlays_and_captions(self, script_text, audio_path, background_video_path=None, output_path=None, speaker_pair="trump_mrbeast", enable_captions=False, timing_data=None):
+    def create_video_with_overlays_and_captions(self, script_text, audio_path, background_video_path=None, output_path=None, speaker_pair="trump_mrbeast", enable_captions=False, timing_data=None, render_workers=None, burn_captions=True, renditions=None, streaming=False, preview=False, on_preview=None, render_stats=None, aspects=None):
 
         """
         Create video with background video and speaker overlays
         Using OpenCV for maximum reliability
+
+        With captions enabled, ASS/SRT/WebVTT files are written next to the
+        reel; burn_captions=False keeps them out of the frames (soft captions only).
+        Each profile name in renditions is also written as <output>_<profile>.mp4,
+        scaled from the same composed frames in the same ffmpeg process.
+        streaming=True writes fragmented MP4 so output_path is playable while it grows.
+        preview=True (or an on_preview callback) first writes a poster JPEG and an animated
+        preview; on_preview receives their paths before the full render starts.
+        Stage timings are accumulated into render_stats (a RenderStats) when given.
+        Each aspect ratio in aspects ("1:1", "16:9") is also written as <output>_<1x1>.mp4,
+        laid out natively and framed from the same decoded background frames.
+        A reel rendered before from identical inputs is copied from the render cache.
         """
         try:
             request_id = f"req_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             logger.info(f"🎬 [{request_id}] Starting OpenCV video generation")
             
+            stats = render_stats if render_stats is not None else RenderStats(request_id)
+            stats.request_id = request_id
             if not output_path:
                 output_path = f"opencv_video_{request_id}.mp4"
-            
-            # Create speaker timeline first (needed for duration detection)
-            from conversational_tts import create_speaker_timeline_with_timing_data
-            logger.info(f"🎭 [{request_id}] TIMELINE CREATION - Using speaker_pair: {speaker_pair}")
-            logger.info(f"🔍 [{request_id}] TIMING DATA DEBUG: type={type(timing_data)}, content={timing_data}")
-            if timing_data:
-                logger.info(f"🔍 [{request_id}] TIMING DATA: {len(timing_data)} segments available")
-                for i, td in enumerate(timing_data[:2]):  # Show first 2
-                    logger.info(f"🔍 [{request_id}] Timing segment {i}: {td}")
-            else:
-                logger.warning(f"⚠️ [{request_id}] NO TIMING DATA - will use fallback estimation")
-            timeline = create_speaker_timeline_with_timing_data(script_text, speaker_pair, timing_data)
-            logger.info(f"⏰ [{request_id}] Created timeline with {len(timeline)} segments")
-            
-            # Enhance timeline with caption data if captions are enabled
-            enhanced_timeline = None
-            captions = []
-            if enable_captions:
-                logger.info(f"💬 [{request_id}] Caption enhancement enabled - processing timeline...")
-                logger.info(f"💬 [{request_id}] Timeline segments: {len(timeline)}")
-                if timeline and len(timeline) > 0:
-                    logger.info(f"💬 [{request_id}] First timeline segment: {timeline[0]}")
+            rendition_outputs = [(rendition_output_path(output_path, rendition), rendition)
+                                 for rendition in resolve_renditions(self.profile, renditions)]
+            if rendition_outputs:
+                logger.info(f"🎞️ [{request_id}] Extra renditions: {[rendition.name for _, rendition in rendition_outputs]}")
+            aspect_outputs = [(aspect_output_path(output_path, layout.aspect), layout)
+                              for layout in resolve_aspects(self.profile, aspects)]
+            if aspect_outputs:
+                logger.info(f"📐 [{request_id}] Extra aspect ratios: {[layout for _, layout in aspect_outputs]}")
+            background_path = background_video_path or "assets/minecraft-1.mp4"
+
+            cache_key = None
+            if render_cache.enabled:
                 try:
-                    enhanced_timeline = enhance_timeline_with_captions(timeline)
-                    captions = enhanced_timeline['captions']
-                    logger.info(f"💬 [{request_id}] Enhanced timeline with {len(captions)} caption chunks")
-                    if captions and len(captions) > 0:
-                        logger.info(f"💬 [{request_id}] First caption: {captions[0]}")
-                    else:
-                        logger.warning(f"⚠️ [{request_id}] No captions were generated!")
+                    with stats.stage('render_cache'):
+                        cache_key = self.render_cache_key(script_text, audio_path, background_path, speaker_pair,
+                                                          timing_data, enable_captions, burn_captions,
+                                                          rendition_outputs, streaming, aspect_outputs)
+                        restored = render_cache.restore(cache_key, output_path)
                 except Exception as e:
-                    logger.error(f"❌ [{request_id}] Caption enhancement failed: {str(e)}")
-                    captions = []
-            else:
-                logger.info(f"💬 [{request_id}] Captions disabled")
-        
-            # Get audio duration (using timeline as primary source)
-            audio_duration = self.get_audio_duration(audio_path, timeline)
-            if audio_duration <= 0:
-                raise Exception("Could not determine audio duration")
+                    logger.warning(f"⚠️ [{request_id}] Render cache lookup failed: {str(e)}")
+                    restored = None
+                if restored:
+                    logger.info(f"♻️ [{request_id}] Identical reel already rendered - served from render cache")
+                    if preview or on_preview:
+                        # Previews are not cached: they are cheap, and only streaming callers want them
+                        _, schedule, _, speaker_images = self.prepare_reel(
+                            script_text, audio_path, speaker_pair, timing_data, enable_captions, burn_captions,
+                            request_id, stats)
+                        self._preview_stage(schedule, speaker_images, background_path, output_path, request_id,
+                                            on_preview, stats)
+                    stats.log_summary()
+                    return output_path
             
-            total_frames = int(audio_duration * self.fps)
-            estimated_time = total_frames * 0.02  # Ultra-fast estimate: 0.02 seconds per frame
-            logger.info(f"🎬 [{request_id}] Creating {total_frames} frames for {audio_duration:.2f}s")
-            logger.info(f"⏱️ [{request_id}] Estimated processing time: {estimated_time:.1f} seconds (ULTRA FAST MODE)")
-
-            # Load speaker images
-            elon_img = self.load_and_resize_image("assets/elon.png")
-            trump_img = self.load_and_resize_image("assets/trump.png")
-            samay_img = self.load_and_resize_image("assets/samay.png")
-            baburao_img = self.load_and_resize_image("assets/baburao.png")
-            arpit_img = self.load_and_resize_image("assets/arpit.png")
-            mrbeast_img = self.load_and_resize_image("assets/mrbeast.png")
-            ronaldo_img = self.load_and_resize_image("assets/ronaldo.png")
-            ishowspeed_img = self.load_and_resize_image("assets/speed.png")
-
-
-            logger.info(f"✅ [{request_id}] Speaker images loaded and processed")
+            captions, schedule, speakers, speaker_images = self.prepare_reel(
+                script_text, audio_path, speaker_pair, timing_data, enable_captions, burn_captions, request_id, stats)
             
-            # Load background video
-            background_cap, bg_duration = self.load_background_video(background_video_path or "assets/minecraft-1.mp4")
-            if background_cap is None:
-                raise Exception("Could not load background video")
-            
-            # Create video writer (optimized for speed)
-            temp_video_path = f"temp_video_{request_id}.mp4"
-            fourcc = cv2.VideoWriter_fourcc(*'XVID')  # Faster encoding than mp4v
-            video_writer = cv2.VideoWriter(temp_video_path, fourcc, self.fps, (self.video_width, self.video_height))
-            
-            logger.info(f"🎬 [{request_id}] Creating video frames...")
-            
-            # Generate frames (with frame skipping for ultra-fast processing)
-            frame_skip = 1  # Process every frame for now, but can be increased for even more speed
-            for frame_num in range(0, total_frames, frame_skip):
-                current_time = frame_num / self.fps
-                
-                # Get background frame (optimized for ultra-fast processing)
-                if bg_duration > 0:
-                    # Use simpler background processing for speed
-                    bg_frame_num = int((current_time % bg_duration) * 30)  # Use original FPS for background
-                    background_cap.set(cv2.CAP_PROP_POS_FRAMES, bg_frame_num)
-                    ret, bg_frame = background_cap.read()
-                    
-                    if ret:
-                        # Use fastest interpolation for speed
-                        bg_frame = cv2.resize(bg_frame, (self.video_width, self.video_height), interpolation=cv2.INTER_NEAREST)
-                    else:
-                        # Create solid background if frame read fails
-                        bg_frame = np.zeros((self.video_height, self.video_width, 3), dtype=np.uint8)
-                        bg_frame[:] = (50, 50, 150)  # Dark blue
-                else:
-                    # Create solid background
-                    bg_frame = np.zeros((self.video_height, self.video_width, 3), dtype=np.uint8)
-                    bg_frame[:] = (50, 50, 150)  # Dark blue
-                
-                # Determine current speaker from timeline
-                current_speaker = None
-                for segment in timeline:
-                    if segment['start_time'] <= current_time <= segment['end_time']:
-                        current_speaker = segment['speaker']
-                        break
-
-                # Enhanced smooth cross-fade transitions between speakers
-                transition_time = 0.8  # Longer transition for smoother effect
-                
-                for segment in timeline:
-                    speaker = segment['speaker']
-                    segment_start = segment['start_time']
-                    segment_end = segment['end_time']
-                    
-                    # Extend transition beyond segment boundaries
-                    transition_start = segment_start - transition_time * 0.5  # Start fading in before segment
-                    transition_end = segment_end + transition_time * 0.5    # Continue fading out after segment
-                    
-                    alpha = 0.0
-                    
-                    if transition_start <= current_time <= transition_end:
-                        if current_time < segment_start:
-                            # Pre-fade in (before segment officially starts)
-                            progress = (current_time - transition_start) / (transition_time * 0.5)
-                            alpha = max(0.0, min(1.0, progress))
-                        elif current_time <= segment_end:
-                            # Full visibility during segment
-                            fade_in_progress = min(1.0, (current_time - segment_start) / (transition_time * 0.5))
-                            fade_out_progress = min(1.0, (segment_end - current_time) / (transition_time * 0.5))
-                            alpha = min(fade_in_progress, fade_out_progress)
-                            alpha = max(0.7, alpha)  # Minimum visibility during main segment
-                        else:
-                            # Post-fade out (after segment officially ends)
-                            progress = 1.0 - ((current_time - segment_end) / (transition_time * 0.5))
-                            alpha = max(0.0, min(1.0, progress))
-                
-                # Add speaker overlay
-                if current_speaker == 'samay':
-                    img_height = samay_img.shape[0]
-                    img_width = samay_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = self.video_width - img_width - 50  # Right side with margin
-                    self._overlay_image(bg_frame, samay_img, x_pos, y_pos)
-                elif current_speaker == 'elon':
-                    img_height = elon_img.shape[0]
-                    img_width = elon_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = self.video_width - img_width - 50  # Right side with margin
-                    self._overlay_image(bg_frame, elon_img, x_pos, y_pos)
-                elif current_speaker == 'trump':
-                    img_height = trump_img.shape[0]
-                    img_width = trump_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = 50  # Left side with margin
-                    self._overlay_image(bg_frame, trump_img, x_pos, y_pos)
-                elif current_speaker == 'baburao':
-                    img_height = baburao_img.shape[0]
-                    img_width = baburao_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = 50  # Left side with margin
-                    self._overlay_image(bg_frame, baburao_img, x_pos, y_pos)
-                elif current_speaker == 'arpit':
-                    img_height = arpit_img.shape[0]
-                    img_width = arpit_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = 50  # Left side with margin
-                    self._overlay_image(bg_frame, arpit_img, x_pos, y_pos)
-                elif current_speaker == 'mrbeast':
-                    img_height = mrbeast_img.shape[0]
-                    img_width = mrbeast_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = self.video_width - img_width - 50  # Right side with margin
-                    self._overlay_image(bg_frame, mrbeast_img, x_pos, y_pos)
-                elif current_speaker == 'ronaldo':
-                    img_height = ronaldo_img.shape[0]
-                    img_width = ronaldo_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = 50  # Left side with margin
-                    self._overlay_image(bg_frame, ronaldo_img, x_pos, y_pos)
-                elif current_speaker == 'ishowspeed':
-                    img_height = ishowspeed_img.shape[0]
-                    img_width = ishowspeed_img.shape[1]
-                    y_pos = self.video_height - img_height  # Bottom of screen
-                    x_pos = self.video_width - img_width - 50  # Right side with margin
-                    self._overlay_image(bg_frame, ishowspeed_img, x_pos, y_pos)
-
-                
-                # 🆕 ADD CAPTION OVERLAY (if enabled) - with debug logging
-                if enable_captions and captions:  # Show captions on every frame for better consistency
-                    current_caption = get_current_caption(current_time, captions)
-                    if current_caption:
-                        caption_text = current_caption['text']
-                        caption_speaker = current_caption['speaker']
-                        # Debug log first few captions
-                        if frame_num < 10:
-                            logger.info(f"💬 [{request_id}] Frame {frame_num}: Rendering caption '{caption_text[:30]}...' for {caption_speaker}")
-                        bg_frame = render_caption_on_frame(bg_frame, caption_text, caption_speaker)
-                    elif frame_num < 10:
-                        logger.info(f"💬 [{request_id}] Frame {frame_num}: No caption at time {current_time:.2f}s")
-            
-
-                # Write frame
-                video_writer.write(bg_frame)
-                
-                # Progress logging (ultra-reduced frequency for maximum speed)
-                if frame_num % (self.fps * 10) == 0:  # Every 10 seconds for maximum speed
-                    progress = (frame_num / total_frames) * 100
-                    logger.info(f"🎬 [{request_id}] Progress: {progress:.1f}% ({frame_num}/{total_frames} frames)")
-            
-            # Clean up
-            video_writer.release()
-            background_cap.release()
-            
-            logger.info(f"✅ [{request_id}] Video frames generated: {temp_video_path}")
-            
-            if audio_path is None:
-                # Silent video - just copy the temp video to final output
-                logger.info(f"🔇 [{request_id}] Creating silent video - no audio to add")
-                self._create_silent_video(temp_video_path, output_path)
-            else:
-                # Combine video with audio using FFmpeg
-                logger.info(f"🎵 [{request_id}] Adding audio with FFmpeg...")
-                self._add_audio_with_ffmpeg(temp_video_path, audio_path, output_path)
-            
-            # Clean up temporary video
-            if os.path.exists(temp_video_path):
-                os.remove(temp_video_path)
+            if preview or on_preview:
+                self._preview_stage(schedule, speaker_images, background_path, output_path, request_id, on_preview,
+                                    stats)
+            self._render_video(schedule, speakers, speaker_images, background_path, audio_path, output_path,
+                               render_workers, request_id, rendition_outputs, streaming, stats, aspect_outputs)
             
             # Verify output
             if os.path.exists(output_path):
                 file_size = os.path.getsize(output_path)
                 logger.info(f"✅ [{request_id}] Video created successfully: {output_path}")
                 logger.info(f"📊 [{request_id}] File size: {file_size} bytes ({file_size/1024/1024:.2f} MB)")
+                for rendition_path, rendition in rendition_outputs:
+                    if not os.path.exists(rendition_path):
+                        raise Exception(f"Rendition '{rendition.name}' was not created")
+                    logger.info(f"🎞️ [{request_id}] Rendition {rendition.name}: {rendition_path} "
+                                f"({os.path.getsize(rendition_path)/1024/1024:.2f} MB)")
+                for aspect_path, layout in aspect_outputs:
+                    if not os.path.exists(aspect_path):
+                        raise Exception(f"Aspect ratio {layout.aspect} output was not created")
+                    logger.info(f"📐 [{request_id}] Aspect {layout.aspect}: {aspect_path} "
+                                f"({os.path.getsize(aspect_path)/1024/1024:.2f} MB)")
+                sidecars = {}
+                if captions:
+                    try:
+                        with stats.stage('sidecars'):
+                            sidecars = write_caption_sidecars(captions, output_path, self.video_width, self.video_height)
+                    except Exception as e:
+                        logger.warning(f"⚠️ [{request_id}] Caption sidecar export failed: {str(e)}")
+                if cache_key:
+                    with stats.stage('render_cache'):
+                        render_cache.store(cache_key, output_path,
+                                           [output_path] + [path for path, _ in rendition_outputs]
+                                           + [path for path, _ in aspect_outputs] + list(sidecars.values()))
+                stats.log_summary()
+                stage_histograms.observe(stats)
                 return output_path
             else:
                 raise Exception("Output video was not created")
@@ -443,180 +387,655 @@ class OpenCVVideoGenerator:
             logger.error(f"❌ [{request_id}] OpenCV video generation failed: {str(e)}")
             raise Exception(f"OpenCV video generation failed: {str(e)}")
 
-    def _overlay_image(self, background, overlay_img, x_pos, y_pos):
-        """Overlay image"""
+    def create_videos_batch(self, jobs, background_video_path=None, enable_captions=False, burn_captions=True,
+                            render_stats=None):
+        """
+        Render many reels over the same background, decoding each background frame once.
+
+        jobs are dicts with script_text, audio_path, timing_data, speaker_pair and optionally
+        output_path, or (script_text, audio_path, timing_data, speaker_pair[, output_path]) tuples.
+        Every decoded background frame is composited into each reel still running, so decode
+        work scales with the longest reel rather than the number of reels (up to
+        BATCH_MAX_ACTIVE_REELS reels share a pass). Returns the output paths in job order.
+        """
+        batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        stats = render_stats if render_stats is not None else RenderStats(batch_id)
+        stats.request_id = batch_id
+        background_path = background_video_path or "assets/minecraft-1.mp4"
+        logger.info(f"📦 [{batch_id}] Starting batch render of {len(jobs)} reels over {background_path}")
+
+        output_paths = []
+        pending = []
+        for index, job in enumerate(jobs):
+            job = dict(zip(BATCH_JOB_FIELDS, job)) if isinstance(job, (tuple, list)) else dict(job)
+            request_id = f"{batch_id}_{index}"
+            output_path = job.get('output_path') or f"opencv_video_{request_id}.mp4"
+            speaker_pair = job.get('speaker_pair') or "trump_mrbeast"
+            output_paths.append(output_path)
+
+            cache_key = None
+            if render_cache.enabled:
+                try:
+                    with stats.stage('render_cache'):
+                        cache_key = self.render_cache_key(job['script_text'], job.get('audio_path'), background_path,
+                                                          speaker_pair, job.get('timing_data'), enable_captions,
+                                                          burn_captions, [], False)
+                        if render_cache.restore(cache_key, output_path):
+                            logger.info(f"♻️ [{request_id}] Served from render cache")
+                            continue
+                except Exception as e:
+                    logger.warning(f"⚠️ [{request_id}] Render cache lookup failed: {str(e)}")
+
+            captions, schedule, _, speaker_images = self.prepare_reel(
+                job['script_text'], job.get('audio_path'), speaker_pair, job.get('timing_data'), enable_captions,
+                burn_captions, request_id, stats)
+            pending.append(ReelOutput(request_id, output_path, job.get('audio_path'), schedule, speaker_images, self,
+                                      captions=captions, cache_key=cache_key))
+
+        for start in range(0, len(pending), BATCH_MAX_ACTIVE_REELS):
+            self._render_shared_pass(pending[start:start + BATCH_MAX_ACTIVE_REELS], background_path, batch_id, stats)
+
+        for reel in pending:
+            sidecars = {}
+            if reel.captions:
+                try:
+                    with stats.stage('sidecars'):
+                        sidecars = write_caption_sidecars(reel.captions, reel.output_path, self.video_width,
+                                                          self.video_height)
+                except Exception as e:
+                    logger.warning(f"⚠️ [{reel.request_id}] Caption sidecar export failed: {str(e)}")
+            if reel.cache_key:
+                with stats.stage('render_cache'):
+                    render_cache.store(reel.cache_key, reel.output_path, [reel.output_path] + list(sidecars.values()))
+
+        logger.info(f"✅ [{batch_id}] Batch finished: {len(pending)} rendered, "
+                    f"{len(jobs) - len(pending)} from render cache")
+        stats.log_summary()
+        stage_histograms.observe(stats)
+        return output_paths
+
+    def _render_shared_pass(self, outputs, background_path, pass_id, stats, canvas=None):
+        """
+        Decode the background once for frames [0, longest output) and compose and encode
+        every output (ReelOutput) from each decoded frame. canvas is the (width, height)
+        to decode at when the outputs frame a larger background than the output size.
+        """
+        if not outputs:
+            return
+        total_frames = max(output.total_frames for output in outputs)
+        canvas_width, canvas_height = canvas or (self.video_width, self.video_height)
+        logger.info(f"📦 [{pass_id}] Shared background pass: {len(outputs)} outputs, {total_frames} frames "
+                    f"at {canvas_width}x{canvas_height}")
+
+        with stats.stage('background_open'):
+            background = self.open_background_source(background_path, frames_needed=total_frames, size=canvas)
+        if background is None:
+            raise Exception("Could not load background video")
+
+        scratch = BlendScratch(max(output.frame_shape[0] for output in outputs),
+                               max(output.frame_shape[1] for output in outputs))
+
+        def compose(frame_num, background_frame):
+            return [(output, output.compose(frame_num, background_frame, scratch))
+                    for output in outputs if frame_num < output.total_frames]
+
+        mux_seconds = []  # Timed here and added afterwards: RenderStats.add belongs to the compose thread
+
+        def encode(frames):
+            for output, frame in frames:
+                output.writer.write(frame)
+                output.frame_pool.release(frame)
+                output.frames_written += 1
+                if output.frames_written == output.total_frames:
+                    # Finish short outputs while longer ones keep rendering
+                    started = time.perf_counter()
+                    output.writer.close()
+                    output.finished = True
+                    mux_seconds.append(time.perf_counter() - started)
 
         try:
-            # Get overlay dimensions
-            if len(overlay_img.shape) == 3 and overlay_img.shape[2] == 4:
-                # Image has alpha channel (BGRA)
-                h, w = overlay_img.shape[:2]
-                has_alpha = True
-                logger.debug(f"🎭 Overlaying transparent image at ({x_pos}, {y_pos})")
-            else:
-                # Image is opaque (BGR)
-                h, w = overlay_img.shape[:2]
-                has_alpha = False
-                logger.debug(f"🖼️ Overlaying opaque image at ({x_pos}, {y_pos})")
-            
-            # Ensure position is within bounds
-            x_pos = max(0, min(x_pos, self.video_width - w))
-            y_pos = max(0, min(y_pos, self.video_height - h))
+            for output in outputs:
+                output.open(stats)
+            pipeline = FramePipeline(background.read, compose, encode, stats=stats, name=pass_id,
+                                     frame_pool=FramePool((canvas_height, canvas_width, 3), pipeline_pool_size()))
+            pipeline.run(range(total_frames))
+            for output in outputs:
+                if not output.finished:
+                    output.writer.close()
+                    output.finished = True
+            stats.add('mux', sum(mux_seconds), len(mux_seconds))
+        except Exception:
+            # Outputs that already finished keep their files
+            for output in outputs:
+                if output.writer is not None and not output.finished:
+                    output.writer.abort()
+            raise
+        finally:
+            background.release()
+
+    def prepare_reel(self, script_text, audio_path, speaker_pair, timing_data, enable_captions, burn_captions,
+                     request_id, stats):
+        """Build the timeline, captions, frame schedule and speaker sprites of one reel"""
+        # Create speaker timeline first (needed for duration detection)
+        from conversational_tts import create_speaker_timeline_with_timing_data
+        logger.info(f"🎭 [{request_id}] TIMELINE CREATION - Using speaker_pair: {speaker_pair}")
+        logger.info(f"🔍 [{request_id}] TIMING DATA DEBUG: type={type(timing_data)}, content={timing_data}")
+        if timing_data:
+            logger.info(f"🔍 [{request_id}] TIMING DATA: {len(timing_data)} segments available")
+            for i, td in enumerate(timing_data[:2]):  # Show first 2
+                logger.info(f"🔍 [{request_id}] Timing segment {i}: {td}")
+        else:
+            logger.warning(f"⚠️ [{request_id}] NO TIMING DATA - will use fallback estimation")
+        timeline = create_speaker_timeline_with_timing_data(script_text, speaker_pair, timing_data)
+        logger.info(f"⏰ [{request_id}] Created timeline with {len(timeline)} segments")
+        
+        # Enhance timeline with caption data if captions are enabled
+        enhanced_timeline = None
+        captions = []
+        if enable_captions:
+            logger.info(f"💬 [{request_id}] Caption enhancement enabled - processing timeline...")
+            logger.info(f"💬 [{request_id}] Timeline segments: {len(timeline)}")
+            if timeline and len(timeline) > 0:
+                logger.info(f"💬 [{request_id}] First timeline segment: {timeline[0]}")
+            try:
+                enhanced_timeline = enhance_timeline_with_captions(timeline)
+                captions = enhanced_timeline['captions']
+                logger.info(f"💬 [{request_id}] Enhanced timeline with {len(captions)} caption chunks")
+                if captions and len(captions) > 0:
+                    logger.info(f"💬 [{request_id}] First caption: {captions[0]}")
+                else:
+                    logger.warning(f"⚠️ [{request_id}] No captions were generated!")
+            except Exception as e:
+                logger.error(f"❌ [{request_id}] Caption enhancement failed: {str(e)}")
+                captions = []
+        else:
+            logger.info(f"💬 [{request_id}] Captions disabled")
+    
+        # Get audio duration (using timeline as primary source)
+        audio_duration = self.get_audio_duration(audio_path, timeline)
+        if audio_duration <= 0:
+            raise Exception("Could not determine audio duration")
+        
+        total_frames = int(audio_duration * self.fps)
+        logger.info(f"🎬 [{request_id}] Creating {total_frames} frames for {audio_duration:.2f}s")
 
-            # Get the region of interest from background
-            roi = background[y_pos:y_pos+h, x_pos:x_pos+w]
+        # Resolve speaker, transition alpha and caption for every frame up front
+        burned_captions = captions if enable_captions and burn_captions else []
+        with stats.stage('schedule'):
+            schedule = RenderSchedule.compile(timeline, burned_captions, total_frames, self.fps)
 
-            if has_alpha:
-                # 🔧 FIX: Proper alpha blending for transparent images
-                overlay_bgr = overlay_img[:, :, :3]  # BGR channels
-                alpha = overlay_img[:, :, 3] / 255.0  # Alpha channel (0-1)
-                
-                # Create 3-channel alpha mask
-                alpha_3ch = np.dstack([alpha, alpha, alpha])
-                
-                # Alpha blend: result = foreground * alpha + background * (1 - alpha)
-                blended = (overlay_bgr * alpha_3ch + roi * (1 - alpha_3ch)).astype(np.uint8)
-                
-                # Update background with blended result
-                background[y_pos:y_pos+h, x_pos:x_pos+w] = blended
-                
+        # Fetch cached sprites for the speakers in this reel only
+        speakers = reel_speakers(speaker_pair, timeline)
+        with stats.stage('sprites'):
+            speaker_images = self.load_speaker_sprites(speakers)
+        logger.info(f"✅ [{request_id}] Speaker sprites ready: {sorted(speaker_images)}")
+        return captions, schedule, speakers, speaker_images
+
+    def render_cache_key(self, script_text, audio_path, background_path, speaker_pair, timing_data, enable_captions,
+                         burn_captions, rendition_outputs, streaming, aspect_outputs=()):
+        """Render cache key: the script, timing, media contents, profile, caption style and generator version"""
+        from conversational_tts import create_speaker_timeline_with_timing_data
+        # The same speakers prepare_reel loads sprites for (the pair, plus anyone on the timeline)
+        timeline = create_speaker_timeline_with_timing_data(script_text, speaker_pair, timing_data)
+        speakers = sorted(speaker for speaker in reel_speakers(speaker_pair, timeline) if speaker in SPEAKER_ASSETS)
+        profile = self.profile
+        inputs = {
+            'generator': type(self).__name__,
+            'generator_version': GENERATOR_VERSION,
+            'script': script_text,
+            'timing_data': timing_data,
+            'speaker_pair': speaker_pair,
+            'profile': [profile.name, profile.width, profile.height, profile.fps, profile.crf, profile.preset],
+            'renditions': [rendition.name for _, rendition in rendition_outputs],
+            'aspects': [layout.aspect for _, layout in aspect_outputs],
+            'streaming': streaming,
+            'captions': enable_captions,
+            'burn_captions': burn_captions,
+            'caption_style': (get_caption_renderer(self.video_width, self.video_height).style_settings()
+                              if enable_captions else None),
+            'background_cache_seconds': background_cache.max_seconds,  # Where cached backgrounds loop
+        }
+        files = {'audio': audio_path, 'background': background_path}
+        files.update({f"speaker:{speaker}": SPEAKER_ASSETS[speaker]['path'] for speaker in speakers})
+        return render_cache.key(inputs, files)
+
+    def _render_video(self, schedule, speakers, speaker_images, background_path, audio_path, output_path,
+                      render_workers, request_id, renditions=(), streaming=False, stats=None, aspect_outputs=()):
+        """
+        Render the scheduled reel to output_path (frame loop, in-process or in parallel chunks).
+        renditions are extra (path, RenderProfile) outputs encoded from the same frames;
+        aspect_outputs are extra (path, AspectLayout) outputs framed from the same background frames.
+        """
+        if stats is None:
+            stats = RenderStats(request_id)
+        total_frames = schedule.total_frames
+        workers = render_workers or DEFAULT_RENDER_WORKERS
+        if aspect_outputs:
+            # One in-process pass decodes the background for every aspect ratio (no chunking)
+            self._render_aspects(schedule, speakers, speaker_images, background_path, audio_path, output_path,
+                                 request_id, renditions, streaming, aspect_outputs, stats)
+            return
+        # Streaming needs one encoder appending to output_path; chunks only exist once joined at the end.
+        # Still images need no chunks: only their state changes are composed.
+        if (workers > 1 and total_frames > self.chunk_gop_frames() and not streaming
+                and not is_still_image(background_path)):
+            # Parallel mode: GOP-aligned chunks rendered in a process pool, joined without re-encoding
+            self._render_chunked(schedule, speakers, background_path, audio_path, output_path, workers, request_id,
+                                 renditions, stats)
+            return
+
+        # Load background video (shared pre-scaled cache, or a single forward decode pass)
+        with stats.stage('background_open'):
+            background = self.open_background_source(background_path, frames_needed=total_frames)
+        if background is None:
+            raise Exception("Could not load background video")
+        
+        # Stream frames straight into ffmpeg: one x264 encode, audio muxed in the same pass
+        if audio_path is None:
+            logger.info(f"🔇 [{request_id}] Creating silent video - no audio to add")
+        if streaming:
+            logger.info(f"📡 [{request_id}] Streaming fragmented MP4 ({FRAGMENT_SECONDS}s fragments): {output_path}")
+        # Still background (not streamed): each distinct frame is composed once and repeated by the encoder
+        still = background.still and not streaming
+        writer_class = FFmpegRunWriter if still else FFmpegPipeWriter
+        video_writer = writer_class(output_path, self.video_width, self.video_height, self.fps, audio_path=audio_path,
+                                    crf=self.profile.crf, preset=self.profile.preset, renditions=renditions,
+                                    output_args=FRAGMENTED_MP4_ARGS if streaming else None,
+                                    gop_seconds=FRAGMENT_SECONDS if streaming else None)
+        try:
+            if still:
+                self._render_runs(schedule, speaker_images, background, video_writer, request_id, stats)
             else:
-                # Opaque image - direct replacement (existing behavior)
-                background[y_pos:y_pos+h, x_pos:x_pos+w] = overlay_img
+                self._render_frames(schedule, speaker_images, background, video_writer, 0, total_frames, request_id,
+                                    stats)
             
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to overlay image at ({x_pos}, {y_pos}): {str(e)}")
-    
-    def _overlay_image_with_alpha(self, background, overlay_img, mask, x_pos, y_pos, alpha):
-        """Overlay image with transparency using mask and alpha blending for smooth transitions"""
+            # Finish encoding (flush the pipe, wait for x264 and the audio mux)
+            with stats.stage('mux'):
+                video_writer.close()
+        except Exception:
+            video_writer.abort()
+            raise
+        finally:
+            background.release()
+
+    def _render_aspects(self, schedule, speakers, speaker_images, background_path, audio_path, output_path,
+                        request_id, renditions, streaming, aspect_outputs, stats):
+        """
+        Render the reel and its aspect ratio variants from one background decode pass.
+        The background is decoded large enough that no framing is upscaled (see background_canvas).
+        """
+        canvas = background_canvas(self.video_width, self.video_height, [layout for _, layout in aspect_outputs])
+        main_layout = None if canvas == (self.video_width, self.video_height) else self.layout.on_canvas(*canvas)
+        outputs = [ReelOutput(request_id, output_path, audio_path, schedule, speaker_images, self, layout=main_layout,
+                              renditions=renditions, streaming=streaming)]
+        for aspect_path, layout in aspect_outputs:
+            generator = self.aspect_generator(layout)
+            outputs.append(ReelOutput(request_id, aspect_path, audio_path, schedule,
+                                      generator.load_speaker_sprites(speakers), generator,
+                                      layout=layout.on_canvas(*canvas), streaming=streaming))
+        self._render_shared_pass(outputs, background_path, request_id, stats, canvas)
+
+    def _render_frames(self, schedule, speaker_images, background, video_writer, start_frame, end_frame, request_id,
+                       stats=None):
+        """
+        Compose frames [start_frame, end_frame) and write them to video_writer, timing each stage into stats.
+        Background reads and encoder writes run on their own threads (see FramePipeline).
+        """
+        logger.info(f"🎬 [{request_id}] Creating video frames {start_frame}-{end_frame}...")
+        if stats is None:
+            stats = RenderStats(request_id)
+        total_frames = schedule.total_frames
+        speaker_ids = schedule.speaker_ids
+        overlay_alpha = schedule.overlay_alpha
+        caption_ids = schedule.caption_ids
+
+        # Speaker + caption foreground, composed once per (speaker, alpha, caption) state
+        foreground_layers = ForegroundLayerCache(
+            lambda state: self._build_foreground_layer(schedule, speaker_images, *state, stats=stats))
+        current_state = None
+        foreground = None
+        # Preallocated frames and blend buffers: nothing is allocated per frame
+        frame_pool = FramePool((self.video_height, self.video_width, 3), pipeline_pool_size())
+        scratch = BlendScratch(self.video_height, self.video_width)
+
+        def compose(frame_num, bg_frame):
+            nonlocal current_state, foreground
+            # Add speaker and caption overlays in a single pass (layer builds are timed separately)
+            state = (int(speaker_ids[frame_num]), int(overlay_alpha[frame_num]), int(caption_ids[frame_num]))
+            if state != current_state:
+                foreground = foreground_layers.get(state)
+                current_state = state
+            foreground.blend_onto(bg_frame, scratch)
+
+            # Progress logging (ultra-reduced frequency for maximum speed)
+            if frame_num % (self.fps * 10) == 0:  # Every 10 seconds for maximum speed
+                progress = (frame_num / total_frames) * 100
+                logger.info(f"🎬 [{request_id}] Progress: {progress:.1f}% ({frame_num}/{total_frames} frames)")
+            return bg_frame
+
+        # Background reads, compositing and encoder writes overlap on three threads
+        pipeline = FramePipeline(background.read, compose, video_writer.write, stats=stats, name=request_id,
+                                 frame_pool=frame_pool)
+        pipeline.run(range(start_frame, end_frame))
+
+        logger.info(f"🧱 [{request_id}] Foreground layers built: {foreground_layers.builds}")
+
+    def _render_runs(self, schedule, speaker_images, background, video_writer, request_id, stats=None):
+        """
+        Compose one frame per run of unchanged render state over a still background and
+        write it with its run length (an FFmpegRunWriter repeats it at the encoder).
+        """
+        if stats is None:
+            stats = RenderStats(request_id)
+        runs = schedule.state_runs()
+        logger.info(f"🖼️ [{request_id}] Still background: {len(runs)} distinct frames for "
+                    f"{schedule.total_frames} output frames")
+        foreground_layers = ForegroundLayerCache(
+            lambda state: self._build_foreground_layer(schedule, speaker_images, *state, stats=stats))
+        frame = np.empty((self.video_height, self.video_width, 3), dtype=np.uint8)
+        scratch = BlendScratch(self.video_height, self.video_width)
+
+        for start, end in runs:
+            started = time.perf_counter()
+            background.read(start, frame)
+            read_done = time.perf_counter()
+            state = (int(schedule.speaker_ids[start]), int(schedule.overlay_alpha[start]),
+                     int(schedule.caption_ids[start]))
+            foreground_layers.get(state).blend_onto(frame, scratch)
+            composed = time.perf_counter()
+            video_writer.write(frame, end - start)
+            stats.record_frame(read_done - started, composed - read_done, time.perf_counter() - composed)
+
+        logger.info(f"🧱 [{request_id}] Foreground layers built: {foreground_layers.builds}")
+
+    def _build_foreground_layer(self, schedule, speaker_images, speaker_id, alpha, caption_id, stats=None):
+        """Draw the speaker overlay and caption for one render state over black and white, then matte them"""
+        if stats is None:
+            stats = RenderStats()
+        on_black = np.zeros((self.video_height, self.video_width, 3), dtype=np.uint8)
+        on_white = np.full((self.video_height, self.video_width, 3), 255, dtype=np.uint8)
+        layers = []
+        for frame in (on_black, on_white):
+            # Add speaker overlay
+            if speaker_id >= 0:
+                current_speaker = schedule.speakers[speaker_id]
+                speaker_sprite = speaker_images.get(current_speaker)
+                if speaker_sprite is not None:
+                    with stats.stage('overlay'):
+                        x_pos, y_pos = self.speaker_position(current_speaker, speaker_sprite)
+                        self._overlay_image(frame, speaker_sprite, x_pos, y_pos, alpha)
+
+            # 🆕 ADD CAPTION OVERLAY (if enabled)
+            if caption_id >= 0:
+                current_caption = schedule.captions[caption_id]
+                with stats.stage('caption'):
+                    frame = render_caption_on_frame(frame, current_caption['text'], current_caption['speaker'])
+            layers.append(frame)
+        with stats.stage('layer_matte'):
+            return ForegroundLayer.from_matte(*layers)
+
+    def _preview_stage(self, schedule, speaker_images, background_path, output_path, request_id, on_preview, stats):
+        """Render the poster and animated preview and hand them to on_preview; failures only log"""
         try:
-            h, w = overlay_img.shape[:2]
-            
-            # Ensure position is within bounds
-            x_pos = max(0, min(x_pos, self.video_width - w))
-            y_pos = max(0, min(y_pos, self.video_height - h))
-            
-            # Region of interest in background
-            roi = background[y_pos:y_pos+h, x_pos:x_pos+w]
-            
-            # Apply alpha to the overlay image
-            overlay_alpha = overlay_img.astype(float) * alpha
-            
-            # Create alpha mask for smooth blending
-            alpha_mask = (mask.astype(float) / 255.0) * alpha
-            alpha_mask_3ch = cv2.merge([alpha_mask, alpha_mask, alpha_mask])
-            
-            # Blend the images
-            blended = roi.astype(float) * (1 - alpha_mask_3ch) + overlay_alpha * alpha_mask_3ch
-            
-            # Convert back to uint8
-            background[y_pos:y_pos+h, x_pos:x_pos+w] = blended.astype(np.uint8)
-            
+            with stats.stage('preview'):
+                preview_paths = self.render_preview(schedule, speaker_images, background_path, output_path, request_id)
+            if on_preview:
+                on_preview(preview_paths)
         except Exception as e:
-            logger.warning(f"⚠️ Failed to overlay image with alpha at ({x_pos}, {y_pos}): {str(e)}")
-    
-    def _add_audio_with_ffmpeg(self, video_path, audio_path, output_path):
-        """Add audio to video using FFmpeg"""
+            logger.warning(f"⚠️ [{request_id}] Preview stage failed: {str(e)}")
+
+    def render_preview(self, schedule, speaker_images, background_path, output_path, request_id):
+        """
+        Write the poster JPEG and the animated preview for a scheduled reel.
+
+        Only every (fps / PREVIEW_FPS)-th frame is composed, through the same sprite,
+        caption and background caches as the full render, then downscaled.
+        Returns {'poster': path, 'preview': path}.
+        """
+        poster_path, preview_path = preview_output_paths(output_path)
+        step = max(1, round(self.fps / PREVIEW_FPS))
+        preview_fps = self.fps / step
+        preview_width = 2 * round(self.video_width * PREVIEW_HEIGHT / self.video_height / 2)
+        poster_frame = self.poster_frame_number(schedule)
+        sampled = set(range(0, schedule.total_frames, step))
+        logger.info(f"🖼️ [{request_id}] Rendering preview: {len(sampled)} frames @ {preview_fps:g}fps, "
+                    f"{preview_width}x{PREVIEW_HEIGHT}, poster frame {poster_frame}")
+
+        background = self.open_background_source(background_path, frames_needed=schedule.total_frames)
+        if background is None:
+            raise Exception("Could not load background video")
+        foreground_layers = ForegroundLayerCache(
+            lambda state: self._build_foreground_layer(schedule, speaker_images, *state))
+        video_writer = FFmpegPipeWriter(preview_path, preview_width, PREVIEW_HEIGHT, preview_fps, crf=30)
         try:
-            # Use improved FFmpeg detection (same as conversational_tts.py)
-            ffmpeg_path = 'ffmpeg'  # Use system ffmpeg first
-            if os.path.exists('./ffmpeg') and os.access('./ffmpeg', os.X_OK):
-                # Check if local ffmpeg is executable (for local development)
-                try:
-                    result = subprocess.run(['./ffmpeg', '-version'], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        ffmpeg_path = './ffmpeg'
-                except:
-                    ffmpeg_path = 'ffmpeg'  # Fallback to system ffmpeg
-            cmd = [
-                ffmpeg_path, '-y',  # Overwrite output
-                '-i', video_path,  # Input video
-                '-i', audio_path,  # Input audio
-                '-c:v', 'libx264',  # Video codec
-                '-preset', 'ultrafast',  # Fastest encoding preset
-                '-crf', '28',  # Higher CRF for faster encoding (lower quality but much faster)
-                '-c:a', 'aac',  # Audio codec
-                '-strict', 'experimental',
-                '-shortest',  # Stop when shortest stream ends
-                output_path
-            ]
-            
-            logger.info(f"🎵 Running FFmpeg command: {' '.join(cmd)}")
-            logger.info(f"🔧 Using FFmpeg binary: {ffmpeg_path}")
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"❌ FFmpeg failed with return code: {result.returncode}")
-                logger.error(f"❌ FFmpeg stderr: {result.stderr}")
-                logger.error(f"❌ FFmpeg stdout: {result.stdout}")
-                logger.error(f"❌ Command that failed: {' '.join(cmd)}")
-                raise Exception(f"FFmpeg failed: {result.stderr}")
-            
-            logger.info(f"✅ Audio added successfully with FFmpeg")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to add audio: {str(e)}")
+            # Ascending order keeps sequential background sources reading forward only
+            for frame_num in sorted(sampled | {poster_frame}):
+                frame = background.read(frame_num)
+                state = (int(schedule.speaker_ids[frame_num]), int(schedule.overlay_alpha[frame_num]),
+                         int(schedule.caption_ids[frame_num]))
+                foreground_layers.get(state).blend_onto(frame)
+                if frame_num == poster_frame:
+                    cv2.imwrite(poster_path, frame, [cv2.IMWRITE_JPEG_QUALITY, POSTER_JPEG_QUALITY])
+                if frame_num in sampled:
+                    video_writer.write(cv2.resize(frame, (preview_width, PREVIEW_HEIGHT), interpolation=cv2.INTER_AREA))
+            video_writer.close()
+        except Exception:
+            video_writer.abort()
             raise
+        finally:
+            background.release()
+
+        logger.info(f"🖼️ [{request_id}] Preview ready: {poster_path}, {preview_path}")
+        return {'poster': poster_path, 'preview': preview_path}
+
+    def poster_frame_number(self, schedule):
+        """First frame showing a fully faded-in speaker together with a caption (else a speaker, else frame 0)"""
+        speaking = schedule.speaker_ids != NO_SPEAKER
+        for candidates in (speaking & (schedule.overlay_alpha == 255) & (schedule.caption_ids != NO_CAPTION),
+                           speaking & (schedule.overlay_alpha == 255)):
+            frames = np.flatnonzero(candidates)
+            if frames.size:
+                return int(frames[0])
+        return 0
+
+    def chunk_gop_frames(self):
+        """GOP length used by chunked renders; chunk boundaries fall on GOP starts"""
+        return self.fps * CHUNK_GOP_SECONDS
 
-    def _create_silent_video(self, video_path, output_path):
-        """Convert video to final format without audio using FFmpeg"""
+    def _render_chunked(self, schedule, speakers, background_path, audio_path, output_path, workers, request_id,
+                        renditions=(), stats=None):
+        """Render GOP-aligned frame ranges in a process pool and concat them losslessly"""
+        if stats is None:
+            stats = RenderStats(request_id)
+        total_frames = schedule.total_frames
+        gop = self.chunk_gop_frames()
+        chunk_frames = -(-total_frames // workers)          # ceil
+        chunk_frames = -(-chunk_frames // gop) * gop        # round up to whole GOPs
+        ranges = [(start, min(start + chunk_frames, total_frames)) for start in range(0, total_frames, chunk_frames)]
+        logger.info(f"🧩 [{request_id}] Parallel render: {len(ranges)} chunks of {chunk_frames} frames on {workers} workers")
+
+        chunk_dir = tempfile.mkdtemp(prefix=f"chunks_{request_id}_")
+        chunk_paths = [os.path.join(chunk_dir, f"chunk_{i:03d}.mp4") for i in range(len(ranges))]
+        # Every chunk also encodes its slice of each rendition; each rendition is joined separately
+        rendition_chunks = [[(rendition_output_path(chunk_path, rendition), rendition) for _, rendition in renditions]
+                            for chunk_path in chunk_paths]
         try:
-            # Use improved FFmpeg detection (same as conversational_tts.py)
-            ffmpeg_path = 'ffmpeg'  # Use system ffmpeg first
-            if os.path.exists('./ffmpeg') and os.access('./ffmpeg', os.X_OK):
-                # Check if local ffmpeg is executable (for local development)
-                try:
-                    result = subprocess.run(['./ffmpeg', '-version'], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        ffmpeg_path = './ffmpeg'
-                except:
-                    ffmpeg_path = 'ffmpeg'  # Fallback to system ffmpeg
-            cmd = [
-                ffmpeg_path, '-y',      # Overwrite output
-                '-i', video_path,       # Input video only
-                '-c:v', 'libx264',      # Video codec (same as audio version)
-                '-preset', 'ultrafast', # Fastest encoding preset
-                '-crf', '28',           # Higher CRF for faster encoding
-                '-an',                  # No audio stream
-                output_path
-            ]
-            
-            logger.info(f"🎵 Running FFmpeg command: {' '.join(cmd)}")
-            logger.info(f"🔧 Using FFmpeg binary: {ffmpeg_path}")
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"❌ FFmpeg failed with return code: {result.returncode}")
-                logger.error(f"❌ FFmpeg stderr: {result.stderr}")
-                logger.error(f"❌ FFmpeg stdout: {result.stdout}")
-                logger.error(f"❌ Command that failed: {' '.join(cmd)}")
-                raise Exception(f"FFmpeg failed: {result.stderr}")
-            
-            logger.info(f"✅ Silent video created successfully with FFmpeg")
+            # Spawned, not forked: this runs on a server thread while other threads may hold locks
+            # (logging, caption fonts, background cache builds) that a forked child would inherit held.
+            # Spawned workers re-import the background cache, so its settings are passed along.
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [
+                    pool.submit(_render_chunk_worker, self, schedule, speakers, background_path,
+                                start, end, chunk_path, f"{request_id}#{i}", chunk_renditions,
+                                background_cache.cache_dir, background_cache.max_seconds)
+                    for i, ((start, end), chunk_path, chunk_renditions)
+                    in enumerate(zip(ranges, chunk_paths, rendition_chunks))
+                ]
+                for future in futures:
+                    stats.merge(future.result())
+
+            logger.info(f"🧩 [{request_id}] All chunks rendered - joining with concat demuxer")
+            with stats.stage('mux'):
+                concat_chunks(chunk_paths, output_path, audio_path)
+                for i, (rendition_path, _) in enumerate(renditions):
+                    concat_chunks([chunks[i][0] for chunks in rendition_chunks], rendition_path, audio_path)
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    def render_chunk(self, schedule, speakers, background_path, start_frame, end_frame, chunk_path, request_id,
+                     renditions=()):
+        """Render one silent chunk: seek the background once, then encode its own GOPs. Returns its RenderStats."""
+        stats = RenderStats(request_id)
+        with stats.stage('background_open'):
+            # Same source choice as a single-process render of the whole reel
+            background = self.open_background_source(background_path, frames_needed=schedule.total_frames)
+        if background is None:
+            raise Exception("Could not load background video")
+        video_writer = FFmpegPipeWriter(chunk_path, self.video_width, self.video_height, self.fps,
+                                        crf=self.profile.crf, preset=self.profile.preset, renditions=renditions,
+                                        gop_seconds=CHUNK_GOP_SECONDS)
+        try:
+            background.seek(start_frame)
+            self._render_frames(schedule, self.load_speaker_sprites(speakers), background, video_writer,
+                                start_frame, end_frame, request_id, stats)
+            with stats.stage('encode_flush'):
+                video_writer.close()
+        except Exception:
+            video_writer.abort()
+            raise
+        finally:
+            background.release()
+        return stats
+
+    def speaker_position(self, speaker, sprite):
+        """Top-left corner of a speaker's full (uncropped) sprite image, kept inside the frame"""
+        return self.layout.speaker_position(SPEAKER_ASSETS[speaker]['side'], sprite.width, sprite.height)
+
+    def aspect_generator(self, layout):
+        """Generator laying out and encoding this profile's reels in another aspect ratio (AspectLayout)"""
+        generator = self._aspect_generators.get(layout.aspect)
+        if generator is None:
+            generator = OpenCVVideoGenerator(profile=layout.profile(self.profile))
+            generator.layout = layout
+            generator = self._aspect_generators.setdefault(layout.aspect, generator)
+        return generator
+
+    def _overlay_image(self, background, sprite, x_pos, y_pos, opacity=255):
+        """Overlay a premultiplied sprite whose full image has its top-left at (x_pos, y_pos)"""
+
+        try:
+            # Ensure position is within bounds (placement uses the full, uncropped image size)
+            x_pos = max(0, min(x_pos, self.video_width - sprite.width))
+            y_pos = max(0, min(y_pos, self.video_height - sprite.height))
+
+            # Integer premultiplied blend of the sprite's opaque bounding box, in place
+            blend_premultiplied_layer(background, sprite, x_pos, y_pos, opacity)
             
         except Exception as e:
-            logger.error(f"❌ Failed to create silent video: {str(e)}")
-            raise
+            logger.warning(f"⚠️ Failed to overlay image at ({x_pos}, {y_pos}): {str(e)}")
+
+def _render_chunk_worker(generator, schedule, speakers, background_path, start_frame, end_frame, chunk_path,
+                         request_id, renditions=(), background_cache_dir=None, background_cache_seconds=None):
+    """Process-pool entry point for one chunk of a parallel render (in the parent's background cache)"""
+    if background_cache_dir is not None:
+        background_cache.cache_dir = background_cache_dir
+    if background_cache_seconds is not None:
+        background_cache.max_seconds = background_cache_seconds
+    return generator.render_chunk(schedule, speakers, background_path, start_frame, end_frame, chunk_path, request_id,
+                                  renditions)
+
+def reel_speakers(speaker_pair, timeline):
+    """Speakers a reel may show: the pair's speakers plus everyone on its timeline"""
+    from conversational_tts import SPEAKER_PAIRS
+    speakers = set(SPEAKER_PAIRS.get(speaker_pair, {}).get('speakers', []))
+    speakers.update(segment['speaker'] for segment in timeline)
+    return speakers
+
+def preview_output_paths(output_path):
+    """``reel.mp4`` -> (``reel_poster.jpg``, ``reel_animated_preview.mp4``)"""
+    stem = os.path.splitext(output_path)[0]
+    return f"{stem}_poster.jpg", f"{stem}_animated_preview.mp4"
 
 # Global instance (using fast mode for 40-second reels)
 video_generator = OpenCVVideoGenerator(fast_mode=True)
 
-def create_background_video_with_speaker_overlays(script_text, audio_path, background_video_path=None, output_path=None, speaker_pair="trump_mrbeast", timing_data=None):
+# One generator per (backend, render profile), created on first use
+video_generators = {('opencv', video_generator.profile.name): video_generator}
+
+def get_video_generator(render_backend=None, render_profile=None):
+    """Return the shared generator for a render backend and profile"""
+    render_backend = render_backend or DEFAULT_RENDER_BACKEND
+    if render_backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unknown render backend '{render_backend}' (expected one of {', '.join(RENDER_BACKENDS)})")
+    profile = get_render_profile(render_profile)
+
+    key = (render_backend, profile.name)
+    generator = video_generators.get(key)
+    if generator is None:
+        if render_backend == 'ffmpeg':
+            from ffmpeg_video_generator import FFmpegFilterVideoGenerator as generator_class
+        else:
+            generator_class = OpenCVVideoGenerator
+        generator = video_generators.setdefault(key, generator_class(profile=profile.name))
+    return generator
+
+def create_background_video_with_speaker_overlays(script_text, audio_path, background_video_path=None, output_path=None, speaker_pair="trump_mrbeast", timing_data=None, render_workers=None, render_backend=None, burn_captions=True, render_profile=None, renditions=None, streaming=False, on_preview=None, render_stats=None, aspects=None):
     """
     Main function to replace MoviePy video generation
-    """
-    logger.info("🎬 Using OpenCV-based video generation (MoviePy replacement)")
 
+    render_profile selects the output size/quality ("preview", "standard", "hd");
+    renditions adds smaller profiles encoded from the same render pass;
+    streaming writes fragmented MP4 that can be served while it is rendered;
+    on_preview receives the poster/animated preview paths before the full render;
+    render_stats (a RenderStats) collects per-stage timings of the render;
+    aspects adds other aspect ratios ("1:1", "16:9") framed from the same background pass.
+    """
+    render_backend = render_backend or DEFAULT_RENDER_BACKEND
+    generator = get_video_generator(render_backend, render_profile)
+    resolve_renditions(generator.profile, renditions)  # Reject unknown or upscaled renditions before any work
+    resolve_aspects(generator.profile, aspects)  # And unknown aspect ratios
+    if render_backend == 'ffmpeg':
+        logger.info(f"🎛️ Using FFmpeg filtergraph video generation ({generator.profile.name} profile)")
+    else:
+        logger.info(f"🎬 Using OpenCV-based video generation (MoviePy replacement, {generator.profile.name} profile)")
 
     logger.info(f"🎭 WRAPPER FUNCTION - Received speaker_pair: {speaker_pair}")
-    return video_generator.create_video_with_overlays_and_captions(
+    return generator.create_video_with_overlays_and_captions(
         script_text=script_text,
         audio_path=audio_path,
         background_video_path=background_video_path,
         output_path=output_path,
         speaker_pair=speaker_pair,
         enable_captions=True,  # Enable captions for better user experience
-        timing_data=timing_data
+        timing_data=timing_data,
+        render_workers=render_workers,
+        burn_captions=burn_captions,
+        renditions=renditions,
+        streaming=streaming,
+        on_preview=on_preview,
+        render_stats=render_stats,
+        aspects=aspects
+    )
+
+def create_background_videos_batch(jobs, background_video_path=None, render_profile=None, burn_captions=True,
+                                   render_stats=None):
+    """
+    Batch counterpart of create_background_video_with_speaker_overlays
+
+    jobs: (script_text, audio_path, timing_data, speaker_pair[, output_path]) tuples or dicts
+    with those keys. All reels share one background decode pass; the OpenCV frame loop is
+    used whatever RENDER_BACKEND says, since the filtergraph backend decodes per reel.
+    Returns the output paths in job order.
+    """
+    generator = get_video_generator('opencv', render_profile)
+    logger.info(f"📦 Batch OpenCV video generation: {len(jobs)} reels ({generator.profile.name} profile)")
+    return generator.create_videos_batch(
+        jobs,
+        background_video_path=background_video_path,
+        enable_captions=True,  # Same as single reels
+        burn_captions=burn_captions,
+        render_stats=render_stats
     )
 
 # Add this simple test function to opencv_video_generator.py
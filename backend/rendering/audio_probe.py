@@ -0,0 +1,245 @@
+"""
+In-Process Audio Duration Probe
+Reads the exact duration of WAV (RIFF/RF64 header) and MP3 (frame headers and
+Xing/Info/VBRI tag) files in microseconds, without spawning ffprobe or
+decoding any audio.
+"""
+
+import os
+import struct
+import logging
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+MICROSECONDS = 1_000_000
+STREAMING_DATA_SIZE = 0xFFFFFFFF  # Written by encoders that cannot seek back to fix the header
+
+# WAVE format tags whose data chunk is whole frames of block_align bytes
+PCM_FORMATS = (0x0001, 0x0003, 0x0006, 0x0007, 0xFFFE)  # PCM, float, A-law, mu-law, extensible
+
+# MPEG audio header tables, indexed by the header's version bits (3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5)
+MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MPEG_BITRATES_KBPS = {
+    (3, 3): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),   # MPEG1 layer I
+    (3, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),      # MPEG1 layer II
+    (3, 1): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),       # MPEG1 layer III
+    (2, 3): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),      # MPEG2/2.5 layer I
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),           # MPEG2/2.5 layer II/III
+}
+MAX_SYNC_SEARCH_BYTES = 64 * 1024  # Junk tolerated between the ID3 tag and the first frame
+MIN_SYNC_FRAMES = 3  # Matching headers in a row that confirm a frame sync found by searching
+
+
+class MpegFrameHeader:
+    """The fields of one 4-byte MPEG audio frame header needed for timing"""
+
+    def __init__(self, header: int):
+        if header >> 21 != 0x7FF:
+            raise ValueError("no MPEG frame sync")
+        self.version = (header >> 19) & 0x3
+        self.layer = (header >> 17) & 0x3
+        bitrate_index = (header >> 12) & 0xF
+        sample_rate_index = (header >> 10) & 0x3
+        if self.version == 1 or self.layer == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+            raise ValueError("reserved or free-format MPEG frame header")
+
+        self.mpeg1 = self.version == 3
+        self.mono = (header >> 6) & 0x3 == 3
+        self.sample_rate = MPEG_SAMPLE_RATES[self.version][sample_rate_index]
+        table = (3, self.layer) if self.mpeg1 else (2, 3 if self.layer == 3 else 2)
+        bitrate = MPEG_BITRATES_KBPS[table][bitrate_index] * 1000
+        padding = (header >> 9) & 0x1
+
+        if self.layer == 3:  # Layer I
+            self.samples_per_frame = 384
+            self.frame_bytes = (12 * bitrate // self.sample_rate + padding) * 4
+        elif self.layer == 2 or self.mpeg1:  # Layer II, MPEG1 layer III
+            self.samples_per_frame = 1152
+            self.frame_bytes = 144 * bitrate // self.sample_rate + padding
+        else:  # MPEG2/2.5 layer III
+            self.samples_per_frame = 576
+            self.frame_bytes = 72 * bitrate // self.sample_rate + padding
+
+    @property
+    def side_info_bytes(self) -> int:
+        """Layer III side info length; a Xing/Info tag starts right after it"""
+        if self.mpeg1:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+
+def _samples_to_us(samples: int, sample_rate: int) -> int:
+    return samples * MICROSECONDS // sample_rate
+
+
+def probe_wav_duration_us(f: BinaryIO) -> int:
+    """Duration from the fmt/fact/data chunks of a RIFF or RF64 WAVE file"""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] not in (b'RIFF', b'RF64') or riff[8:12] != b'WAVE':
+        raise ValueError("not a RIFF/RF64 WAVE file")
+
+    file_size = os.fstat(f.fileno()).st_size
+    fmt = None
+    fact_samples = None
+    ds64_data_size = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise ValueError("WAVE file has no data chunk")
+        chunk_id, chunk_size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+        if chunk_id == b'data':
+            data_size = chunk_size
+            if chunk_size == STREAMING_DATA_SIZE and ds64_data_size is not None:
+                data_size = ds64_data_size
+            # Streaming writers leave the size unset, truncated files stop early
+            data_size = min(data_size, file_size - f.tell())
+            break
+        body = f.read(chunk_size + (chunk_size & 1))  # Chunks are word aligned
+        if chunk_id == b'fmt ' and len(body) >= 16:
+            fmt = struct.unpack('<HHIIH', body[:14])
+        elif chunk_id == b'fact' and len(body) >= 4:
+            fact_samples = struct.unpack('<I', body[:4])[0]
+        elif chunk_id == b'ds64' and len(body) >= 16:
+            ds64_data_size = struct.unpack('<Q', body[8:16])[0]
+
+    if fmt is None:
+        raise ValueError("WAVE data chunk before fmt chunk")
+    format_tag, channels, sample_rate, byte_rate, block_align = fmt
+    if sample_rate == 0:
+        raise ValueError("WAVE sample rate is 0")
+    if format_tag in PCM_FORMATS and block_align:
+        return _samples_to_us(data_size // block_align, sample_rate)
+    if fact_samples is not None:  # Compressed payload (ADPCM, MP3-in-WAV): fact holds the sample count
+        return _samples_to_us(fact_samples, sample_rate)
+    if byte_rate:
+        return data_size * MICROSECONDS // byte_rate
+    raise ValueError(f"cannot time WAVE format 0x{format_tag:04x}")
+
+
+def _skip_id3v2(f: BinaryIO) -> bool:
+    """Seek past a leading ID3v2 tag; True if there was one"""
+    header = f.read(10)
+    if len(header) == 10 and header[:3] == b'ID3':
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]  # Syncsafe integer
+        footer = 10 if header[5] & 0x10 else 0
+        f.seek(10 + size + footer)
+        return True
+    f.seek(0)
+    return False
+
+
+def _has_vbr_tag(frame: bytes, header: MpegFrameHeader) -> bool:
+    xing = 4 + header.side_info_bytes
+    return header.layer == 1 and (frame[xing:xing + 4] in (b'Xing', b'Info') or frame[36:40] == b'VBRI')
+
+
+def _confirms_sync(f: BinaryIO, position: int, first: MpegFrameHeader, file_size: int) -> bool:
+    """
+    True when MIN_SYNC_FRAMES headers of the same stream follow each other from
+    ``position``, or at least two do and the last frame runs to the end of the file.
+    """
+    header, headers = first, 1
+    while headers < MIN_SYNC_FRAMES:
+        position += header.frame_bytes
+        f.seek(position)
+        raw = f.read(4)
+        if len(raw) < 4:
+            # Only the real end of the file may cut the chain short (exactly or mid-frame)
+            return headers > 1 and position + len(raw) >= file_size
+        try:
+            header = MpegFrameHeader(struct.unpack('>I', raw)[0])
+        except ValueError:
+            return False
+        if (header.version, header.layer, header.sample_rate) != (first.version, first.layer, first.sample_rate):
+            return False
+        headers += 1
+    return True
+
+
+def _find_first_frame(f: BinaryIO, id3_tagged: bool = False) -> Optional[MpegFrameHeader]:
+    """
+    Seek to the first confirmed frame header: one right after an ID3v2 tag, one
+    carrying a Xing/Info/VBRI tag, or the start of a run of matching headers.
+    """
+    start = f.tell()
+    file_size = os.fstat(f.fileno()).st_size
+    data = f.read(MAX_SYNC_SEARCH_BYTES + 4)
+    offset = data.find(b'\xff')
+    while 0 <= offset <= len(data) - 4:
+        try:
+            header = MpegFrameHeader(struct.unpack('>I', data[offset:offset + 4])[0])
+        except ValueError:
+            header = None
+        if header is not None:
+            f.seek(start + offset)
+            frame = f.read(header.frame_bytes)
+            if ((id3_tagged and offset == 0) or _has_vbr_tag(frame, header)
+                    or _confirms_sync(f, start + offset, header, file_size)):
+                f.seek(start + offset)
+                return header
+        offset = data.find(b'\xff', offset + 1)
+    return None
+
+
+def _xing_or_vbri_samples(frame: bytes, header: MpegFrameHeader) -> Optional[int]:
+    """Decoded sample count from a Xing/Info (minus LAME gapless padding) or VBRI tag, if present"""
+    xing = 4 + header.side_info_bytes
+    if frame[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', frame[xing + 4:xing + 8])[0]
+        if not flags & 0x1:
+            return None
+        frames = struct.unpack('>I', frame[xing + 8:xing + 12])[0]
+        samples = frames * header.samples_per_frame
+        # LAME/Lavc extension (fixed position after a full Xing tag): encoder delay and end padding
+        lame = xing + 120
+        if frame[lame:lame + 4] in (b'LAME', b'Lavc', b'Lavf') and len(frame) >= lame + 24:
+            delay_padding = int.from_bytes(frame[lame + 21:lame + 24], 'big')
+            samples -= (delay_padding >> 12) + (delay_padding & 0xFFF)
+        return max(samples, 0)
+    if frame[36:40] == b'VBRI':
+        frames = struct.unpack('>I', frame[50:54])[0]
+        return frames * header.samples_per_frame
+    return None
+
+
+def probe_mp3_duration_us(f: BinaryIO) -> int:
+    """Duration from the Xing/Info/VBRI tag, or by walking every frame header when there is none"""
+    first = _find_first_frame(f, _skip_id3v2(f))
+    if first is None:
+        raise ValueError("no MPEG audio frames found")
+
+    frame = f.read(first.frame_bytes)
+    samples = _xing_or_vbri_samples(frame, first) if first.layer == 1 else None
+    if samples is not None:
+        return _samples_to_us(samples, first.sample_rate)
+
+    # No tag: the first frame is audio, count it and every following one
+    file_size = os.fstat(f.fileno()).st_size
+    samples = first.samples_per_frame
+    while True:
+        raw = f.read(4)
+        if len(raw) < 4:
+            break
+        try:
+            header = MpegFrameHeader(struct.unpack('>I', raw)[0])
+        except ValueError:
+            break  # ID3v1/APE tag or trailing junk
+        if f.seek(header.frame_bytes - 4, os.SEEK_CUR) > file_size:
+            break  # Truncated last frame
+        samples += header.samples_per_frame
+    return _samples_to_us(samples, first.sample_rate)
+
+
+def probe_audio_duration_us(path: str) -> int:
+    """
+    Exact duration of a WAV or MP3 file in microseconds.
+
+    Raises ValueError for other formats or unreadable headers.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(12)
+        f.seek(0)
+        if magic[:4] in (b'RIFF', b'RF64') and magic[8:12] == b'WAVE':
+            return probe_wav_duration_us(f)
+        return probe_mp3_duration_us(f)
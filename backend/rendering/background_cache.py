@@ -0,0 +1,284 @@
+"""
+Background Frame Cache for Video Generation
+Decodes each background once at the output resolution and fps into a .npy
+file that every render memory-maps, so concurrent renders share page cache
+instead of each running its own decoder. The least recently used files are
+removed once the cache exceeds its size budget.
+"""
+
+import cv2
+import numpy as np
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional
+
+try:
+    import fcntl  # POSIX only - used to serialise concurrent cache builds
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+from rendering.background_source import SequentialBackgroundSource
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "backgrounds")
+
+# Upper bound on cached background length. Reels longer than this over a longer
+# background decode it directly, so the background still loops at its own end.
+# At 480x854 @ 15fps one second of frames is ~18 MB on disk (720x1280 @ 24fps: ~66 MB).
+DEFAULT_MAX_SECONDS = float(os.getenv("BACKGROUND_CACHE_MAX_SECONDS", 60))
+DEFAULT_MAX_BYTES = int(os.getenv("BACKGROUND_CACHE_MAX_MB", 8192)) * 1024 * 1024
+STALE_TMP_SECONDS = 3600  # Unfinished builds of crashed processes are removed after this long
+
+
+class CachedBackgroundSource:
+    """
+    Background source backed by a memory-mapped frame array.
+
+    Frame fetch is a zero-copy slice of the mapping; ``read`` returns a
+    writable copy because the render loop draws overlays in place.
+    ``on_release`` hands the mapping back to the cache that opened it.
+    """
+
+    def __init__(self, frames: np.ndarray, on_release: Optional[Callable[[], None]] = None):
+        self.frames = frames
+        self._on_release = on_release
+        self.frame_count = frames.shape[0]
+        self.still = self.frame_count == 1  # Single-frame background: the same frame everywhere
+
+    def frame_view(self, frame_num: int) -> np.ndarray:
+        """Read-only view of the cached frame for output frame ``frame_num``"""
+        return self.frames[frame_num % self.frame_count]
+
+    def read(self, frame_num: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Writable copy of the cached frame for output frame ``frame_num`` (into ``out`` when given)"""
+        if out is None:
+            return np.array(self.frame_view(frame_num))
+        np.copyto(out, self.frame_view(frame_num))
+        return out
+
+    def seek(self, frame_num: int) -> None:
+        """Cached frames are random access - nothing to do"""
+
+    def release(self) -> None:
+        # The mapping itself is shared through BackgroundFrameCache
+        self.frames = None
+        on_release, self._on_release = self._on_release, None
+        if on_release is not None:
+            on_release()
+
+
+class BackgroundFrameCache:
+    """
+    Process-wide registry of pre-scaled background frame files.
+
+    Cache files are keyed by the source file (path, size, mtime) and the
+    target resolution/fps, written to a temporary file and atomically renamed
+    into place, so readers never observe a partially written cache. A file's
+    mtime is its last use; files beyond max_bytes are evicted oldest first,
+    except those an open source of this process is still reading.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_seconds: float = DEFAULT_MAX_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._mapped = {}  # cache file path -> np.memmap shared by the open sources
+        self._refs = {}  # cache file path -> number of open sources
+
+    def cache_path(self, video_path: str, width: int, height: int, fps: int) -> str:
+        """Cache file path for a background at the given output format"""
+        stat = os.stat(video_path)
+        key = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}|{width}x{height}@{fps}|{self.max_seconds}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        return os.path.join(self.cache_dir, f"{name}_{width}x{height}_{fps}fps_{digest}.npy")
+
+    def get_frames(self, video_path: str, width: int, height: int, fps: int) -> Optional[np.ndarray]:
+        """Return the memory-mapped frames for a background, building the cache file if needed"""
+        loaded = self._load(video_path, width, height, fps)
+        return loaded[1] if loaded is not None else None
+
+    def open_source(self, video_path: str, width: int, height: int, fps: int,
+                    frames_needed: Optional[int] = None) -> Optional[CachedBackgroundSource]:
+        """
+        Open a cached background source, or None if the cache cannot be used.
+
+        Only the first max_seconds of a background are cached and the cached
+        frames loop. For a reel of frames_needed frames that is longer than this,
+        over a background longer than this, None is returned, so the caller
+        decodes the background directly and it loops at its own end.
+        The cache file is not evicted until the source is released.
+        """
+        if frames_needed and frames_needed > int(self.max_seconds * fps) and self._exceeds_cap(video_path, fps):
+            logger.info(f"🗺️ Reel ({frames_needed / fps:.1f}s) and background are longer than the "
+                        f"{self.max_seconds:.0f}s background cache - decoding directly")
+            return None
+        loaded = self._load(video_path, width, height, fps)
+        if loaded is None or loaded[1].shape[0] == 0:
+            return None
+        path, frames = loaded
+        with self._lock:
+            frames = self._mapped.setdefault(path, frames)
+            self._refs[path] = self._refs.get(path, 0) + 1
+        return CachedBackgroundSource(frames, on_release=lambda: self._release(path))
+
+    def _load(self, video_path: str, width: int, height: int, fps: int):
+        """(cache path, frames) for a background, building and mapping the file if needed; None on failure"""
+        try:
+            if not os.path.exists(video_path):
+                logger.error(f"❌ Background video not found: {video_path}")
+                return None
+
+            path = self.cache_path(video_path, width, height, fps)
+            with self._lock:
+                frames = self._mapped.get(path)
+
+            built = False
+            if frames is None:
+                if not os.path.exists(path):
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    with _BuildLock(path + ".lock"):
+                        # Another worker may have finished the build while we waited
+                        if not os.path.exists(path):
+                            self._build(video_path, path, width, height, fps)
+                            built = True
+                frames = np.load(path, mmap_mode='r')
+                logger.info(f"🗺️ Background cache mapped: {path} ({frames.shape[0]} frames)")
+
+            try:
+                os.utime(path)  # Mark as recently used, on every hit
+            except OSError:
+                pass  # Evicted by another process; our mapping stays valid
+            if built:
+                self.evict(keep=path)
+            return path, frames
+
+        except Exception as e:
+            logger.error(f"❌ Background cache unavailable for {video_path}: {str(e)}")
+            return None
+
+    def _release(self, path: str) -> None:
+        """Drop one open source's hold on a cache file; the last one unpins it"""
+        with self._lock:
+            self._refs[path] -= 1
+            if self._refs[path] <= 0:
+                del self._refs[path]
+                del self._mapped[path]
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used cache files until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith('.tmp') or name.endswith('.lock'):
+                    # Leftovers of crashed builds (finished builds remove their lock)
+                    if now - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                        os.remove(path)
+                    continue
+                if not name.endswith('.npy'):
+                    continue
+                stat = os.stat(path)
+            except OSError:
+                continue  # Removed by another process
+            entries.append((stat.st_mtime, path, stat.st_size))
+            total += stat.st_size
+
+        with self._lock:
+            in_use = set(self._refs)
+        for used, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep or path in in_use:
+                continue  # Read by an open source of this process
+            try:
+                # Renders in other processes keep their mapping of an unlinked file
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            logger.info(f"🧹 Background cache evicted {os.path.basename(path)} ({size / 1024 / 1024:.1f} MB)")
+
+    def _exceeds_cap(self, video_path: str, fps: int) -> bool:
+        """Whether a background lasts longer than max_seconds (True if its length is unknown)"""
+        cap = cv2.VideoCapture(video_path)
+        try:
+            source_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            source_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+        return source_frames <= 0 or int(source_frames * fps / source_fps) > int(self.max_seconds * fps)
+
+    def _build(self, video_path: str, path: str, width: int, height: int, fps: int) -> None:
+        """Decode the background once at the output format into a .npy file"""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise Exception(f"Could not open video: {video_path}")
+
+        # INTER_AREA is affordable here because every frame is only resized once
+        source = SequentialBackgroundSource(cap, width, height, fps, interpolation=cv2.INTER_AREA)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            loop_frames = int(source.source_frame_count * fps / source.source_fps) if source.source_frame_count else 0
+            max_frames = int(self.max_seconds * fps)
+            frame_count = min(loop_frames, max_frames) if loop_frames > 0 else max_frames
+            if loop_frames > max_frames:
+                logger.warning(f"⚠️ Background is {loop_frames / fps:.1f}s - caching the first {self.max_seconds:.0f}s only")
+
+            logger.info(f"🗺️ Building background cache: {video_path} -> {frame_count} frames at {width}x{height}@{fps}fps")
+
+            frames = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                               shape=(frame_count, height, width, 3))
+            for frame_num in range(frame_count):
+                frames[frame_num] = source.read(frame_num)
+            frames.flush()
+            del frames
+
+            os.replace(tmp_path, path)
+            logger.info(f"✅ Background cache built: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+        finally:
+            source.release()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class _BuildLock:
+    """Exclusive file lock so only one process decodes a given background"""
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.lock_path, "w")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            # Remove the lock file while holding it; processes already waiting hold the old
+            # file, and find the finished cache file when they get it
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+# Global instance shared by every render in this process
+background_cache = BackgroundFrameCache()
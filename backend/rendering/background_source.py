@@ -0,0 +1,186 @@
+"""
+Background Frame Sources for Video Generation
+Sequential (forward-only) decoding of looping background videos, and still
+(image or solid colour) backgrounds
+"""
+
+import os
+import cv2
+import numpy as np
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Solid fallback colour (BGR) used when a background frame cannot be decoded
+FALLBACK_BACKGROUND_COLOR = (50, 50, 150)  # Dark blue
+
+# Backgrounds with these extensions are still images, not videos
+STILL_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+class SequentialBackgroundSource:
+    """
+    Serves resized background frames for consecutive output frame numbers.
+
+    The underlying capture is only ever read forward: frames between two
+    requested source positions are skipped with ``grab()`` and the capture is
+    rewound once per loop when the background wraps at end-of-file. Source
+    frames are selected by timestamp, so any source rate maps onto the output
+    rate without seeking per frame.
+    """
+
+    still = False  # Frames change over time
+
+    def __init__(self, cap, width: int, height: int, fps: int,
+                 interpolation: int = cv2.INTER_NEAREST):
+        self.cap = cap
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.interpolation = interpolation
+
+        self.source_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        # CAP_PROP_FRAME_COUNT is only an estimate for some containers; it is
+        # corrected the first time a read fails before reaching it.
+        self.source_frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+
+        self._next_index = 0          # Source frame the next read() returns
+        self._last_index = None       # Source index held in _last_frame
+        self._last_frame = None       # Decoded (unscaled) source frame
+
+        logger.info(f"🎞️ Sequential background source: {self.source_frame_count} frames @ "
+                    f"{self.source_fps:.2f}fps -> {width}x{height} @ {fps}fps")
+
+    def source_index_for(self, frame_num: int) -> int:
+        """Map an output frame number to the source frame shown at that time"""
+        return self._wrap_index(int(frame_num * self.source_fps / self.fps))
+
+    def seek(self, frame_num: int) -> None:
+        """Position the source so the next read is output frame ``frame_num`` (one seek)"""
+        index = self.source_index_for(frame_num)
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        self._next_index = index
+        self._last_index = None
+
+    def read(self, frame_num: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the resized background frame for output frame ``frame_num``,
+        written into ``out`` (an H x W x 3 uint8 buffer) when given.
+        """
+        index = self.source_index_for(frame_num)
+
+        # Output rate above the source rate: reuse the frame already decoded
+        if index != self._last_index or self._last_frame is None:
+            frame = self._read_source_frame(index)
+            if frame is None:
+                logger.warning(f"⚠️ Background frame {index} could not be decoded - using solid colour")
+                return solid_background_frame(self.width, self.height, out=out)
+            self._last_frame = frame
+            self._last_index = index
+
+        # Resizing always yields a fresh array (or fills out), so callers may draw on it in place
+        return cv2.resize(self._last_frame, (self.width, self.height), dst=out, interpolation=self.interpolation)
+
+    def _read_source_frame(self, index: int) -> Optional[np.ndarray]:
+        """Decode source frame ``index`` reading forward, wrapping at end-of-file"""
+        if index < self._next_index:
+            self._rewind()
+
+        # Skip intermediate frames without converting them
+        while self._next_index < index:
+            if not self.cap.grab():
+                if not self._handle_eof():
+                    return None
+                return self._read_source_frame(self._wrap_index(index))
+            self._next_index += 1
+
+        # Decode into the previous source frame's buffer - it is replaced by this frame anyway
+        self._last_index = None
+        ret, frame = self.cap.read(self._last_frame)
+        if not ret:
+            if not self._handle_eof():
+                return None
+            return self._read_source_frame(self._wrap_index(index))
+
+        self._next_index += 1
+        return frame
+
+    def _wrap_index(self, index: int) -> int:
+        """Wrap a source index against the (possibly corrected) frame count"""
+        return index % self.source_frame_count if self.source_frame_count > 0 else index
+
+    def _handle_eof(self) -> bool:
+        """Record the real frame count after an early EOF and rewind; False if nothing is readable"""
+        if self._next_index == 0:
+            return False
+        if self.source_frame_count == 0 or self._next_index < self.source_frame_count:
+            logger.info(f"🎞️ Background ended at frame {self._next_index} (reported {self.source_frame_count})")
+            self.source_frame_count = self._next_index
+        self._rewind()
+        return True
+
+    def _rewind(self) -> None:
+        """Restart decoding from the first frame (once per background loop)"""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._next_index = 0
+
+    def release(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+def solid_background_frame(width: int, height: int,
+                           color: Tuple[int, int, int] = FALLBACK_BACKGROUND_COLOR,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Create a solid background frame (filling ``out`` when given)"""
+    frame = np.empty((height, width, 3), dtype=np.uint8) if out is None else out
+    frame[:] = color
+    return frame
+
+
+class StillBackgroundSource:
+    """
+    Background that shows the same frame at every frame number (an image or a
+    solid colour); ``still`` lets the renderer compose one frame per change of
+    render state instead of one per output frame.
+    """
+
+    still = True
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+
+    def read(self, frame_num: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Writable copy of the still frame (into ``out`` when given)"""
+        if out is None:
+            return self.frame.copy()
+        np.copyto(out, self.frame)
+        return out
+
+    def seek(self, frame_num: int) -> None:
+        """Every frame is the same - nothing to do"""
+
+    def release(self) -> None:
+        self.frame = None
+
+
+def is_still_image(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in STILL_IMAGE_EXTENSIONS
+
+
+def load_still_background(path: str, width: int, height: int) -> Optional[np.ndarray]:
+    """Load an image background scaled to cover width x height (centre crop), or None if unreadable"""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        logger.error(f"❌ Could not read background image: {path}")
+        return None
+    image_height, image_width = image.shape[:2]
+    scale = max(width / image_width, height / image_height)
+    scaled_width = max(width, int(round(image_width * scale)))
+    scaled_height = max(height, int(round(image_height * scale)))
+    scaled = cv2.resize(image, (scaled_width, scaled_height), interpolation=cv2.INTER_AREA)
+    x, y = (scaled_width - width) // 2, (scaled_height - height) // 2
+    logger.info(f"🖼️ Still background loaded: {path} ({image_width}x{image_height} -> {width}x{height})")
+    return np.ascontiguousarray(scaled[y:y + height, x:x + width])
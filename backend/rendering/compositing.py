@@ -0,0 +1,113 @@
+"""
+Compositing Kernels for Video Generation
+Integer (uint16 fixed-point) alpha blending of premultiplied layers
+"""
+
+import numpy as np
+from typing import Optional
+
+
+class BlendScratch:
+    """Reusable uint16 work buffers for blend_premultiplied, for layers up to height x width"""
+
+    def __init__(self, height: int, width: int):
+        self.acc = np.empty((height, width, 3), dtype=np.uint16)
+        self.tmp = np.empty((height, width, 3), dtype=np.uint16)
+        self.inv_alpha = np.empty((height, width), dtype=np.uint16)
+
+    def views(self, h: int, w: int):
+        return self.acc[:h, :w], self.tmp[:h, :w], self.inv_alpha[:h, :w]
+
+
+def blend_premultiplied(dst: np.ndarray, premultiplied: np.ndarray, alpha: np.ndarray,
+                        x: int, y: int, opacity: int = 255, scratch: Optional[BlendScratch] = None) -> None:
+    """
+    Blend a premultiplied BGR layer onto ``dst`` in place.
+
+    ``dst[y:y+h, x:x+w] = premultiplied + dst * (255 - alpha) / 255``, computed
+    in uint16 with exact rounding of the division by 255. Only the layer's own
+    rows and columns are touched; parts falling outside ``dst`` are clipped.
+    ``opacity`` (0-255) fades the whole layer.
+
+    Args:
+        dst: Destination frame (H x W x 3, uint8), modified in place
+        premultiplied: Layer colour already multiplied by its alpha (h x w x 3, uint8)
+        alpha: Layer coverage (h x w, uint8)
+        x, y: Position of the layer's top-left corner in ``dst``
+        opacity: Extra layer-wide opacity (255 = as stored)
+        scratch: Work buffers to reuse instead of allocating temporaries (full-opacity blends only)
+    """
+    if opacity <= 0:
+        return
+
+    h, w = alpha.shape
+    dst_h, dst_w = dst.shape[:2]
+
+    # Clip the layer rectangle against the destination
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, dst_w), min(y + h, dst_h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    src_rows = slice(y0 - y, y1 - y)
+    src_cols = slice(x0 - x, x1 - x)
+
+    roi = dst[y0:y1, x0:x1]
+    a = alpha[src_rows, src_cols]
+    fg = premultiplied[src_rows, src_cols]
+
+    if scratch is not None and opacity == 255:
+        acc, tmp, inv_alpha = scratch.views(y1 - y0, x1 - x0)
+        np.subtract(255, a, out=inv_alpha)
+        np.multiply(roi, inv_alpha[:, :, None], out=acc)
+        _div255_inplace(acc, tmp)
+        acc += fg
+        np.copyto(roi, acc, casting='unsafe')
+        return
+
+    if opacity < 255:
+        a = _mul_div255(a.astype(np.uint16), opacity)
+        fg = _mul_div255(fg.astype(np.uint16), opacity)
+
+    # Background contribution: roi * (255 - a) / 255
+    inv_alpha = 255 - a.astype(np.uint16)
+    acc = roi.astype(np.uint16)
+    acc *= inv_alpha[:, :, None]
+    _div255_inplace(acc)
+    acc += fg
+    np.copyto(roi, acc, casting='unsafe')
+
+
+def blend_premultiplied_layer(dst: np.ndarray, layer, x: int, y: int, opacity: int = 255,
+                              scratch: Optional[BlendScratch] = None) -> None:
+    """Blend an object exposing ``premultiplied``/``alpha``/``offset_x``/``offset_y`` at (x, y)"""
+    blend_premultiplied(dst, layer.premultiplied, layer.alpha, x + layer.offset_x, y + layer.offset_y, opacity,
+                        scratch)
+
+
+def premultiply(bgr: np.ndarray, alpha: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Multiply straight BGR colour by its uint8 alpha (rounded), returning uint8"""
+    acc = bgr.astype(np.uint16) * alpha[:, :, None]
+    acc += 127
+    acc //= 255
+    if out is None:
+        return acc.astype(np.uint8)
+    np.copyto(out, acc, casting='unsafe')
+    return out
+
+
+def _mul_div255(values: np.ndarray, factor: int) -> np.ndarray:
+    """Return round(values * factor / 255) for uint16 ``values`` and 0 <= factor <= 255"""
+    values *= factor
+    _div255_inplace(values)
+    return values
+
+
+def _div255_inplace(acc: np.ndarray, tmp: Optional[np.ndarray] = None) -> None:
+    """Exact round(acc / 255) for 0 <= acc <= 255 * 255 using shifts only (tmp: same-shape work buffer)"""
+    acc += 128
+    if tmp is None:
+        acc += acc >> 8
+    else:
+        np.right_shift(acc, 8, out=tmp)
+        acc += tmp
+    acc >>= 8
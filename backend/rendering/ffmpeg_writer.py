@@ -0,0 +1,298 @@
+"""
+FFmpeg Pipe Writer for Video Generation
+Streams raw BGR frames into a single ffmpeg process that encodes H.264 and
+muxes the audio in the same pass (no intermediate temp video).
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from rendering.render_profiles import RenderProfile
+
+logger = logging.getLogger(__name__)
+
+
+def get_ffmpeg_path() -> str:
+    """Find the FFmpeg binary (system ffmpeg first, local ./ffmpeg if it runs)"""
+    ffmpeg_path = 'ffmpeg'  # Use system ffmpeg first
+    if os.path.exists('./ffmpeg') and os.access('./ffmpeg', os.X_OK):
+        # Check if local ffmpeg is executable (for local development)
+        try:
+            result = subprocess.run(['./ffmpeg', '-version'], capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                ffmpeg_path = './ffmpeg'
+        except Exception:
+            ffmpeg_path = 'ffmpeg'  # Fallback to system ffmpeg
+    return ffmpeg_path
+
+
+def encode_output_args(output_path: str, width: int, height: int, fps: int, audio_path: Optional[str] = None,
+                       crf: int = 28, preset: str = 'ultrafast', output_args: Optional[List[str]] = None,
+                       renditions: Sequence[Tuple[str, RenderProfile]] = (), gop_seconds: Optional[int] = None,
+                       resample: bool = False) -> List[str]:
+    """
+    ffmpeg output options for the reel and its renditions, with the video on input 0
+    and the audio (if any) on input 1. resample=True converts the main output to a
+    constant fps too (for inputs that are not already at the output rate).
+    """
+    cmd = []
+    outputs = [(output_path, width, height, fps, crf, preset)]
+    outputs += [(path, profile.width, profile.height, profile.fps, profile.crf, profile.preset)
+                for path, profile in renditions]
+    for path, out_width, out_height, out_fps, out_crf, out_preset in outputs:
+        cmd += ['-map', '0:v']
+        if audio_path:
+            cmd += [
+                '-map', '1:a',
+                '-c:a', 'aac',                  # Audio codec
+                '-shortest',                    # Stop when shortest stream ends
+            ]
+        else:
+            cmd += ['-an']                      # No audio stream
+        if (out_width, out_height, out_fps) != (width, height, fps):
+            # Rendition: frame-rate converted first so only kept frames are scaled
+            cmd += ['-vf', f'fps={out_fps},scale={out_width}:{out_height}:flags=area']
+        elif resample:
+            cmd += ['-vf', f'fps={out_fps}']
+        cmd += [
+            '-c:v', 'libx264',                  # Video codec
+            '-preset', out_preset,              # Encoding speed preset
+            '-crf', str(out_crf),               # Quality (higher = smaller, faster)
+            '-pix_fmt', 'yuv420p',              # Player-compatible chroma layout
+        ]
+        if gop_seconds:
+            gop = str(out_fps * gop_seconds)    # Fixed GOPs so chunks start on a keyframe boundary
+            cmd += ['-g', gop, '-keyint_min', gop, '-sc_threshold', '0']
+        cmd += output_args or []
+        cmd += [path]
+    return cmd
+
+
+class FFmpegPipeWriter:
+    """
+    Write frames to ``output_path`` through one ffmpeg process.
+
+    Frames are piped as raw ``bgr24`` and encoded once with libx264; when an
+    audio path is given it is encoded to AAC and muxed in the same process.
+    ``renditions`` lists extra ``(path, RenderProfile)`` outputs that the same
+    process scales down and encodes from the one frame stream.
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, fps: int,
+                 audio_path: Optional[str] = None, crf: int = 28, preset: str = 'ultrafast',
+                 output_args: Optional[List[str]] = None, renditions: Sequence[Tuple[str, RenderProfile]] = (),
+                 gop_seconds: Optional[int] = None):
+        self.output_path = output_path
+        self.output_paths = [output_path] + [path for path, _ in renditions]
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.audio_path = audio_path
+        self.frames_written = 0
+        self.encoder_finished = False  # ffmpeg stopped reading (end of audio with -shortest)
+
+        ffmpeg_path = get_ffmpeg_path()
+        cmd = [
+            ffmpeg_path, '-y',                      # Overwrite output
+            '-loglevel', 'error',
+            '-f', 'rawvideo',                       # Raw frames on stdin
+            '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}',
+            '-r', str(fps),
+            '-i', '-',
+        ]
+        if audio_path:
+            cmd += ['-i', audio_path]               # Input audio
+
+        cmd += encode_output_args(output_path, width, height, fps, audio_path, crf, preset, output_args, renditions,
+                                  gop_seconds)
+        self.cmd = cmd
+
+        logger.info(f"🎵 Running FFmpeg command: {' '.join(cmd)}")
+        logger.info(f"🔧 Using FFmpeg binary: {ffmpeg_path}")
+
+        # stderr goes to a temp file so a chatty ffmpeg can never block the pipe
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=self._stderr)
+
+    def write(self, frame: np.ndarray) -> None:
+        """Send one BGR frame to the encoder"""
+        if self.encoder_finished:
+            return
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+            self.frames_written += 1
+        except (BrokenPipeError, ValueError) as e:
+            # With -shortest ffmpeg stops reading once the audio ends; that is a clean finish
+            if self.process.wait() == 0:
+                logger.info(f"🎵 FFmpeg finished at the end of the audio after {self.frames_written} frames")
+                self.encoder_finished = True
+                return
+            raise RuntimeError(f"FFmpeg failed: {self._read_stderr() or str(e)}")
+
+    def close(self) -> None:
+        """Flush the remaining frames and wait for the encoder to finish the file"""
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        returncode = self.process.wait()
+        stderr = self._read_stderr()
+        self._stderr.close()
+        if returncode != 0:
+            logger.error(f"❌ FFmpeg failed with return code: {returncode}")
+            logger.error(f"❌ FFmpeg stderr: {stderr}")
+            logger.error(f"❌ Command that failed: {' '.join(self.cmd)}")
+            raise RuntimeError(f"FFmpeg failed: {stderr}")
+        logger.info(f"✅ FFmpeg encoded {self.frames_written} frames: {', '.join(self.output_paths)}")
+
+    def abort(self) -> None:
+        """Stop the encoder after a render error and remove the partial output"""
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        if not self._stderr.closed:
+            self._stderr.close()
+        for path in self.output_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read_stderr(self) -> str:
+        if self._stderr.closed:
+            return ""
+        self._stderr.seek(0)
+        return self._stderr.read().decode('utf-8', errors='replace').strip()
+
+
+class FFmpegRunWriter:
+    """
+    Write a reel made of runs of identical frames (a still background) through one ffmpeg process.
+
+    Each distinct frame is stored once as a lossless BMP and listed with its run
+    length in an ffconcat script; ffmpeg repeats it up to ``fps`` at the encoder,
+    so only one frame per change is composed and piped. Outputs, renditions and
+    audio are the same as for FFmpegPipeWriter; encoding starts in ``close()``.
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, fps: int,
+                 audio_path: Optional[str] = None, crf: int = 28, preset: str = 'ultrafast',
+                 output_args: Optional[List[str]] = None, renditions: Sequence[Tuple[str, RenderProfile]] = (),
+                 gop_seconds: Optional[int] = None):
+        self.output_path = output_path
+        self.output_paths = [output_path] + [path for path, _ in renditions]
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.audio_path = audio_path
+        self.frames_written = 0
+        self.work_dir = tempfile.mkdtemp(prefix='frame_runs_')
+        self._runs = []  # (frame file, frames it is shown for)
+        self._output_args = encode_output_args(output_path, width, height, fps, audio_path, crf, preset, output_args,
+                                               renditions, gop_seconds, resample=True)
+
+    def write(self, frame: np.ndarray, repeat: int = 1) -> None:
+        """Show one BGR frame for the next ``repeat`` output frames"""
+        if repeat <= 0:
+            return
+        name = f"run_{len(self._runs):05d}.bmp"
+        if not cv2.imwrite(os.path.join(self.work_dir, name), frame):
+            raise RuntimeError(f"Could not write frame {self.frames_written} to {self.work_dir}")
+        self._runs.append((name, repeat))
+        self.frames_written += repeat
+
+    def concat_script(self) -> str:
+        """ffconcat script holding each frame for its run (durations rounded on the frame grid)"""
+        lines = ['ffconcat version 1.0']
+        start_us = 0
+        shown = 0
+        for name, repeat in self._runs:
+            shown += repeat
+            end_us = round(shown * 1_000_000 / self.fps)
+            # Image timestamps are in 1/framerate units (1/25 by default): use the output frame grid
+            lines += [f"file '{name}'", f"option framerate {self.fps}",
+                      f"duration {(end_us - start_us) / 1_000_000:.6f}"]
+            start_us = end_us
+        if self._runs:
+            # The concat demuxer drops the last entry's duration
+            lines += [f"file '{self._runs[-1][0]}'", f"option framerate {self.fps}"]
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        """Encode the runs (each repeated to the output frame rate) and mux the audio"""
+        try:
+            if not self._runs:
+                raise RuntimeError("FFmpeg failed: no frames written")
+            script_path = os.path.join(self.work_dir, 'runs.ffconcat')
+            with open(script_path, 'w') as f:
+                f.write(self.concat_script())
+
+            ffmpeg_path = get_ffmpeg_path()
+            cmd = [
+                ffmpeg_path, '-y',
+                '-loglevel', 'error',
+                '-f', 'concat', '-safe', '0',       # One image per run of identical frames
+                '-t', f"{self.frames_written / self.fps:.6f}",
+                '-i', script_path,
+            ]
+            if self.audio_path:
+                cmd += ['-i', self.audio_path]
+            cmd += self._output_args
+            self.cmd = cmd
+
+            logger.info(f"🖼️ Running FFmpeg run encode ({len(self._runs)} distinct frames, "
+                        f"{self.frames_written} output frames): {' '.join(cmd)}")
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"❌ FFmpeg failed with return code: {result.returncode}")
+                logger.error(f"❌ FFmpeg stderr: {result.stderr}")
+                raise RuntimeError(f"FFmpeg failed: {result.stderr}")
+            logger.info(f"✅ FFmpeg encoded {self.frames_written} frames: {', '.join(self.output_paths)}")
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def abort(self) -> None:
+        """Drop the stored frames and any partial output"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        for path in self.output_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def concat_chunks(chunk_paths: List[str], output_path: str, audio_path: Optional[str] = None) -> None:
+    """
+    Join encoded chunks with ffmpeg's concat demuxer without re-encoding video.
+    Audio (if any) is encoded and muxed in the same pass.
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix='.txt', prefix='concat_')
+    try:
+        with os.fdopen(list_fd, 'w') as f:
+            for chunk_path in chunk_paths:
+                # Escape the path for ffmpeg
+                escaped = os.path.abspath(chunk_path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        ffmpeg_path = get_ffmpeg_path()
+        cmd = [ffmpeg_path, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_path:
+            cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:a', 'aac', '-shortest']
+        else:
+            cmd += ['-an']
+        cmd += ['-c:v', 'copy', output_path]
+
+        logger.info(f"🧩 Running FFmpeg concat: {' '.join(cmd)}")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            logger.error(f"❌ FFmpeg concat failed with return code: {result.returncode}")
+            logger.error(f"❌ FFmpeg stderr: {result.stderr}")
+            raise RuntimeError(f"FFmpeg concat failed: {result.stderr}")
+        logger.info(f"✅ Joined {len(chunk_paths)} chunks: {output_path}")
+    finally:
+        os.remove(list_path)
@@ -0,0 +1,120 @@
+"""
+Foreground Layer Cache for Video Generation
+Everything drawn over the background (speaker sprite, caption box and text) is
+composed once per distinct render state into premultiplied tiles, so each
+frame only needs one blend per tile.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
+
+import numpy as np
+
+from rendering.compositing import BlendScratch, blend_premultiplied_layer
+
+logger = logging.getLogger(__name__)
+
+# Empty rows shorter than this between two painted regions do not split a tile
+TILE_MERGE_GAP = 16
+
+DEFAULT_MAX_LAYER_BYTES = 64 * 1024 * 1024
+
+
+class LayerTile:
+    """Premultiplied BGR + alpha rectangle placed at (offset_x, offset_y) in the frame"""
+
+    def __init__(self, premultiplied: np.ndarray, alpha: np.ndarray, offset_x: int, offset_y: int):
+        self.premultiplied = premultiplied
+        self.alpha = alpha
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+
+    @property
+    def nbytes(self) -> int:
+        return self.premultiplied.nbytes + self.alpha.nbytes
+
+
+class ForegroundLayer:
+    """Full-frame foreground stored as the tiles that actually contain pixels"""
+
+    def __init__(self, tiles: List[LayerTile]):
+        self.tiles = tiles
+
+    @property
+    def nbytes(self) -> int:
+        return sum(tile.nbytes for tile in self.tiles)
+
+    def blend_onto(self, frame: np.ndarray, scratch: Optional[BlendScratch] = None) -> None:
+        """Composite the layer onto ``frame`` in place (``scratch`` avoids per-call temporaries)"""
+        for tile in self.tiles:
+            blend_premultiplied_layer(frame, tile, 0, 0, scratch=scratch)
+
+    @classmethod
+    def from_matte(cls, on_black: np.ndarray, on_white: np.ndarray) -> "ForegroundLayer":
+        """
+        Recover a premultiplied layer from the same drawing done on black and on white.
+
+        Over black the drawing leaves exactly its premultiplied colour; over white
+        every channel additionally keeps ``255 - alpha``. Any sequence of normal
+        alpha-composited draws (blends, anti-aliased text, weighted boxes) is
+        captured this way without the draw code knowing about layers.
+        """
+        transmission = on_white.astype(np.int16) - on_black.astype(np.int16)
+        alpha = np.clip(255 - transmission.min(axis=2), 0, 255).astype(np.uint8)
+
+        tiles = []
+        for y0, y1 in _painted_row_bands(alpha):
+            cols = np.flatnonzero(alpha[y0:y1].any(axis=0))
+            x0, x1 = int(cols[0]), int(cols[-1]) + 1
+            tile_alpha = np.ascontiguousarray(alpha[y0:y1, x0:x1])
+            # Keep colour <= coverage so the uint16 blend can never overflow
+            tile_color = np.minimum(on_black[y0:y1, x0:x1], tile_alpha[:, :, None])
+            tiles.append(LayerTile(tile_color, tile_alpha, x0, y0))
+        return cls(tiles)
+
+
+class ForegroundLayerCache:
+    """
+    LRU of foreground layers keyed by render state.
+
+    ``build`` is only called the first time a state is seen (or after it was
+    evicted to stay under ``max_bytes``).
+    """
+
+    def __init__(self, build: Callable[[Hashable], ForegroundLayer], max_bytes: int = DEFAULT_MAX_LAYER_BYTES):
+        self._build = build
+        self.max_bytes = max_bytes
+        self._layers: "OrderedDict[Hashable, ForegroundLayer]" = OrderedDict()
+        self._bytes = 0
+        self.builds = 0
+
+    def get(self, state: Hashable) -> ForegroundLayer:
+        layer = self._layers.get(state)
+        if layer is not None:
+            self._layers.move_to_end(state)
+            return layer
+
+        layer = self._build(state)
+        self.builds += 1
+        self._layers[state] = layer
+        self._bytes += layer.nbytes
+        while self._bytes > self.max_bytes and len(self._layers) > 1:
+            _, evicted = self._layers.popitem(last=False)
+            self._bytes -= evicted.nbytes
+        return layer
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+
+def _painted_row_bands(alpha: np.ndarray):
+    """Yield [y0, y1) row ranges containing painted pixels, merging small gaps"""
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return
+    breaks = np.flatnonzero(np.diff(rows) > TILE_MERGE_GAP)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+    for y0, y1 in zip(starts, ends):
+        yield int(y0), int(y1)
@@ -0,0 +1,195 @@
+"""
+Threaded Frame Pipeline for Video Generation
+Runs background decoding, compositing and encoder writes as three stages
+joined by bounded queues. Decoding (cv2 / memmap copies), the NumPy blend and
+pipe writes to ffmpeg all release the GIL, so one render keeps roughly three
+cores busy without a process pool. With a FramePool the decoder fills pooled
+buffers in place and the encoder hands them back, so no frame is allocated
+per iteration.
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from rendering.frame_pool import FramePool
+from rendering.render_stats import RenderStats
+
+logger = logging.getLogger(__name__)
+
+# Frames buffered between two stages; small, since each 480x854 frame is ~1.2 MB
+PIPELINE_QUEUE_FRAMES = int(os.getenv("RENDER_PIPELINE_QUEUE_FRAMES", 4))
+
+QUEUE_POLL_INTERVAL = 0.1  # Seconds between checks for a failed stage while blocked on a queue
+
+_END = object()  # Sentinel closing a queue
+
+
+def pipeline_pool_size(queue_frames: int = PIPELINE_QUEUE_FRAMES) -> int:
+    """Buffers needed so the decoder never waits on the pool: both queues full plus one per stage"""
+    return 2 * max(1, queue_frames) + 3
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage has failed"""
+
+
+class FramePipeline:
+    """
+    Decode -> compose -> encode over bounded queues.
+
+    ``decode(frame_num)`` runs on a decoder thread, ``compose(frame_num, frame)``
+    on the calling thread and ``encode(frame)`` on a writer thread. Frames reach
+    the encoder in order. The first exception raised by any stage stops the
+    others and is re-raised from ``run``.
+
+    With ``frame_pool``, ``decode(frame_num, out)`` fills a pooled buffer and
+    the buffer goes back to the pool once ``encode`` has returned.
+    """
+
+    def __init__(self, decode: Callable[[int], np.ndarray], compose: Callable[[int, np.ndarray], np.ndarray],
+                 encode: Callable[[np.ndarray], None], queue_frames: int = PIPELINE_QUEUE_FRAMES,
+                 stats: Optional[RenderStats] = None, name: str = "render",
+                 frame_pool: Optional[FramePool] = None):
+        self.decode = decode
+        self.compose = compose
+        self.encode = encode
+        self.queue_frames = max(1, queue_frames)
+        self.stats = stats if stats is not None else RenderStats()
+        self.name = name
+        self.frame_pool = frame_pool
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+
+    def run(self, frame_numbers: Iterable[int]) -> None:
+        decoded = queue.Queue(self.queue_frames)
+        composed = queue.Queue(self.queue_frames)
+        threads = [
+            threading.Thread(target=self._guard, args=(self._decode_stage, frame_numbers, decoded),
+                             name=f"{self.name}-decode", daemon=True),
+            threading.Thread(target=self._guard, args=(self._encode_stage, composed),
+                             name=f"{self.name}-encode", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self._guard(self._compose_stage, decoded, composed)
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _guard(self, stage, *args) -> None:
+        try:
+            stage(*args)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _fail(self, error: BaseException) -> None:
+        """Keep the first failure and stop every stage"""
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _close(self, q: queue.Queue) -> None:
+        """Send the end sentinel unless the pipeline is already stopping"""
+        try:
+            if not self._stop.is_set():
+                self._put(q, _END)
+        except PipelineStopped:
+            pass
+
+    def _put(self, q: queue.Queue, item) -> float:
+        """Put with back-pressure; returns the seconds spent blocked"""
+        started = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=QUEUE_POLL_INTERVAL)
+                return time.perf_counter() - started
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue):
+        """Get, giving up when another stage failed; returns (item, seconds spent waiting)"""
+        started = time.perf_counter()
+        while True:
+            try:
+                return q.get(timeout=QUEUE_POLL_INTERVAL), time.perf_counter() - started
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+
+    def _acquire(self) -> np.ndarray:
+        """Free pooled buffer (the pool is sized so this only waits on a slow encoder)"""
+        while True:
+            frame = self.frame_pool.acquire(timeout=QUEUE_POLL_INTERVAL)
+            if frame is not None:
+                return frame
+            if self._stop.is_set():
+                raise PipelineStopped()
+
+    def _decode_stage(self, frame_numbers: Iterable[int], decoded: queue.Queue) -> None:
+        try:
+            for frame_num in frame_numbers:
+                if self.frame_pool is not None:
+                    buffer = self._acquire()
+                    started = time.perf_counter()
+                    frame = self.decode(frame_num, buffer)
+                else:
+                    buffer = None
+                    started = time.perf_counter()
+                    frame = self.decode(frame_num)
+                self._put(decoded, (frame_num, frame, buffer, time.perf_counter() - started))
+        except PipelineStopped:
+            raise
+        except BaseException as e:
+            # Record before closing the queue so a later stop cannot mask this failure
+            self._fail(e)
+            raise
+        finally:
+            self._close(decoded)
+
+    def _compose_stage(self, decoded: queue.Queue, composed: queue.Queue) -> None:
+        # Stall times are only added from this thread; RenderStats.add is not thread-safe
+        try:
+            while True:
+                item, waited = self._get(decoded)
+                self.stats.add('decode_wait', waited)
+                if item is _END:
+                    break
+                frame_num, frame, buffer, decode_time = item
+                started = time.perf_counter()
+                frame = self.compose(frame_num, frame)
+                compose_time = time.perf_counter() - started
+                self.stats.add('encode_wait', self._put(composed, (frame, buffer, decode_time, compose_time)))
+        except PipelineStopped:
+            raise
+        except BaseException as e:
+            self._fail(e)
+            raise
+        finally:
+            self._close(composed)
+
+    def _encode_stage(self, composed: queue.Queue) -> None:
+        while True:
+            item, _ = self._get(composed)
+            if item is _END:
+                return
+            frame, buffer, decode_time, compose_time = item
+            started = time.perf_counter()
+            self.encode(frame)
+            self.stats.record_frame(decode_time, compose_time, time.perf_counter() - started)
+            if buffer is not None:
+                self.frame_pool.release(buffer)
@@ -0,0 +1,41 @@
+"""
+Frame Buffer Pool for Video Generation
+A fixed ring of preallocated uint8 frames shared by the render stages: the
+decoder fills a free buffer in place, the compositor blends onto it and the
+encoder returns it after the pipe write, so the frame loop allocates no frame
+memory once the ring exists.
+"""
+
+import queue
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FramePool:
+    """Ring of ``count`` preallocated frames of one shape; acquire blocks while all are in flight"""
+
+    def __init__(self, shape: Tuple[int, ...], count: int, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.count = count
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put(np.empty(self.shape, dtype=dtype))
+        logger.debug(f"🧺 Frame pool: {count} x {self.shape} ({count * np.prod(self.shape) / 1024 / 1024:.1f} MB)")
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Next free frame, or None if none was returned within ``timeout`` seconds"""
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, frame: np.ndarray) -> None:
+        self._free.put(frame)
+
+    @property
+    def free(self) -> int:
+        return self._free.qsize()
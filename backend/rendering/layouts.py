@@ -0,0 +1,184 @@
+"""
+Aspect Ratio Layouts for Video Generation
+Frame size, background framing and speaker placement for each aspect ratio a
+reel is published in (9:16, 1:1, 16:9). Extra aspect ratios are framed from
+the same decoded background frame as the profile's own 9:16 output, decoded
+large enough that no framing is upscaled, with speakers and captions laid out
+natively at the target size.
+"""
+
+import os
+import math
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from rendering.render_profiles import RenderProfile
+
+logger = logging.getLogger(__name__)
+
+# Aspect ratio name -> (width units, height units)
+ASPECT_RATIOS = {
+    '9:16': (9, 16),   # Reels / Shorts / TikTok (the render profiles' own shape)
+    '1:1': (1, 1),     # Feed posts
+    '16:9': (16, 9),   # YouTube / desktop players
+}
+
+SPRITE_HEIGHT_FRACTION = 0.4  # Speaker overlays are 40% of the frame height
+SPRITE_SIDE_MARGIN = 50       # Pixels between a speaker and its side of the frame
+
+
+def aspect_suffix(aspect: str) -> str:
+    """``16:9`` -> ``16x9`` (file name safe)"""
+    return aspect.replace(':', 'x')
+
+
+def _even(value: float) -> int:
+    """Nearest even integer (x264 needs even frame sizes for yuv420p)"""
+    return max(2, int(round(value / 2)) * 2)
+
+
+def _even_up(value: float) -> int:
+    """Smallest even integer >= value (ignoring float noise)"""
+    return max(2, math.ceil(round(value, 6) / 2) * 2)
+
+
+def _cover_crop(frame_width: int, frame_height: int, width: int, height: int) -> Tuple[int, int, int, int]:
+    """Largest centred (x, y, w, h) region of a frame_width x frame_height frame with the shape of width x height"""
+    target = width / height
+    if target > frame_width / frame_height:
+        crop_w, crop_h = frame_width, max(1, int(round(frame_width / target)))
+    else:
+        crop_w, crop_h = max(1, int(round(frame_height * target))), frame_height
+    return (frame_width - crop_w) // 2, (frame_height - crop_h) // 2, crop_w, crop_h
+
+
+class AspectLayout:
+    """
+    Where everything goes in one aspect ratio of a reel.
+
+    ``crop`` is the (x, y, w, h) region of the profile's background frame shown
+    in this layout, centred and as large as the aspect ratio allows (cover fit).
+    """
+
+    def __init__(self, aspect: str, width: int, height: int, crop: Tuple[int, int, int, int]):
+        self.aspect = aspect
+        self.width = width
+        self.height = height
+        self.crop = crop
+
+    @classmethod
+    def for_frame(cls, width: int, height: int, aspect: str = '9:16') -> "AspectLayout":
+        """Layout filling a whole frame of the given size"""
+        return cls(aspect, width, height, (0, 0, width, height))
+
+    @classmethod
+    def for_profile(cls, profile: RenderProfile, aspect: str) -> "AspectLayout":
+        """Layout of ``aspect`` whose short side matches the profile's short side"""
+        if aspect not in ASPECT_RATIOS:
+            raise ValueError(f"Unknown aspect ratio '{aspect}' (expected one of {', '.join(ASPECT_RATIOS)})")
+        units_w, units_h = ASPECT_RATIOS[aspect]
+        short_side = min(profile.width, profile.height)
+        if units_w <= units_h:
+            width, height = short_side, _even(short_side * units_h / units_w)
+        else:
+            width, height = _even(short_side * units_w / units_h), short_side
+        if (width, height) == (profile.width, profile.height) or abs(width / height - profile.width / profile.height) < 0.01:
+            return cls.for_frame(profile.width, profile.height, aspect)
+
+        # Cover fit: the largest centred region of the profile frame with this aspect ratio
+        return cls(aspect, width, height, _cover_crop(profile.width, profile.height, width, height))
+
+    def on_canvas(self, canvas_width: int, canvas_height: int) -> "AspectLayout":
+        """This layout framed from a background decoded at canvas_width x canvas_height"""
+        if (canvas_width, canvas_height) == (self.width, self.height):
+            return AspectLayout.for_frame(self.width, self.height, self.aspect)
+        return AspectLayout(self.aspect, self.width, self.height,
+                            _cover_crop(canvas_width, canvas_height, self.width, self.height))
+
+    @property
+    def suffix(self) -> str:
+        return aspect_suffix(self.aspect)
+
+    @property
+    def full_frame(self) -> bool:
+        x, y, w, h = self.crop
+        return (x, y) == (0, 0) and (w, h) == (self.width, self.height)
+
+    @property
+    def sprite_height(self) -> int:
+        return int(self.height * SPRITE_HEIGHT_FRACTION)
+
+    def profile(self, profile: RenderProfile) -> RenderProfile:
+        """Encoder settings of ``profile`` at this layout's frame size"""
+        if (self.width, self.height) == (profile.width, profile.height):
+            return profile
+        return RenderProfile(f"{profile.name}_{self.suffix}", self.width, self.height, profile.fps, profile.crf,
+                             profile.preset)
+
+    def speaker_position(self, side: str, sprite_width: int, sprite_height: int) -> Tuple[int, int]:
+        """Top-left corner of a speaker's full sprite image: bottom of the frame, on its side"""
+        y_pos = self.height - sprite_height
+        if side == 'right':
+            x_pos = self.width - sprite_width - SPRITE_SIDE_MARGIN
+        else:
+            x_pos = SPRITE_SIDE_MARGIN
+        x_pos = max(0, min(x_pos, self.width - sprite_width))
+        y_pos = max(0, min(y_pos, self.height - sprite_height))
+        return x_pos, y_pos
+
+    def frame_background(self, background: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """This layout's background: the crop region of the decoded frame, scaled to the layout size"""
+        x, y, w, h = self.crop
+        region = background[y:y + h, x:x + w]
+        if (w, h) == (self.width, self.height):
+            if out is None:
+                return region.copy()
+            np.copyto(out, region)
+            return out
+        interpolation = cv2.INTER_AREA if w > self.width else cv2.INTER_LINEAR
+        return cv2.resize(region, (self.width, self.height), dst=out, interpolation=interpolation)
+
+    def __repr__(self) -> str:
+        return f"AspectLayout({self.aspect}: {self.width}x{self.height}, crop {self.crop})"
+
+
+def resolve_aspects(profile: RenderProfile, aspects: Optional[Sequence[str]]) -> List[AspectLayout]:
+    """
+    Layouts for the extra aspect ratios requested next to a ``profile`` render.
+
+    The aspect ratio of the profile itself is the main output and is dropped,
+    as are duplicates; unknown names raise ValueError.
+    """
+    resolved = []
+    for aspect in aspects or []:
+        layout = AspectLayout.for_profile(profile, aspect)
+        if (layout.width, layout.height) == (profile.width, profile.height):
+            continue
+        if any(existing.aspect == layout.aspect for existing in resolved):
+            continue
+        resolved.append(layout)
+    return resolved
+
+
+def background_canvas(width: int, height: int, layouts: Sequence[AspectLayout]) -> Tuple[int, int]:
+    """
+    Size to decode a width x height (profile) background at so that no layout's
+    crop of it is upscaled: the profile frame grown by the largest crop upscale.
+    A 16:9 reel of a 480x854 profile needs an 854 pixel wide frame (854x1520).
+    """
+    scale = 1.0
+    for layout in layouts:
+        _, _, crop_w, crop_h = layout.crop
+        scale = max(scale, layout.width / crop_w, layout.height / crop_h)
+    if scale == 1.0:
+        return width, height
+    return _even_up(width * scale), _even_up(height * scale)
+
+
+def aspect_output_path(output_path: str, aspect: str) -> str:
+    """``reel.mp4`` -> ``reel_16x9.mp4``"""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_{aspect_suffix(aspect)}{ext or '.mp4'}"
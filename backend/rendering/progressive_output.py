@@ -0,0 +1,111 @@
+"""
+Progressive Output for Video Generation
+Renders can write fragmented MP4 (an empty moov up front, then one moof/mdat
+fragment per GOP), so the growing file is playable while frames are still
+being encoded. Each streaming render is tracked here so the API can serve the
+file as it grows and report where the finished reel was published.
+"""
+
+import os
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Keyframe (and therefore fragment) interval of streaming renders
+FRAGMENT_SECONDS = 1
+FRAGMENTED_MP4_ARGS = ['-movflags', 'frag_keyframe+empty_moov+default_base_moof']
+
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_POLL_INTERVAL = 0.25  # Seconds to wait for the encoder when a reader catches up
+MAX_TRACKED_STREAMS = 100
+
+
+class ProgressiveOutput:
+    """One streaming render: the file being written and its final state"""
+
+    def __init__(self, stream_id: str, path: str):
+        self.stream_id = stream_id
+        self.path = path
+        self.error: Optional[str] = None
+        self.result: Dict = {}
+        self.preview: Dict = {}  # URLs published before the render finishes (poster, animated preview)
+        self.task = None  # Background render task, referenced here while it runs
+        self._finished = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def status(self) -> str:
+        if not self.finished:
+            return 'rendering'
+        return 'failed' if self.error else 'done'
+
+    def finish(self, result: Optional[Dict] = None, path: Optional[str] = None) -> None:
+        """Mark the render complete; ``path`` points new readers at the published copy"""
+        self.result = result or {}
+        if path:
+            self.path = path
+        self._finished.set()
+        logger.info(f"📡 Stream {self.stream_id} finished: {self.path}")
+
+    def fail(self, error: str) -> None:
+        self.error = error
+        self._finished.set()
+        logger.error(f"❌ Stream {self.stream_id} failed: {error}")
+
+    def iter_bytes(self, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """
+        Yield the file from the start, following it as the encoder appends
+        fragments, until the render has finished and everything was read.
+        """
+        while not os.path.exists(self.path):
+            if self.finished:
+                return
+            time.sleep(STREAM_POLL_INTERVAL)
+
+        with open(self.path, 'rb') as f:
+            while True:
+                # Check before reading so the last fragment is never missed
+                finished = self.finished
+                data = f.read(chunk_size)
+                if data:
+                    yield data
+                elif finished:
+                    return
+                else:
+                    time.sleep(STREAM_POLL_INTERVAL)
+
+
+class ProgressiveOutputRegistry:
+    """Streaming renders by id; the oldest finished streams are forgotten first"""
+
+    def __init__(self, max_streams: int = MAX_TRACKED_STREAMS):
+        self.max_streams = max_streams
+        self._outputs: "OrderedDict[str, ProgressiveOutput]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, path: str) -> ProgressiveOutput:
+        output = ProgressiveOutput(uuid.uuid4().hex, path)
+        with self._lock:
+            self._outputs[output.stream_id] = output
+            for stream_id in [stream_id for stream_id, tracked in self._outputs.items() if tracked.finished]:
+                if len(self._outputs) <= self.max_streams:
+                    break
+                del self._outputs[stream_id]
+        logger.info(f"📡 Stream {output.stream_id} registered: {path}")
+        return output
+
+    def get(self, stream_id: str) -> Optional[ProgressiveOutput]:
+        with self._lock:
+            return self._outputs.get(stream_id)
+
+
+# Global instance
+progressive_outputs = ProgressiveOutputRegistry()
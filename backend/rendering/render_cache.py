@@ -0,0 +1,175 @@
+"""
+Render Cache for Video Generation
+Stores finished reels (MP4, renditions and caption sidecars) under a hash of
+every input that determines them, so regenerating an identical reel is a file
+copy instead of a render. Entries are published with an atomic directory
+rename, so concurrent writers of the same reel never expose a partial entry,
+and the least recently used entries are evicted once the cache exceeds its
+size budget.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "renders")
+DEFAULT_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_MB", 2048)) * 1024 * 1024
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE", "1") != "0"
+
+MANIFEST_NAME = "manifest.json"
+ENTRY_FILE_STEM = "reel"  # Stored files are named like the reel they came from, with this stem
+HASH_CHUNK_BYTES = 1024 * 1024
+STALE_TMP_SECONDS = 3600  # Unfinished entries of crashed writers are removed after this long
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered reels.
+
+    An entry is a directory named by its key holding the reel, every file
+    written next to it (renditions, caption sidecars) and a manifest; the
+    manifest's mtime is the entry's last use.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 enabled: bool = RENDER_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._digests: Dict[tuple, str] = {}  # (path, size, mtime) -> content digest
+        self._lock = threading.Lock()
+
+    def file_digest(self, path: str) -> str:
+        """SHA-256 of a file's content, remembered while its size and mtime are unchanged"""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self._lock:
+                self._digests[memo_key] = digest
+        return digest
+
+    def key(self, inputs: Dict, files: Dict[str, Optional[str]]) -> str:
+        """Cache key for JSON-serialisable inputs plus the content of the given files"""
+        material = {
+            'inputs': inputs,
+            'files': {name: self.file_digest(path) if path else None for name, path in files.items()},
+        }
+        encoded = json.dumps(material, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()[:32]
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def restore(self, key: str, output_path: str) -> Optional[List[str]]:
+        """Copy a cached reel (and its side files) to output_path; None on a miss"""
+        entry = self.entry_dir(key)
+        manifest_path = os.path.join(entry, MANIFEST_NAME)
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            os.utime(manifest_path)  # Mark as recently used before copying, so eviction skips it
+            stem = os.path.splitext(output_path)[0]
+            restored = []
+            for suffix in manifest['files']:
+                target = stem + suffix
+                shutil.copyfile(os.path.join(entry, ENTRY_FILE_STEM + suffix), target)
+                restored.append(target)
+            logger.info(f"♻️ Render cache hit {key}: {len(restored)} files restored to {output_path}")
+            return restored
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Evicted while copying, or unreadable: render instead
+            logger.warning(f"⚠️ Render cache entry {key} unusable: {str(e)}")
+            return None
+
+    def store(self, key: str, output_path: str, paths: List[str]) -> bool:
+        """Publish a rendered reel and its side files under key; False if not stored"""
+        stem = os.path.splitext(output_path)[0]
+        suffixes = [path[len(stem):] for path in paths if path.startswith(stem) and os.path.exists(path)]
+        if not suffixes:
+            return False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{key}-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(tmp_dir)
+            size = 0
+            for suffix in suffixes:
+                shutil.copyfile(stem + suffix, os.path.join(tmp_dir, ENTRY_FILE_STEM + suffix))
+                size += os.path.getsize(stem + suffix)
+            with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+                json.dump({'files': suffixes, 'bytes': size, 'created': time.time()}, f)
+            try:
+                os.rename(tmp_dir, self.entry_dir(key))
+            except OSError:
+                # Another writer published the same reel first - its entry is equivalent
+                logger.info(f"♻️ Render cache entry {key} already stored")
+                return False
+            logger.info(f"💾 Render cache stored {key}: {len(suffixes)} files ({size / 1024 / 1024:.2f} MB)")
+        except Exception as e:
+            logger.warning(f"⚠️ Render cache store failed for {key}: {str(e)}")
+            return False
+        finally:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict(keep=key)
+        return True
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.startswith('.'):
+                    if name.startswith(('.tmp-', '.evict-')) and now - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                used = os.path.getmtime(os.path.join(path, MANIFEST_NAME))
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+            except OSError:
+                continue  # Being evicted by another process
+            entries.append((used, name, size))
+            total += size
+
+        for used, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            # Rename first so readers see the entry disappear at once, then delete at leisure
+            doomed = os.path.join(self.cache_dir, f".evict-{name}-{uuid.uuid4().hex}")
+            try:
+                os.rename(os.path.join(self.cache_dir, name), doomed)
+            except OSError:
+                continue
+            shutil.rmtree(doomed, ignore_errors=True)
+            total -= size
+            logger.info(f"🧹 Render cache evicted {name} ({size / 1024 / 1024:.2f} MB)")
+
+
+# Global instance shared by every render in this process
+render_cache = RenderCache()
@@ -0,0 +1,71 @@
+"""
+Render Profiles for Video Generation
+Named output sizes, frame rates and x264 settings, selectable per request, plus
+the rendition paths used when one composition pass is encoded several times.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class RenderProfile:
+    """Output geometry and encoder settings for one rendition of a reel"""
+
+    def __init__(self, name: str, width: int, height: int, fps: int, crf: int, preset: str):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.crf = crf
+        self.preset = preset
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+    def __repr__(self) -> str:
+        return f"RenderProfile({self.name}: {self.width}x{self.height} @ {self.fps}fps, crf {self.crf})"
+
+
+RENDER_PROFILES: Dict[str, RenderProfile] = {
+    'preview': RenderProfile('preview', 360, 640, 12, 32, 'ultrafast'),    # Quick look, smallest file
+    'standard': RenderProfile('standard', 480, 854, 15, 28, 'ultrafast'),  # Mobile reels (previous fast mode)
+    'hd': RenderProfile('hd', 720, 1280, 24, 23, 'veryfast'),              # Desktop / upload quality
+}
+DEFAULT_RENDER_PROFILE = os.getenv("RENDER_PROFILE", "standard")
+
+
+def get_render_profile(name: Optional[str] = None) -> RenderProfile:
+    """Look up a profile by name (DEFAULT_RENDER_PROFILE if None)"""
+    name = name or DEFAULT_RENDER_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (expected one of {', '.join(RENDER_PROFILES)})")
+    return RENDER_PROFILES[name]
+
+
+def resolve_renditions(profile: RenderProfile, renditions: Optional[Sequence[str]]) -> List[RenderProfile]:
+    """
+    Validate the extra renditions encoded from a ``profile`` composition pass.
+
+    Renditions are scaled down from the composed frames, so none may be larger
+    than ``profile``; duplicates and the profile itself are dropped.
+    """
+    resolved = []
+    for name in renditions or []:
+        rendition = get_render_profile(name)
+        if rendition.name == profile.name or rendition in resolved:
+            continue
+        if rendition.width > profile.width or rendition.height > profile.height:
+            raise ValueError(f"Rendition '{rendition.name}' ({rendition.width}x{rendition.height}) is larger than "
+                             f"render profile '{profile.name}' ({profile.width}x{profile.height})")
+        resolved.append(rendition)
+    return resolved
+
+
+def rendition_output_path(output_path: str, profile: RenderProfile) -> str:
+    """``reel.mp4`` -> ``reel_preview.mp4``"""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_{profile.name}{ext or '.mp4'}"
@@ -0,0 +1,109 @@
+"""
+Render Schedule for Video Generation
+Compiles the speaker timeline and caption chunks into dense per-frame arrays
+so the frame loop does O(1) lookups instead of scanning the timeline.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Speaker overlay transitions (seconds): the overlay ramps from MIN_SEGMENT_ALPHA
+# to fully opaque over half the transition time at both ends of a segment.
+TRANSITION_TIME = 0.8
+MIN_SEGMENT_ALPHA = 0.7
+
+NO_SPEAKER = -1
+NO_CAPTION = -1
+
+
+class RenderSchedule:
+    """
+    Per-frame render state indexed by output frame number.
+
+    - ``speaker_ids[n]``: index into ``speakers`` (``NO_SPEAKER`` if nobody is on screen)
+    - ``overlay_alpha[n]``: speaker overlay opacity, 0-255
+    - ``caption_ids[n]``: index into ``captions`` (``NO_CAPTION`` if none)
+    """
+
+    def __init__(self, speakers: List[str], captions: List[Dict], speaker_ids: np.ndarray,
+                 overlay_alpha: np.ndarray, caption_ids: np.ndarray, fps: int):
+        self.speakers = speakers
+        self.captions = captions
+        self.speaker_ids = speaker_ids
+        self.overlay_alpha = overlay_alpha
+        self.caption_ids = caption_ids
+        self.fps = fps
+
+    @property
+    def total_frames(self) -> int:
+        return len(self.speaker_ids)
+
+    def speaker_at(self, frame_num: int) -> Optional[str]:
+        speaker_id = self.speaker_ids[frame_num]
+        return self.speakers[speaker_id] if speaker_id != NO_SPEAKER else None
+
+    def caption_at(self, frame_num: int) -> Optional[Dict]:
+        caption_id = self.caption_ids[frame_num]
+        return self.captions[caption_id] if caption_id != NO_CAPTION else None
+
+    def state_runs(self) -> List[Tuple[int, int]]:
+        """[start, end) frame ranges over which speaker, overlay alpha and caption stay the same"""
+        if self.total_frames == 0:
+            return []
+        changed = ((np.diff(self.speaker_ids) != 0) | (np.diff(self.overlay_alpha) != 0)
+                   | (np.diff(self.caption_ids) != 0))
+        bounds = [0] + (np.flatnonzero(changed) + 1).tolist() + [self.total_frames]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    @classmethod
+    def compile(cls, timeline: List[Dict], captions: List[Dict], total_frames: int, fps: int) -> "RenderSchedule":
+        """
+        Build the schedule for ``total_frames`` frames at ``fps``.
+
+        Matches the previous per-frame scans: a frame at time t belongs to the
+        first segment (or caption) with start <= t <= end.
+        """
+        times = np.arange(total_frames, dtype=np.float64) / fps
+
+        speakers: List[str] = []
+        speaker_ids = np.full(total_frames, NO_SPEAKER, dtype=np.int16)
+        overlay_alpha = np.zeros(total_frames, dtype=np.uint8)
+
+        # Fill in reverse so earlier segments win where intervals overlap
+        half_transition = TRANSITION_TIME * 0.5
+        for segment in reversed(timeline):
+            lo, hi = _frame_range(times, segment['start_time'], segment['end_time'])
+            if lo >= hi:
+                continue
+            speaker = segment['speaker']
+            if speaker not in speakers:
+                speakers.append(speaker)
+            speaker_ids[lo:hi] = speakers.index(speaker)
+
+            # Smooth transitions: ramp in/out at the segment edges, never below the minimum
+            t = times[lo:hi]
+            fade_in = np.minimum(1.0, (t - segment['start_time']) / half_transition)
+            fade_out = np.minimum(1.0, (segment['end_time'] - t) / half_transition)
+            alpha = np.maximum(MIN_SEGMENT_ALPHA, np.minimum(fade_in, fade_out))
+            overlay_alpha[lo:hi] = np.round(alpha * 255).astype(np.uint8)
+
+        caption_ids = np.full(total_frames, NO_CAPTION, dtype=np.int32)
+        for caption_id in range(len(captions) - 1, -1, -1):
+            caption = captions[caption_id]
+            lo, hi = _frame_range(times, caption['start'], caption['end'])
+            caption_ids[lo:hi] = caption_id
+
+        logger.info(f"🗓️ Render schedule compiled: {total_frames} frames, {len(timeline)} segments, "
+                    f"{len(captions)} captions")
+        return cls(speakers, captions, speaker_ids, overlay_alpha, caption_ids, fps)
+
+
+def _frame_range(times: np.ndarray, start: float, end: float):
+    """Frames [lo, hi) whose timestamp lies within [start, end]"""
+    lo = int(np.searchsorted(times, start, side='left'))
+    hi = int(np.searchsorted(times, end, side='right'))
+    return lo, hi
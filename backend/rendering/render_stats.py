@@ -0,0 +1,137 @@
+"""
+Render Stage Timing for Video Generation
+Accumulates wall time per render stage (background fetch, compositing, encoder
+writes, ...) for one render, and folds per-frame timings of every render into
+process-wide histograms.
+"""
+
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+HISTOGRAM_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+# Per-frame stages of the frame loop, in loop order
+FRAME_STAGES = ('background', 'composite', 'encode_write')
+
+
+class RenderStats:
+    """
+    Stage timings of one render.
+
+    Per-frame stages are stored per frame (``record_frame``) so their
+    distribution survives; one-off stages (layer builds, muxing, ...) are
+    accumulated with ``add`` or the ``stage`` context manager.
+    """
+
+    def __init__(self, request_id: str = ""):
+        self.request_id = request_id
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._frame_times = {stage: [] for stage in FRAME_STAGES}
+        self._started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float, count: int = 1) -> None:
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + count
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def record_frame(self, background: float, composite: float, encode_write: float) -> None:
+        """Per-frame stage durations in seconds, in FRAME_STAGES order"""
+        self._frame_times['background'].append(background)
+        self._frame_times['composite'].append(composite)
+        self._frame_times['encode_write'].append(encode_write)
+
+    @property
+    def frames(self) -> int:
+        return len(self._frame_times['background'])
+
+    def frame_times(self, stage: str) -> np.ndarray:
+        return np.asarray(self._frame_times[stage], dtype=np.float64)
+
+    def merge(self, other: "RenderStats") -> None:
+        """Fold in the stats of a chunk rendered in another process"""
+        for stage, seconds in other.totals.items():
+            self.add(stage, seconds, other.counts[stage])
+        for stage in FRAME_STAGES:
+            self._frame_times[stage].extend(other._frame_times[stage])
+
+    def as_dict(self) -> Dict:
+        """JSON-ready summary: total seconds per stage, plus mean/p95/max ms for per-frame stages"""
+        stages = {stage: {'total_s': round(seconds, 4), 'count': self.counts[stage]}
+                  for stage, seconds in self.totals.items()}
+        for stage in FRAME_STAGES:
+            times = self.frame_times(stage)
+            if times.size == 0:
+                continue
+            stages[stage] = {
+                'total_s': round(float(times.sum()), 4),
+                'count': int(times.size),
+                'mean_ms': round(float(times.mean()) * 1000, 3),
+                'p95_ms': round(float(np.percentile(times, 95)) * 1000, 3),
+                'max_ms': round(float(times.max()) * 1000, 3),
+            }
+        return {
+            'frames': self.frames,
+            'wall_s': round(time.perf_counter() - self._started, 4),
+            'stages': stages,
+        }
+
+    def log_summary(self) -> None:
+        summary = self.as_dict()
+        stages = sorted(summary['stages'].items(), key=lambda item: -item[1]['total_s'])
+        logger.info(f"⏱️ [{self.request_id}] Render stages ({summary['frames']} frames, {summary['wall_s']:.2f}s wall): "
+                    + ", ".join(f"{stage}={data['total_s']:.2f}s" for stage, data in stages))
+
+
+class StageHistograms:
+    """Process-wide per-frame stage duration histograms, across all renders"""
+
+    def __init__(self, buckets_ms=HISTOGRAM_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._edges = np.asarray(self.buckets_ms, dtype=np.float64) / 1000
+        self._counts = {stage: np.zeros(len(self.buckets_ms) + 1, dtype=np.int64) for stage in FRAME_STAGES}
+        self._sums = {stage: 0.0 for stage in FRAME_STAGES}
+        self.renders = 0
+        self._lock = threading.Lock()
+
+    def observe(self, stats: RenderStats) -> None:
+        with self._lock:
+            for stage in FRAME_STAGES:
+                times = stats.frame_times(stage)
+                buckets = np.searchsorted(self._edges, times, side='left')
+                self._counts[stage] += np.bincount(buckets, minlength=len(self._counts[stage]))
+                self._sums[stage] += float(times.sum())
+            self.renders += 1
+
+    def as_dict(self) -> Dict:
+        """Cumulative ("le") bucket counts per stage, Prometheus style"""
+        with self._lock:
+            histograms = {}
+            for stage in FRAME_STAGES:
+                cumulative = np.cumsum(self._counts[stage]).tolist()
+                bounds = [str(bound) for bound in self.buckets_ms] + ['+Inf']
+                histograms[stage] = {
+                    'buckets_ms': dict(zip(bounds, cumulative)),
+                    'count': cumulative[-1],
+                    'sum_s': round(self._sums[stage], 4),
+                }
+            return {'renders': self.renders, 'stages': histograms}
+
+
+# Global instance
+stage_histograms = StageHistograms()
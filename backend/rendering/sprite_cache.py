@@ -0,0 +1,143 @@
+"""
+Speaker Sprite Cache for Video Generation
+Loads each overlay image once per (path, target height, mtime) and keeps it
+premultiplied, cropped to its non-transparent bounding box.
+"""
+
+import os
+import threading
+import logging
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from rendering.compositing import premultiply
+
+logger = logging.getLogger(__name__)
+
+
+class Sprite:
+    """
+    Overlay image ready for compositing.
+
+    ``premultiplied`` holds BGR already multiplied by alpha and ``alpha`` the
+    uint8 coverage, both cropped to the opaque bounding box. ``offset_x`` /
+    ``offset_y`` locate that box inside the full ``width`` x ``height`` image,
+    so callers keep positioning sprites by their original size.
+    """
+
+    def __init__(self, premultiplied: np.ndarray, alpha: np.ndarray, offset_x: int, offset_y: int,
+                 width: int, height: int):
+        self.premultiplied = premultiplied
+        self.alpha = alpha
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.width = width
+        self.height = height
+
+    @property
+    def nbytes(self) -> int:
+        return self.premultiplied.nbytes + self.alpha.nbytes
+
+    @classmethod
+    def from_bgra(cls, bgra: np.ndarray) -> "Sprite":
+        """Build a premultiplied, bbox-cropped sprite from a straight-alpha BGRA image"""
+        height, width = bgra.shape[:2]
+        alpha = bgra[:, :, 3]
+
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if rows.size == 0:
+            # Fully transparent image - keep a 1x1 empty sprite so callers need no special case
+            return cls(np.zeros((1, 1, 3), np.uint8), np.zeros((1, 1), np.uint8), 0, 0, width, height)
+
+        y0, y1 = rows[0], rows[-1] + 1
+        x0, x1 = cols[0], cols[-1] + 1
+        cropped_alpha = np.ascontiguousarray(alpha[y0:y1, x0:x1])
+        premultiplied = premultiply(bgra[y0:y1, x0:x1, :3], cropped_alpha)
+        return cls(premultiplied, cropped_alpha, int(x0), int(y0), width, height)
+
+    def to_bgra(self) -> np.ndarray:
+        """Straight-alpha BGRA of the opaque box (inverse of ``from_bgra`` up to rounding)"""
+        alpha = self.alpha.astype(np.uint16)[:, :, None]
+        straight = (self.premultiplied.astype(np.uint16) * 255 + alpha // 2) // np.maximum(alpha, 1)
+        return np.dstack([np.minimum(straight, 255).astype(np.uint8), self.alpha])
+
+    @classmethod
+    def from_bgr(cls, bgr: np.ndarray) -> "Sprite":
+        """Build a fully opaque sprite from a BGR image"""
+        height, width = bgr.shape[:2]
+        return cls(np.ascontiguousarray(bgr), np.full((height, width), 255, np.uint8), 0, 0, width, height)
+
+
+class SpriteCache:
+    """
+    Process-wide registry of speaker sprites.
+
+    Entries are keyed by (absolute path, target height, mtime), so an edited
+    asset is picked up on the next render without restarting the server.
+    """
+
+    def __init__(self):
+        self._sprites: Dict[Tuple[str, int, int], Sprite] = {}
+        self._lock = threading.Lock()
+
+    def get(self, image_path: str, target_height: int) -> Sprite:
+        """Return the sprite for ``image_path`` scaled to ``target_height``"""
+        abs_path = os.path.abspath(image_path)
+        try:
+            mtime = os.stat(abs_path).st_mtime_ns
+        except OSError:
+            mtime = 0
+        key = (abs_path, target_height, mtime)
+
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            return sprite
+
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is None:
+                # Drop stale entries for an asset that changed on disk
+                for stale in [k for k in self._sprites if k[0] == abs_path and k[1] == target_height]:
+                    del self._sprites[stale]
+                sprite = self._load(image_path, target_height)
+                self._sprites[key] = sprite
+        return sprite
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sprites.clear()
+
+    def _load(self, image_path: str, target_height: int) -> Sprite:
+        """Load and resize an image using PIL, converting it to a premultiplied sprite"""
+        try:
+            # Load with PIL first for better format support
+            pil_img = Image.open(image_path)
+            if pil_img.mode != 'RGBA':
+                pil_img = pil_img.convert('RGBA')
+
+            # Calculate proportional width based on target height
+            original_width, original_height = pil_img.size
+            aspect_ratio = original_width / original_height
+            target_size = (int(target_height * aspect_ratio), target_height)
+
+            pil_img = pil_img.resize(target_size, Image.Resampling.LANCZOS)
+            sprite = Sprite.from_bgra(cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGBA2BGRA))
+
+            logger.info(f"✅ Sprite loaded: {image_path} -> {target_size} "
+                        f"(opaque box {sprite.alpha.shape[1]}x{sprite.alpha.shape[0]}, {sprite.nbytes / 1024:.0f} KB)")
+            return sprite
+
+        except Exception as e:
+            logger.error(f"❌ Failed to load image {image_path}: {str(e)}")
+            # Create placeholder
+            placeholder = np.zeros((target_height, int(target_height * 0.75), 3), dtype=np.uint8)
+            placeholder[:] = (128, 128, 128)  # Gray
+            return Sprite.from_bgr(placeholder)
+
+
+# Global instance shared by every render in this process
+sprite_cache = SpriteCache()
@@ -0,0 +1,101 @@
+"""
+Test Audio Duration Probe
+Checks the in-process WAV/MP3 header probe returns exact durations
+"""
+
+import os
+import random
+import sys
+import shutil
+import struct
+import subprocess
+import tempfile
+import wave
+
+import pytest
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.audio_probe import probe_audio_duration_us
+from rendering.ffmpeg_writer import get_ffmpeg_path
+
+
+def _write_wav(path, frames, sample_rate=22050, channels=2):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b'\x00' * frames * channels * 2)
+
+
+def test_wav_duration_is_exact():
+    """PCM frames / sample rate, also when a streaming writer left the data size unset"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audio.wav")
+        _write_wav(path, 22050 * 3 + 11025)
+        assert probe_audio_duration_us(path) == 3_500_000
+
+        with open(path, 'r+b') as f:
+            f.seek(40)  # Size field of the data chunk written by the wave module
+            f.write(struct.pack('<I', 0xFFFFFFFF))
+        assert probe_audio_duration_us(path) == 3_500_000
+
+        print("✅ WAV durations exact")
+
+
+@pytest.mark.parametrize("encoder_args", [
+    ['-b:a', '128k'],                   # CBR with an Info tag and LAME gapless fields
+    ['-b:a', '128k', '-write_xing', '0'],  # No tag: every frame header is walked
+    ['-b:a', '128k', '-write_xing', '0', '-id3v2_version', '0'],  # No ID3 either: sync confirmed by a frame run
+    ['-q:a', '4', '-ar', '22050'],      # VBR, MPEG2 layer III
+])
+def test_mp3_duration_matches_decoded_length(encoder_args):
+    ffmpeg = get_ffmpeg_path()
+    if shutil.which(ffmpeg) is None:
+        pytest.skip("ffmpeg not available")
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path, mp3_path = os.path.join(tmp, "audio.wav"), os.path.join(tmp, "audio.mp3")
+        _write_wav(wav_path, 44100 * 2 + 4410, sample_rate=44100)
+        subprocess.run([ffmpeg, '-v', 'error', '-y', '-i', wav_path, '-c:a', 'libmp3lame', *encoder_args, mp3_path],
+                       check=True)
+
+        duration_us = probe_audio_duration_us(mp3_path)
+        print(f"🎵 MP3 {encoder_args}: {duration_us} µs")
+        if '-write_xing' in encoder_args:
+            # Without gapless info the encoder delay and padding are part of the stream
+            frame_us = 1152 * 1_000_000 // 44100
+            assert 2_100_000 <= duration_us <= 2_100_000 + 2 * frame_us
+        else:
+            assert duration_us == 2_100_000
+
+
+def test_unknown_format_is_rejected():
+    with tempfile.NamedTemporaryFile(suffix=".m4a") as f:
+        f.write(b'\x00\x00\x00\x20ftypM4A ' + b'\x00' * 64)
+        f.flush()
+        with pytest.raises(ValueError):
+            probe_audio_duration_us(f.name)
+
+
+def test_random_bytes_are_not_mistaken_for_mp3():
+    """Stray sync bytes must not produce a made-up duration (the caller falls back to ffprobe on ValueError)"""
+    rng = random.Random(19)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audio.mp3")
+        for _ in range(300):
+            with open(path, 'wb') as f:
+                f.write(rng.randbytes(rng.randint(64, 16 * 1024)))
+            with pytest.raises(ValueError):
+                probe_audio_duration_us(path)
+    print("✅ Random bytes rejected")
+
+
+if __name__ == "__main__":
+    test_wav_duration_is_exact()
+    test_unknown_format_is_rejected()
+    test_random_bytes_are_not_mistaken_for_mp3()
+    for args in (['-b:a', '128k'], ['-b:a', '128k', '-write_xing', '0'],
+                 ['-b:a', '128k', '-write_xing', '0', '-id3v2_version', '0'], ['-q:a', '4', '-ar', '22050']):
+        test_mp3_duration_matches_decoded_length(args)
+    print("✅ Audio probe tests finished")
@@ -0,0 +1,153 @@
+"""
+Test Sequential Background Source
+Verifies forward-only decoding, rate conversion and wrap-around at end-of-file
+"""
+
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.background_source import SequentialBackgroundSource
+from rendering.background_cache import BackgroundFrameCache
+
+
+def _write_numbered_clip(path, frame_count=20, fps=30, size=(64, 48)):
+    """Write a clip whose frame N is filled with grey level N * 10"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for i in range(frame_count):
+        frame = np.full((size[1], size[0], 3), i * 10, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def _level(frame):
+    """Recover the frame number encoded in a numbered clip frame"""
+    return int(round(float(frame.mean()) / 10))
+
+
+def test_sequential_source_rate_conversion_and_wrap():
+    """30fps source sampled at 15fps reads every other frame and loops at EOF"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_path = os.path.join(tmp, "numbered.avi")
+        _write_numbered_clip(clip_path)
+
+        source = SequentialBackgroundSource(cv2.VideoCapture(clip_path), 32, 24, 15)
+        levels = [_level(source.read(n)) for n in range(25)]
+        source.release()
+
+        expected = [(n * 2) % 20 for n in range(25)]
+        print(f"📊 Levels: {levels}")
+        assert levels == expected
+
+
+def test_sequential_source_upsamples_and_seeks():
+    """Output rate above the source rate repeats frames; seek positions a chunk start"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_path = os.path.join(tmp, "numbered.avi")
+        _write_numbered_clip(clip_path, fps=10)
+
+        source = SequentialBackgroundSource(cv2.VideoCapture(clip_path), 32, 24, 20)
+        first = source.read(0)
+        first[:] = 255  # Callers draw on frames in place; the next read must be unaffected
+        assert _level(source.read(1)) == 0
+        assert _level(source.read(2)) == 1
+
+        source.seek(30)
+        assert [_level(source.read(n)) for n in (30, 31, 32)] == [15, 15, 16]
+        source.release()
+
+
+def test_background_cache_maps_prescaled_frames():
+    """The cache decodes once into a .npy file that later renders memory-map"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_path = os.path.join(tmp, "numbered.avi")
+        _write_numbered_clip(clip_path)
+
+        cache = BackgroundFrameCache(cache_dir=os.path.join(tmp, "cache"))
+        source = cache.open_source(clip_path, 32, 24, 15)
+        assert source is not None
+        assert source.frame_count == 10
+        assert source.frame_view(3).shape == (24, 32, 3)
+        assert [_level(source.read(n)) for n in (0, 3, 12)] == [0, 6, 4]
+
+        cache_file = cache.cache_path(clip_path, 32, 24, 15)
+        built_inode = os.stat(cache_file).st_ino  # A rebuild would replace the file
+
+        # A second process-level cache reuses the file instead of decoding again
+        other = BackgroundFrameCache(cache_dir=os.path.join(tmp, "cache"))
+        frames = other.get_frames(clip_path, 32, 24, 15)
+        assert isinstance(frames, np.memmap)
+        assert os.stat(cache_file).st_ino == built_inode
+
+
+def test_background_cache_evicts_least_recently_used_files():
+    """Builds past the byte budget remove the oldest cache files, and no lock files are left"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_path = os.path.join(tmp, "numbered.avi")
+        _write_numbered_clip(clip_path)
+        cache_dir = os.path.join(tmp, "cache")
+
+        cache = BackgroundFrameCache(cache_dir=cache_dir, max_bytes=32 * 24 * 3 * 10 + 1024)
+        first = cache.cache_path(clip_path, 32, 24, 15)
+        cache.get_frames(clip_path, 32, 24, 15)
+        os.utime(first, (1, 1))  # Long unused
+
+        # A fresh process (nothing mapped) builds a second size; the first no longer fits
+        other = BackgroundFrameCache(cache_dir=cache_dir, max_bytes=cache.max_bytes)
+        other.get_frames(clip_path, 16, 12, 15)
+        assert not os.path.exists(first)
+        assert os.path.exists(other.cache_path(clip_path, 16, 12, 15))
+        assert not [name for name in os.listdir(cache_dir) if name.endswith('.lock')]
+
+
+def test_open_sources_pin_their_file_until_released():
+    """Only sources still open protect a file from eviction, and every hit refreshes its recency"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_path = os.path.join(tmp, "numbered.avi")
+        _write_numbered_clip(clip_path)
+
+        cache = BackgroundFrameCache(cache_dir=os.path.join(tmp, "cache"), max_bytes=0)
+        path = cache.cache_path(clip_path, 32, 24, 15)
+        first, second = cache.open_source(clip_path, 32, 24, 15), cache.open_source(clip_path, 32, 24, 15)
+
+        os.utime(path, (1, 1))
+        cache.get_frames(clip_path, 32, 24, 15)
+        assert os.path.getmtime(path) > 1  # A hit in the same process counts as a use
+
+        first.release()
+        cache.evict()
+        assert os.path.exists(path)  # Still read by the second source
+        second.release()
+        cache.evict()
+        assert not os.path.exists(path)
+
+
+def test_long_reels_over_long_backgrounds_bypass_the_cache():
+    """A reel longer than the cached seconds decodes directly, so the background loops at its real end"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_path = os.path.join(tmp, "numbered.avi")
+        _write_numbered_clip(clip_path)  # 20 frames @ 30fps = 10 frames @ 15fps
+
+        cache = BackgroundFrameCache(cache_dir=os.path.join(tmp, "cache"), max_seconds=0.4)  # 6 frames
+        assert cache.open_source(clip_path, 32, 24, 15, frames_needed=6) is not None
+        assert cache.open_source(clip_path, 32, 24, 15, frames_needed=12) is None
+
+        # Backgrounds shorter than the cap loop at their end in the cache too
+        roomy = BackgroundFrameCache(cache_dir=os.path.join(tmp, "roomy"), max_seconds=2)
+        assert roomy.open_source(clip_path, 32, 24, 15, frames_needed=60).frame_count == 10
+
+
+if __name__ == "__main__":
+    test_sequential_source_rate_conversion_and_wrap()
+    test_sequential_source_upsamples_and_seeks()
+    test_background_cache_maps_prescaled_frames()
+    test_background_cache_evicts_least_recently_used_files()
+    test_open_sources_pin_their_file_until_released()
+    test_long_reels_over_long_backgrounds_bypass_the_cache()
+    print("✅ Background source tests passed")
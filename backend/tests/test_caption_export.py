@@ -0,0 +1,74 @@
+"""
+Test Caption Export
+Checks the ASS/SRT/WebVTT output written next to a reel
+"""
+
+import os
+import sys
+import tempfile
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from captions.caption_export import caption_exporter, write_caption_sidecars
+
+CAPTIONS = [
+    {'text': 'Folks, this is huge', 'speaker': 'trump', 'start': 0.0, 'end': 1.25},
+    {'text': ' ', 'speaker': 'trump', 'start': 1.25, 'end': 1.5},
+    {'text': 'A hundred cars <for you>', 'speaker': 'mrbeast', 'start': 61.5, 'end': 3723.004},
+]
+
+
+def test_srt_and_vtt_cues():
+    """Empty chunks are dropped, timestamps use each format's separator"""
+    srt = caption_exporter.to_srt(CAPTIONS)
+    assert srt.startswith("1\n00:00:00,000 --> 00:00:01,250\nFolks, this is huge\n")
+    assert "2\n00:01:01,500 --> 01:02:03,004\nA hundred cars <for you>\n" in srt
+
+    vtt = caption_exporter.to_vtt(CAPTIONS)
+    assert vtt.startswith("WEBVTT\n")
+    assert "00:01:01.500 --> 01:02:03.004\n<v mrbeast>A hundred cars &lt;for you&gt;\n" in vtt
+
+
+def test_ass_uses_speaker_colors():
+    """Each speaker gets a style whose box colour is its caption background (BGR -> &HAABBGGRR)"""
+    ass = caption_exporter.to_ass(CAPTIONS, 480, 854)
+    renderer = caption_exporter.get_renderer(480, 854)
+    b, g, r = renderer.speaker_colors['trump']['background']
+
+    trump_style = next(line for line in ass.splitlines() if line.startswith("Style: trump,"))
+    assert f"&H33{b:02X}{g:02X}{r:02X}" in trump_style
+    dialogue = [line for line in ass.splitlines() if line.startswith("Dialogue:")]
+    assert len(dialogue) == 2
+    assert dialogue[0].startswith("Dialogue: 0,0:00:00.00,0:00:01.25,trump,")
+
+
+def test_ass_lines_follow_the_renderer_layout():
+    """Dialogue lines break where the burned-in caption does, below its first line's height"""
+    long_caption = {'text': 'This caption is long enough that it has to wrap over more than one line',
+                    'speaker': 'trump', 'start': 0.0, 'end': 2.0}
+    renderer = caption_exporter.get_renderer(480, 854)
+    lines, first_line_height = renderer.layout_caption(long_caption['text'])
+    assert len(lines) > 1 and first_line_height > 0
+    assert renderer.layout_caption(" ") == ([], 0)
+
+    dialogue = next(line for line in caption_exporter.to_ass([long_caption], 480, 854).splitlines()
+                    if line.startswith("Dialogue:"))
+    margin_v = renderer.caption_top_margin + renderer.background_padding + first_line_height
+    assert dialogue.endswith(f",{margin_v},," + "\\N".join(lines))
+
+
+def test_sidecars_are_written_next_to_the_reel():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_caption_sidecars(CAPTIONS, os.path.join(tmp, "reel.mp4"), 480, 854)
+        assert sorted(paths) == ['ass', 'srt', 'vtt']
+        for fmt, path in paths.items():
+            assert path == os.path.join(tmp, f"reel.{fmt}") and os.path.getsize(path) > 0
+
+
+if __name__ == "__main__":
+    test_srt_and_vtt_cues()
+    test_ass_uses_speaker_colors()
+    test_ass_lines_follow_the_renderer_layout()
+    test_sidecars_are_written_next_to_the_reel()
+    print("✅ Caption export tests passed")
@@ -46,6 +46,91 @@ def test_caption_rendering():
         cv2.imwrite(output_path, rendered_frame)
         print(f"✅ Saved test frame: {output_path}")
 
+def test_cached_caption_matches_direct_drawing():
+    """Blitting the cached caption bitmap matches drawing the caption on the frame"""
+    from captions.caption_renderer import CaptionRenderer
+
+    renderer = CaptionRenderer(480, 854)
+    frame = np.random.default_rng(3).integers(0, 256, (854, 480, 3), dtype=np.uint8)
+    text = "This is a very long caption that should wrap to multiple lines"
+
+    expected = renderer._draw_caption(frame.copy(), text, 'trump')
+    rendered = renderer.render_caption(frame.copy(), text, 'trump')
+    renderer.render_caption(frame.copy(), text, 'trump')
+
+    diff = np.abs(rendered.astype(np.int16) - expected.astype(np.int16))
+    print(f"📊 Max difference vs direct drawing: {diff.max()}")
+    assert diff.max() <= 2
+    assert renderer._bitmaps.builds == 1
+
+
+def test_wrap_uses_cached_fonts_and_matches_measured_wrap():
+    """Prefix-sum wrapping gives the same lines as measuring every candidate line"""
+    from captions.caption_renderer import CaptionRenderer
+
+    renderer = CaptionRenderer(480, 854)
+    max_width = renderer.caption_max_width - 2 * renderer.background_padding
+    text = "AVAVA Wow! This is a very long caption that should wrap to multiple lines, WAY beyond the box width."
+
+    expected, current = [], ""
+    for word in text.split():
+        candidate = current + (" " if current else "") + word
+        if renderer._get_text_size(candidate)[0] <= max_width:
+            current = candidate
+        else:
+            expected.append(current)
+            current = word
+    expected.append(current)
+
+    assert renderer._wrap_text(text, max_width) == expected
+    assert renderer._get_font() is renderer._get_font()
+    assert len(renderer._fonts) == 1
+
+
+def test_shared_renderer_is_safe_across_threads():
+    """Captions rasterized concurrently on one renderer match those drawn one at a time"""
+    from concurrent.futures import ThreadPoolExecutor
+    from captions.caption_renderer import CaptionRenderer
+
+    captions = [f"Caption number {i} with a few words that wrap across lines, again and again" for i in range(24)]
+
+    def render(renderer, text):
+        return renderer.render_caption(np.zeros((854, 480, 3), dtype=np.uint8), text, 'trump')
+
+    serial = CaptionRenderer(480, 854)
+    expected = [render(serial, text) for text in captions]
+
+    shared = CaptionRenderer(480, 854)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        rendered = list(pool.map(lambda text: render(shared, text), captions))
+
+    assert all(np.array_equal(a, b) for a, b in zip(rendered, expected))
+    assert shared._bitmaps.builds == len(captions)
+
+
+def test_rounded_box_matches_full_frame_blend():
+    """ROI-only rounded box equals the full-frame copy + addWeighted version"""
+    from captions.caption_renderer import CaptionRenderer
+
+    renderer = CaptionRenderer(480, 854)
+    radius = renderer.corner_radius
+    color = (50, 50, 200)
+
+    for (x1, y1), (x2, y2) in [((20, 88), (460, 200)), ((5, 800), (470, 853))]:
+        frame = np.random.default_rng(x1).integers(0, 256, (854, 480, 3), dtype=np.uint8)
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (x1 + radius, y1), (x2 - radius, y2), color, -1)
+        cv2.rectangle(overlay, (x1, y1 + radius), (x2, y2 - radius), color, -1)
+        for center in [(x1 + radius, y1 + radius), (x2 - radius, y1 + radius),
+                       (x1 + radius, y2 - radius), (x2 - radius, y2 - radius)]:
+            cv2.circle(overlay, center, radius, color, -1)
+        expected = cv2.addWeighted(overlay, 0.8, frame, 0.2, 0)
+
+        renderer._draw_rounded_rectangle(frame, (x1, y1), (x2, y2), color, 0.8)
+        assert (frame == expected).all()
+    assert len(renderer._rounded_masks) == 2
+
+
 def test_full_video_with_captions():
     """Test creating a full video with captions"""
     print("🎬 Testing Full Video Generation with Captions...")
@@ -104,6 +189,10 @@ if __name__ == "__main__":
     
     # Test 1: Caption rendering on individual frames
     test_caption_rendering()
+    test_cached_caption_matches_direct_drawing()
+    test_wrap_uses_cached_fonts_and_matches_measured_wrap()
+    test_shared_renderer_is_safe_across_threads()
+    test_rounded_box_matches_full_frame_blend()
     
     # Test 2: Full video generation with captions
     test_full_video_with_captions()
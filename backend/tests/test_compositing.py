@@ -0,0 +1,125 @@
+"""
+Test Compositing Kernels and Speaker Sprites
+Checks the fixed-point premultiplied blend against a float reference
+"""
+
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.compositing import BlendScratch, blend_premultiplied, premultiply
+from rendering.sprite_cache import Sprite
+from rendering.foreground_layer import ForegroundLayer, ForegroundLayerCache
+
+
+def _random_layer(rng, h, w):
+    bgr = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    alpha = rng.integers(0, 256, (h, w), dtype=np.uint8)
+    return bgr, alpha
+
+
+def test_fixed_point_blend_matches_float_reference():
+    """uint16 kernel stays within one level of the float straight-alpha blend"""
+    rng = np.random.default_rng(1)
+    bgr, alpha = _random_layer(rng, 40, 30)
+    frame = rng.integers(0, 256, (60, 50, 3), dtype=np.uint8)
+
+    a = alpha[:, :, None] / 255.0
+    expected = frame.astype(np.float64)
+    expected[10:50, 5:35] = bgr * a + expected[10:50, 5:35] * (1 - a)
+
+    blend_premultiplied(frame, premultiply(bgr, alpha), alpha, 5, 10)
+    diff = np.abs(frame.astype(np.int16) - np.round(expected).astype(np.int16))
+    print(f"📊 Max difference vs float reference: {diff.max()}")
+    assert diff.max() <= 1
+
+
+def test_blend_clips_and_applies_opacity():
+    """Layers hanging off the frame are clipped; opacity 0 leaves the frame untouched"""
+    frame = np.full((20, 20, 3), 100, dtype=np.uint8)
+    premultiplied = np.full((10, 10, 3), 200, dtype=np.uint8)
+    alpha = np.full((10, 10), 255, dtype=np.uint8)
+
+    blend_premultiplied(frame, premultiplied, alpha, 15, -5, opacity=0)
+    assert (frame == 100).all()
+
+    blend_premultiplied(frame, premultiplied, alpha, 15, -5)
+    assert (frame[0:5, 15:20] == 200).all()
+    assert (frame[5:, :] == 100).all() and (frame[:, :15] == 100).all()
+
+    blend_premultiplied(frame, premultiplied, alpha, 0, 10, opacity=128)
+    assert abs(int(frame[15, 5, 0]) - 150) <= 1
+
+
+def test_scratch_blend_is_identical_and_allocation_free():
+    """Reused work buffers give the same pixels without per-call frame-sized temporaries"""
+    rng = np.random.default_rng(2)
+    bgr, alpha = _random_layer(rng, 300, 200)
+    premultiplied = premultiply(bgr, alpha)
+    frame = rng.integers(0, 256, (400, 300, 3), dtype=np.uint8)
+    expected = frame.copy()
+    blend_premultiplied(expected, premultiplied, alpha, 50, -20)
+
+    scratch = BlendScratch(400, 300)
+    blend_premultiplied(frame, premultiplied, alpha, 50, -20, scratch=scratch)
+    assert (frame == expected).all()
+
+    tracemalloc.start()
+    blend_premultiplied(frame, premultiplied, alpha, 50, -20, scratch=scratch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"📊 Peak allocation during a scratch blend: {peak} bytes")
+    assert peak < premultiplied.nbytes // 2  # Only ufunc cast buffers, never a layer-sized array
+
+
+def test_sprite_is_cropped_to_opaque_box():
+    """Sprites keep only their non-transparent bounding box plus its offset"""
+    bgra = np.zeros((50, 40, 4), dtype=np.uint8)
+    bgra[10:30, 5:25] = (0, 0, 255, 255)
+    sprite = Sprite.from_bgra(bgra)
+
+    assert (sprite.width, sprite.height) == (40, 50)
+    assert (sprite.offset_x, sprite.offset_y) == (5, 10)
+    assert sprite.alpha.shape == (20, 20)
+    assert (sprite.premultiplied[:, :, 2] == 255).all()
+
+
+def test_foreground_matte_reproduces_direct_drawing():
+    """A layer recovered from black/white drawings blends like drawing on the frame directly"""
+    rng = np.random.default_rng(2)
+    sprite_bgr, sprite_alpha = _random_layer(rng, 20, 15)
+    premultiplied = premultiply(sprite_bgr, sprite_alpha)
+
+    def draw(frame):
+        blend_premultiplied(frame, premultiplied, sprite_alpha, 30, 60, opacity=200)
+        frame[5:15, 10:40] = (frame[5:15, 10:40] * 0.2 + np.array([200, 50, 50]) * 0.8).astype(np.uint8)
+        return frame
+
+    layer = ForegroundLayer.from_matte(draw(np.zeros((100, 60, 3), np.uint8)),
+                                       draw(np.full((100, 60, 3), 255, np.uint8)))
+    assert len(layer.tiles) == 2  # Caption box and sprite are far apart
+
+    background = rng.integers(0, 256, (100, 60, 3), dtype=np.uint8)
+    expected = draw(background.copy())
+    layer.blend_onto(background)
+    diff = np.abs(background.astype(np.int16) - expected.astype(np.int16))
+    print(f"📊 Max difference vs direct drawing: {diff.max()}")
+    assert diff.max() <= 2
+
+    cache = ForegroundLayerCache(lambda state: layer)
+    cache.get('a'), cache.get('a'), cache.get('b')
+    assert cache.builds == 2
+
+
+if __name__ == "__main__":
+    test_fixed_point_blend_matches_float_reference()
+    test_blend_clips_and_applies_opacity()
+    test_scratch_blend_is_identical_and_allocation_free()
+    test_sprite_is_cropped_to_opaque_box()
+    test_foreground_matte_reproduces_direct_drawing()
+    print("✅ Compositing tests passed")
@@ -0,0 +1,92 @@
+"""
+Test FFmpeg Pipe Writer
+Checks the piped encoder finishes cleanly at the end of a short audio track,
+cleans up after abort() and reports ffmpeg's stderr when encoding fails
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import wave
+
+import numpy as np
+import pytest
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.ffmpeg_writer import FFmpegPipeWriter, get_ffmpeg_path
+
+WIDTH, HEIGHT, FPS = 128, 128, 10
+
+
+def _require_ffmpeg():
+    if shutil.which(get_ffmpeg_path()) is None:
+        pytest.skip("ffmpeg not available")
+
+
+def _write_wav(path, seconds, sample_rate=22050):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b'\x00' * int(seconds * sample_rate) * 2)
+
+
+def _frame(frame_num):
+    return np.full((HEIGHT, WIDTH, 3), frame_num % 256, dtype=np.uint8)
+
+
+def test_audio_shorter_than_video_finishes_cleanly():
+    _require_ffmpeg()
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path, output_path = os.path.join(tmp, "audio.wav"), os.path.join(tmp, "reel.mp4")
+        _write_wav(audio_path, 0.5)
+
+        # 60 s of frames against 0.5 s of audio: -shortest stops ffmpeg long before the last write
+        writer = FFmpegPipeWriter(output_path, WIDTH, HEIGHT, FPS, audio_path=audio_path)
+        for frame_num in range(60 * FPS):
+            writer.write(_frame(frame_num))
+        writer.close()
+
+        assert writer.encoder_finished
+        assert writer.frames_written < 60 * FPS
+        assert os.path.getsize(output_path) > 0
+    print("✅ Short audio ends the encode without an error")
+
+
+def test_abort_kills_ffmpeg_and_removes_the_output():
+    _require_ffmpeg()
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "reel.mp4")
+        writer = FFmpegPipeWriter(output_path, WIDTH, HEIGHT, FPS)
+        for frame_num in range(20):
+            writer.write(_frame(frame_num))
+        writer.abort()
+
+        assert writer.process.poll() is not None
+        assert not os.path.exists(output_path)
+    print("✅ abort() stops ffmpeg and deletes the partial file")
+
+
+def test_encoder_error_raises_with_stderr():
+    _require_ffmpeg()
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = FFmpegPipeWriter(os.path.join(tmp, "reel.mp4"), WIDTH, HEIGHT, FPS, preset='no-such-preset')
+        try:
+            with pytest.raises(RuntimeError, match="FFmpeg failed") as error:
+                for frame_num in range(5 * FPS):
+                    writer.write(_frame(frame_num))
+                writer.close()
+            assert "preset" in str(error.value).lower()
+        finally:
+            writer.abort()
+    print("✅ Encoder failures raise RuntimeError carrying ffmpeg's stderr")
+
+
+if __name__ == "__main__":
+    test_audio_shorter_than_video_finishes_cleanly()
+    test_abort_kills_ffmpeg_and_removes_the_output()
+    test_encoder_error_raises_with_stderr()
+    print("✅ FFmpeg writer tests finished")
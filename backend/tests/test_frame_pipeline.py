@@ -0,0 +1,106 @@
+"""
+Test Frame Pipeline
+Checks the threaded decode/compose/encode pipeline keeps frame order, records
+per-frame timings and surfaces stage failures
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.frame_pipeline import FramePipeline, pipeline_pool_size
+from rendering.frame_pool import FramePool
+from rendering.render_stats import RenderStats
+
+
+def _decode(frame_num):
+    return np.full((4, 4, 3), frame_num % 256, dtype=np.uint8)
+
+
+def _compose(frame_num, frame):
+    frame += 1
+    return frame
+
+
+def test_frames_reach_the_encoder_in_order():
+    written = []
+    stats = RenderStats()
+    FramePipeline(_decode, _compose, lambda frame: written.append(int(frame[0, 0, 0])),
+                  queue_frames=2, stats=stats).run(range(100))
+
+    assert written == [(i % 256) + 1 for i in range(100)]
+    assert stats.frames == 100
+    print("✅ Pipeline keeps frame order")
+
+
+def test_pooled_frames_are_recycled():
+    """With a pool every frame is one of the preallocated buffers, and all of them come back"""
+    pool = FramePool((4, 4, 3), pipeline_pool_size(2))
+    buffers = set()
+    written = []
+
+    def decode(frame_num, out):
+        buffers.add(out.ctypes.data)
+        out[:] = frame_num % 256
+        return out
+
+    FramePipeline(decode, _compose, lambda frame: written.append(int(frame[0, 0, 0])),
+                  queue_frames=2, frame_pool=pool).run(range(100))
+
+    assert written == [(i % 256) + 1 for i in range(100)]
+    assert len(buffers) <= pool.count and pool.free == pool.count
+
+
+@pytest.mark.parametrize("failing_stage", ["decode", "compose", "encode"])
+def test_stage_failure_stops_the_pipeline(failing_stage):
+    def fail_at_50(stage, fn):
+        def wrapped(*args):
+            if stage == failing_stage and wrapped.calls == 50:
+                raise RuntimeError(f"{stage} failed")
+            wrapped.calls += 1
+            return fn(*args)
+        wrapped.calls = 0
+        return wrapped
+
+    threads_before = threading.active_count()
+    pipeline = FramePipeline(fail_at_50("decode", _decode), fail_at_50("compose", _compose),
+                             fail_at_50("encode", lambda frame: None), queue_frames=2)
+    with pytest.raises(RuntimeError, match=f"{failing_stage} failed"):
+        pipeline.run(range(1000))
+    assert threading.active_count() == threads_before
+
+
+def test_decode_failure_is_not_masked_by_a_later_stage_failure():
+    # The decoder fails while the compose stage still holds frame 0; the encoder then
+    # fails on that frame, stopping the pipeline while the decoder closes its queue
+    def decode(frame_num):
+        if frame_num == 2:
+            raise ValueError("decode failed")
+        return _decode(frame_num)
+
+    def slow_compose(frame_num, frame):
+        time.sleep(0.3)
+        return _compose(frame_num, frame)
+
+    def encode(frame):
+        raise RuntimeError("encode failed")
+
+    pipeline = FramePipeline(decode, slow_compose, encode, queue_frames=1)
+    with pytest.raises(ValueError, match="decode failed"):
+        pipeline.run(range(10))
+
+
+if __name__ == "__main__":
+    test_frames_reach_the_encoder_in_order()
+    test_pooled_frames_are_recycled()
+    for stage in ("decode", "compose", "encode"):
+        test_stage_failure_stops_the_pipeline(stage)
+    test_decode_failure_is_not_masked_by_a_later_stage_failure()
+    print("✅ Frame pipeline tests finished")
@@ -0,0 +1,54 @@
+"""
+Test Aspect Ratio Layouts
+Checks the other aspect ratios of a reel are framed from a background decoded
+large enough that no crop is upscaled
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.layouts import AspectLayout, background_canvas
+from rendering.render_profiles import get_render_profile
+
+
+def test_canvas_covers_every_framing():
+    profile = get_render_profile('standard')  # 480x854
+    square, wide = AspectLayout.for_profile(profile, '1:1'), AspectLayout.for_profile(profile, '16:9')
+
+    assert background_canvas(profile.width, profile.height, [square]) == (480, 854)  # Crops fit as they are
+    canvas = background_canvas(profile.width, profile.height, [square, wide])
+    assert canvas == (854, 1520)
+
+    for layout in (square, wide, AspectLayout.for_frame(profile.width, profile.height)):
+        _, _, crop_w, crop_h = layout.on_canvas(*canvas).crop
+        assert crop_w >= layout.width and crop_h >= layout.height
+    print("✅ Background canvas covers every framing")
+
+
+def test_wide_framing_is_a_plain_crop_of_the_canvas():
+    """The 16:9 background is the canvas' centre band pixel for pixel, not an upscaled band"""
+    profile = get_render_profile('standard')
+    wide = AspectLayout.for_profile(profile, '16:9')
+    canvas_width, canvas_height = background_canvas(profile.width, profile.height, [wide])
+    background = np.random.default_rng(24).integers(0, 256, (canvas_height, canvas_width, 3), dtype=np.uint8)
+
+    framed = wide.on_canvas(canvas_width, canvas_height).frame_background(background)
+    top = (canvas_height - wide.height) // 2
+    assert framed.shape == (480, 854, 3)
+    assert np.array_equal(framed, background[top:top + wide.height])
+
+    # The 9:16 reel itself is scaled down from the canvas
+    main = AspectLayout.for_frame(profile.width, profile.height).on_canvas(canvas_width, canvas_height)
+    assert main.frame_background(background).shape == (854, 480, 3)
+    print("✅ 16:9 framing crops the canvas without resampling")
+
+
+if __name__ == "__main__":
+    test_canvas_covers_every_framing()
+    test_wide_framing_is_a_plain_crop_of_the_canvas()
+    print("✅ Layout tests finished")
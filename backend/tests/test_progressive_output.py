@@ -0,0 +1,58 @@
+"""
+Test Progressive Output
+Streams a file while it is still being written and checks nothing is lost
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.progressive_output import ProgressiveOutputRegistry
+
+
+def test_reader_follows_growing_file_until_finished():
+    registry = ProgressiveOutputRegistry()
+    with tempfile.TemporaryDirectory() as tmp:
+        output = registry.create(os.path.join(tmp, "reel.mp4"))
+        fragments = [bytes([i]) * 100_000 for i in range(5)]
+
+        def encode():
+            with open(output.path, 'wb') as f:
+                for fragment in fragments:
+                    f.write(fragment)
+                    f.flush()
+                    time.sleep(0.05)
+            output.finish({'video_url': '/download/reel.mp4'})
+
+        writer = threading.Thread(target=encode)
+        writer.start()
+        streamed = b"".join(output.iter_bytes())
+        writer.join()
+
+        assert streamed == b"".join(fragments)
+        assert registry.get(output.stream_id).status == 'done'
+        assert output.result['video_url'] == '/download/reel.mp4'
+
+
+def test_failed_render_ends_the_stream():
+    registry = ProgressiveOutputRegistry(max_streams=1)
+    output = registry.create("/nonexistent/reel.mp4")
+    output.fail("ffmpeg exploded")
+    assert list(output.iter_bytes()) == []
+    assert output.status == 'failed'
+
+    # Finished streams are forgotten once the registry is full
+    newer = registry.create("/nonexistent/other.mp4")
+    assert registry.get(output.stream_id) is None
+    assert registry.get(newer.stream_id) is newer
+
+
+if __name__ == "__main__":
+    test_reader_follows_growing_file_until_finished()
+    test_failed_render_ends_the_stream()
+    print("✅ Progressive output tests passed")
@@ -0,0 +1,379 @@
+"""
+Test Render Backends
+Renders the same reel with the OpenCV frame loop and the FFmpeg filtergraph
+backend and checks the outputs match
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+
+import cv2
+import numpy as np
+import pytest
+
+# Add parent directory to Python path so we can import from backend/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from rendering.ffmpeg_writer import get_ffmpeg_path
+
+SCRIPT = ("**Trump:** Folks, this is huge, really huge, the best reel ever made.\n\n"
+          "**MrBeast:** I am giving away one hundred cars to everyone watching this.")
+
+
+def _write_background(path, frame_count=60, fps=30, size=(360, 640)):
+    """Moving gradient so frame selection and scaling differences show up"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    ramp = np.linspace(0, 255, size[0], dtype=np.float32)
+    for i in range(frame_count):
+        frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        frame[:, :, 0] = ramp
+        frame[:, :, 1] = (ramp + i * 4) % 256
+        frame[:, :, 2] = 120
+        writer.write(frame)
+    writer.release()
+
+
+def _read_frames(path):
+    capture = cv2.VideoCapture(path)
+    frames = []
+    ok, frame = capture.read()
+    while ok:
+        frames.append(frame.astype(np.int16))
+        ok, frame = capture.read()
+    capture.release()
+    return frames
+
+
+def _container_duration(path):
+    """Duration in seconds as reported by ffmpeg for a media file"""
+    result = subprocess.run([get_ffmpeg_path(), '-i', path], capture_output=True, text=True)
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):([\d.]+)", result.stderr).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _render_both(tmp, enable_captions):
+    from opencv_video_generator import video_generator
+    from ffmpeg_video_generator import ffmpeg_video_generator
+
+    background_path = os.path.join(tmp, "background.mp4")
+    _write_background(background_path)
+    outputs = []
+    for name, generator in (("opencv", video_generator), ("ffmpeg", ffmpeg_video_generator)):
+        output_path = os.path.join(tmp, f"{name}.mp4")
+        generator.create_video_with_overlays_and_captions(
+            script_text=SCRIPT, audio_path=None, background_video_path=background_path,
+            output_path=output_path, speaker_pair="trump_mrbeast", enable_captions=enable_captions)
+        outputs.append(_read_frames(output_path))
+    return outputs
+
+
+@pytest.fixture
+def backend_cwd():
+    if shutil.which(get_ffmpeg_path()) is None:
+        pytest.skip("ffmpeg not available")
+    from rendering.background_cache import background_cache
+    from rendering.render_cache import render_cache
+    original_cwd, original_cache_dir = os.getcwd(), render_cache.cache_dir
+    original_background_dir = background_cache.cache_dir
+    os.chdir(BACKEND_DIR)  # Speaker assets are resolved relative to backend/
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            render_cache.cache_dir = os.path.join(tmp, "render_cache")  # No hits from earlier tests
+            background_cache.cache_dir = os.path.join(tmp, "backgrounds")  # Pre-scaled frames stay out of the tree
+            yield tmp
+    finally:
+        render_cache.cache_dir = original_cache_dir
+        background_cache.cache_dir = original_background_dir
+        os.chdir(original_cwd)
+
+
+def test_ffmpeg_backend_matches_opencv_backend(backend_cwd):
+    """Same frame count and near-identical pixels for background + speaker overlays"""
+    opencv_frames, ffmpeg_frames = _render_both(backend_cwd, enable_captions=False)
+
+    assert len(opencv_frames) == len(ffmpeg_frames) > 0
+    diffs = [np.abs(a - b).mean() for a, b in zip(opencv_frames, ffmpeg_frames)]
+    print(f"📊 Mean abs difference per frame: max {max(diffs):.2f}, avg {np.mean(diffs):.2f}")
+    assert max(diffs) < 6
+
+
+def test_ffmpeg_backend_burns_in_captions(backend_cwd):
+    """ASS captions land in the caption band; everything below it still matches"""
+    opencv_frames, ffmpeg_frames = _render_both(backend_cwd, enable_captions=True)
+
+    assert len(opencv_frames) == len(ffmpeg_frames) > 0
+    height = opencv_frames[0].shape[0]
+    below = [np.abs(a[height // 3:] - b[height // 3:]).mean() for a, b in zip(opencv_frames, ffmpeg_frames)]
+    band = [np.abs(a[:height // 3] - b[:height // 3]).mean() for a, b in zip(opencv_frames, ffmpeg_frames)]
+    print(f"📊 Below captions: max {max(below):.2f}; caption band: avg {np.mean(band):.2f}")
+    assert max(below) < 6
+    assert np.mean(band) < 25
+
+
+@pytest.mark.parametrize("render_backend", ["opencv", "ffmpeg"])
+def test_renditions_come_from_one_render_pass(backend_cwd, render_backend):
+    """A preview rendition is written next to the standard reel, scaled and at its own frame rate"""
+    from opencv_video_generator import get_video_generator
+    from rendering.render_profiles import RENDER_PROFILES
+
+    background_path = os.path.join(backend_cwd, "background.mp4")
+    _write_background(background_path)
+    output_path = os.path.join(backend_cwd, "reel.mp4")
+    generator = get_video_generator(render_backend, "standard")
+    generator.create_video_with_overlays_and_captions(
+        script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+        speaker_pair="trump_mrbeast", enable_captions=True, renditions=["preview"])
+
+    standard, preview = RENDER_PROFILES['standard'], RENDER_PROFILES['preview']
+    reel_frames = _read_frames(output_path)
+    preview_frames = _read_frames(os.path.join(backend_cwd, "reel_preview.mp4"))
+    assert reel_frames[0].shape == (standard.height, standard.width, 3)
+    assert preview_frames[0].shape == (preview.height, preview.width, 3)
+    assert abs(len(preview_frames) - len(reel_frames) * preview.fps / standard.fps) <= 1
+
+    with pytest.raises(Exception, match="larger than render profile"):
+        generator.create_video_with_overlays_and_captions(
+            script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+            speaker_pair="trump_mrbeast", renditions=["hd"])
+
+
+def test_preview_stage_runs_before_the_full_render(backend_cwd):
+    """on_preview gets a poster and a low-fps animated preview while the reel does not exist yet"""
+    from opencv_video_generator import video_generator, PREVIEW_FPS, PREVIEW_HEIGHT
+
+    background_path = os.path.join(backend_cwd, "background.mp4")
+    _write_background(background_path)
+    output_path = os.path.join(backend_cwd, "reel.mp4")
+    previews = []
+
+    def on_preview(paths):
+        assert not os.path.exists(output_path)
+        previews.append(paths)
+
+    video_generator.create_video_with_overlays_and_captions(
+        script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+        speaker_pair="trump_mrbeast", enable_captions=True, on_preview=on_preview)
+
+    assert len(previews) == 1
+    reel_frames = _read_frames(output_path)
+    poster = cv2.imread(previews[0]['poster'])
+    preview_frames = _read_frames(previews[0]['preview'])
+    assert poster.shape == reel_frames[0].shape
+    assert preview_frames[0].shape[0] == PREVIEW_HEIGHT
+    assert len(preview_frames) == -(-len(reel_frames) * PREVIEW_FPS // video_generator.fps)
+
+
+def test_identical_reel_is_served_from_render_cache(backend_cwd):
+    """The second identical request renders no frames and gets the same reel and sidecars"""
+    from opencv_video_generator import video_generator
+    from rendering.render_stats import RenderStats
+
+    background_path = os.path.join(backend_cwd, "background.mp4")
+    _write_background(background_path)
+    outputs = []
+    previews = []
+    for name in ("first", "second"):
+        output_path = os.path.join(backend_cwd, f"{name}.mp4")
+        stats = RenderStats()
+        video_generator.create_video_with_overlays_and_captions(
+            script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+            speaker_pair="trump_mrbeast", enable_captions=True, render_stats=stats, on_preview=previews.append)
+        outputs.append((output_path, stats.frames))
+
+    (first, first_frames), (second, second_frames) = outputs
+    assert first_frames > 0 and second_frames == 0
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+    assert os.path.exists(os.path.join(backend_cwd, "second.srt"))
+    # Streaming callers still get a poster and preview for the cached reel
+    assert len(previews) == 2
+    assert os.path.exists(previews[1]['poster']) and os.path.exists(previews[1]['preview'])
+
+
+def test_render_cache_key_covers_timeline_speakers_and_background_loop(backend_cwd):
+    """Sprites of speakers only named in timing_data, and the background cache length, change the key"""
+    from opencv_video_generator import video_generator, SPEAKER_ASSETS
+    from rendering.background_cache import background_cache
+
+    background_path = os.path.join(backend_cwd, "background.mp4")
+    _write_background(background_path)
+    timing_data = [{'speaker': 'elon', 'text': "Guest appearance.", 'timing_data': None}]  # Not in the pair
+
+    def key():
+        return video_generator.render_cache_key("**Elon:** Guest appearance.", None, background_path,
+                                                "trump_mrbeast", timing_data, False, True, [], False)
+
+    original_sprite, original_seconds = SPEAKER_ASSETS['elon']['path'], background_cache.max_seconds
+    try:
+        base = key()
+        SPEAKER_ASSETS['elon']['path'] = SPEAKER_ASSETS['samay']['path']  # A different sprite image
+        assert key() != base
+        SPEAKER_ASSETS['elon']['path'] = original_sprite
+        background_cache.max_seconds = original_seconds + 30
+        assert key() != base
+    finally:
+        SPEAKER_ASSETS['elon']['path'] = original_sprite
+        background_cache.max_seconds = original_seconds
+    assert key() == base
+
+
+def test_batch_reels_match_single_renders(backend_cwd):
+    """A batch opens the background once and each reel equals its own single render"""
+    from opencv_video_generator import video_generator
+    from rendering.render_cache import render_cache
+    from rendering.render_stats import RenderStats
+
+    cache_enabled, render_cache.enabled = render_cache.enabled, False  # Render the single reels too
+    try:
+        background_path = os.path.join(backend_cwd, "background.mp4")
+        _write_background(background_path)
+        short_script = "**Trump:** Folks, a short one."
+        jobs = [(SCRIPT, None, None, "trump_mrbeast", os.path.join(backend_cwd, "batch_long.mp4")),
+                {'script_text': short_script, 'speaker_pair': "trump_mrbeast",
+                 'output_path': os.path.join(backend_cwd, "batch_short.mp4")}]
+        stats = RenderStats()
+        outputs = video_generator.create_videos_batch(jobs, background_video_path=background_path,
+                                                      enable_captions=True, render_stats=stats)
+        assert stats.counts['background_open'] == 1
+
+        for output_path, script in zip(outputs, (SCRIPT, short_script)):
+            single_path = output_path.replace("batch_", "single_")
+            video_generator.create_video_with_overlays_and_captions(
+                script_text=script, audio_path=None, background_video_path=background_path,
+                output_path=single_path, speaker_pair="trump_mrbeast", enable_captions=True)
+            batch_frames, single_frames = _read_frames(output_path), _read_frames(single_path)
+            assert len(batch_frames) == len(single_frames) > 0
+            assert max(np.abs(a - b).max() for a, b in zip(batch_frames, single_frames)) == 0
+        assert len(_read_frames(outputs[1])) < len(_read_frames(outputs[0]))
+        assert os.path.exists(os.path.join(backend_cwd, "batch_short.srt"))
+    finally:
+        render_cache.enabled = cache_enabled
+
+
+def test_aspect_ratios_come_from_one_background_pass(backend_cwd):
+    """1:1 and 16:9 reels are written next to the 9:16 reel from one background decode"""
+    from opencv_video_generator import get_video_generator
+    from rendering.render_cache import render_cache
+    from rendering.render_stats import RenderStats
+
+    cache_enabled, render_cache.enabled = render_cache.enabled, False
+    try:
+        background_path = os.path.join(backend_cwd, "background.mp4")
+        _write_background(background_path)
+        generator = get_video_generator('ffmpeg', "standard")  # Falls back to the shared OpenCV pass
+        stats = RenderStats()
+        output_path = os.path.join(backend_cwd, "reel.mp4")
+        generator.create_video_with_overlays_and_captions(
+            script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+            speaker_pair="trump_mrbeast", enable_captions=True, render_stats=stats, aspects=["1:1", "16:9", "9:16"])
+        assert stats.counts['background_open'] == 1
+
+        reel_frames = _read_frames(output_path)
+        square_frames = _read_frames(os.path.join(backend_cwd, "reel_1x1.mp4"))
+        wide_frames = _read_frames(os.path.join(backend_cwd, "reel_16x9.mp4"))
+        assert not os.path.exists(os.path.join(backend_cwd, "reel_9x16.mp4"))
+        assert square_frames[0].shape == (480, 480, 3)
+        assert wide_frames[0].shape == (480, 854, 3)
+        assert len(reel_frames) == len(square_frames) == len(wide_frames)
+
+        # The 9:16 reel matches one rendered on its own; with 16:9 in the pass its background is
+        # scaled down from the larger shared decode instead of straight from the source
+        plain_path = os.path.join(backend_cwd, "plain.mp4")
+        get_video_generator('opencv', "standard").create_video_with_overlays_and_captions(
+            script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=plain_path,
+            speaker_pair="trump_mrbeast", enable_captions=True)
+        main_diff = np.mean([np.abs(a - b).mean() for a, b in zip(reel_frames, _read_frames(plain_path))])
+        print(f"📊 9:16 reel vs a plain render: mean abs difference {main_diff:.2f}")
+        assert main_diff < 2
+
+        with pytest.raises(Exception, match="Unknown aspect ratio"):
+            generator.create_video_with_overlays_and_captions(
+                script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+                speaker_pair="trump_mrbeast", aspects=["4:3"])
+    finally:
+        render_cache.enabled = cache_enabled
+
+
+def test_still_background_composes_each_state_once(backend_cwd):
+    """An image background renders one composed frame per state change, identical to the frame loop"""
+    from opencv_video_generator import OpenCVVideoGenerator
+    from rendering.render_cache import render_cache
+    from rendering.render_stats import RenderStats
+
+    class FrameLoopGenerator(OpenCVVideoGenerator):
+        def open_background_source(self, video_path, use_cache=True, frames_needed=None):
+            source = super().open_background_source(video_path, use_cache, frames_needed)
+            source.still = False  # Compose and pipe every frame
+            return source
+
+    cache_enabled, render_cache.enabled = render_cache.enabled, False
+    try:
+        background_path = os.path.join(backend_cwd, "background.png")
+        ramp = np.linspace(0, 255, 360, dtype=np.uint8)
+        cv2.imwrite(background_path, np.dstack([np.tile(ramp, (640, 1))] * 2 + [np.full((640, 360), 120, np.uint8)]))
+
+        outputs = []
+        for name, generator in (("still", OpenCVVideoGenerator()), ("loop", FrameLoopGenerator())):
+            stats = RenderStats()
+            output_path = os.path.join(backend_cwd, f"{name}.mp4")
+            generator.create_video_with_overlays_and_captions(
+                script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+                speaker_pair="trump_mrbeast", enable_captions=True, render_stats=stats, renditions=["preview"])
+            outputs.append((_read_frames(output_path), stats.frames))
+
+        (still_frames, still_composed), (loop_frames, loop_composed) = outputs
+        assert len(still_frames) == len(loop_frames) == loop_composed
+        assert still_composed < loop_composed / 4
+        assert max(np.abs(a - b).max() for a, b in zip(still_frames, loop_frames)) == 0
+    finally:
+        render_cache.enabled = cache_enabled
+
+
+def test_chunked_render_matches_single_process_render(backend_cwd):
+    """Two spawned chunk workers produce the same frames and length as one process"""
+    from opencv_video_generator import video_generator
+    from rendering.render_cache import render_cache
+
+    from rendering.background_cache import DEFAULT_CACHE_DIR
+
+    cache_enabled, render_cache.enabled = render_cache.enabled, False  # Both renders must really run
+    tree_cache_before = set(os.listdir(DEFAULT_CACHE_DIR)) if os.path.isdir(DEFAULT_CACHE_DIR) else set()
+    try:
+        background_path = os.path.join(backend_cwd, "background.mp4")
+        _write_background(background_path)
+        outputs = []
+        for name, workers in (("single", 1), ("chunked", 2)):
+            output_path = os.path.join(backend_cwd, f"{name}.mp4")
+            video_generator.create_video_with_overlays_and_captions(
+                script_text=SCRIPT, audio_path=None, background_video_path=background_path, output_path=output_path,
+                speaker_pair="trump_mrbeast", enable_captions=True, render_workers=workers)
+            outputs.append(output_path)
+
+        single_frames, chunked_frames = _read_frames(outputs[0]), _read_frames(outputs[1])
+        assert len(chunked_frames) == len(single_frames) > 2 * video_generator.chunk_gop_frames()
+        assert abs(_container_duration(outputs[1]) - _container_duration(outputs[0])) < 1 / video_generator.fps
+        # Chunks use fixed GOPs, so only x264's decisions differ
+        assert np.mean([np.abs(a - b).mean() for a, b in zip(single_frames, chunked_frames)]) < 4
+
+        # The spawned workers used the fixture's background cache, not the one in the source tree
+        assert os.listdir(os.path.join(backend_cwd, "backgrounds"))
+        tree_cache_after = set(os.listdir(DEFAULT_CACHE_DIR)) if os.path.isdir(DEFAULT_CACHE_DIR) else set()
+        assert tree_cache_after == tree_cache_before
+    finally:
+        render_cache.enabled = cache_enabled
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(BACKEND_DIR)
+        for enable_captions in (False, True):
+            opencv_frames, ffmpeg_frames = _render_both(tmp, enable_captions)
+            diffs = [np.abs(a - b).mean() for a, b in zip(opencv_frames, ffmpeg_frames)]
+            print(f"📊 captions={enable_captions}: {len(opencv_frames)} vs {len(ffmpeg_frames)} frames, "
+                  f"max mean diff {max(diffs):.2f}")
+    print("✅ Render backend comparison finished")
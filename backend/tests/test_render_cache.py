@@ -0,0 +1,68 @@
+"""
+Test Render Cache
+Checks reels are restored by key, evicted least recently used first, and that
+concurrent writers of one key leave a single complete entry
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.render_cache import RenderCache
+
+
+def _write(path, size):
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+    return path
+
+
+def test_restore_and_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(os.path.join(tmp, "cache"), max_bytes=250_000)
+        keys = []
+        for i in range(3):
+            reel = _write(os.path.join(tmp, f"reel{i}.mp4"), 100_000)
+            sidecar = _write(os.path.join(tmp, f"reel{i}.srt"), 100)
+            keys.append(cache.key({'script': f"script {i}"}, {'audio': None, 'reel': reel}))
+            assert cache.store(keys[-1], reel, [reel, sidecar])
+            if i == 1:
+                time.sleep(0.01)
+                assert cache.restore(keys[0], os.path.join(tmp, "touched.mp4"))  # Reel 0 is now more recent than 1
+            time.sleep(0.01)
+
+        assert cache.restore(keys[1], os.path.join(tmp, "out.mp4")) is None
+        restored = cache.restore(keys[0], os.path.join(tmp, "out.mp4"))
+        assert sorted(restored) == [os.path.join(tmp, "out.mp4"), os.path.join(tmp, "out.srt")]
+        with open(os.path.join(tmp, "reel0.mp4"), 'rb') as a, open(os.path.join(tmp, "out.mp4"), 'rb') as b:
+            assert a.read() == b.read()
+        assert cache.restore(keys[2], os.path.join(tmp, "out2.mp4"))
+        print("✅ Render cache restore and LRU eviction work")
+
+
+def test_concurrent_writers_publish_one_entry():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(os.path.join(tmp, "cache"))
+        reels = [_write(os.path.join(tmp, f"writer{i}.mp4"), 50_000) for i in range(8)]
+        results = []
+        threads = [threading.Thread(target=lambda reel=reel: results.append(cache.store("samekey", reel, [reel])))
+                   for reel in reels]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results.count(True) == 1
+        assert os.listdir(cache.cache_dir) == ["samekey"]
+        assert cache.restore("samekey", os.path.join(tmp, "out.mp4"))
+        print("✅ Concurrent render cache writers publish one entry")
+
+
+if __name__ == "__main__":
+    test_restore_and_lru_eviction()
+    test_concurrent_writers_publish_one_entry()
@@ -0,0 +1,82 @@
+"""
+Test Render Schedule
+Checks the per-frame speaker/caption arrays against the old linear scans
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.render_schedule import RenderSchedule, NO_SPEAKER
+
+
+TIMELINE = [
+    {'speaker': 'trump', 'start_time': 0.0, 'end_time': 2.0},
+    {'speaker': 'mrbeast', 'start_time': 2.2, 'end_time': 4.1},
+    {'speaker': 'trump', 'start_time': 4.0, 'end_time': 5.5},  # Overlaps the previous segment
+]
+CAPTIONS = [
+    {'text': 'folks this is', 'speaker': 'trump', 'start': 0.0, 'end': 1.0},
+    {'text': 'huge', 'speaker': 'trump', 'start': 1.0, 'end': 2.0},
+    {'text': 'a hundred cars', 'speaker': 'mrbeast', 'start': 2.2, 'end': 4.1},
+]
+
+
+def _scan(items, t, start_key, end_key):
+    for item in items:
+        if item[start_key] <= t <= item[end_key]:
+            return item
+    return None
+
+
+def test_schedule_matches_linear_scan():
+    """Every frame resolves to the same speaker and caption as the per-frame scan"""
+    fps = 15
+    total_frames = 6 * fps
+    schedule = RenderSchedule.compile(TIMELINE, CAPTIONS, total_frames, fps)
+
+    for frame_num in range(total_frames):
+        t = frame_num / fps
+        segment = _scan(TIMELINE, t, 'start_time', 'end_time')
+        caption = _scan(CAPTIONS, t, 'start', 'end')
+        assert schedule.speaker_at(frame_num) == (segment['speaker'] if segment else None), frame_num
+        assert schedule.caption_at(frame_num) is caption, frame_num
+    print(f"✅ {total_frames} frames match the linear scan")
+
+
+def test_overlay_alpha_ramps_at_segment_edges():
+    """Overlay is at least 70% inside segments, fully opaque mid-segment, zero with no speaker"""
+    fps = 20
+    schedule = RenderSchedule.compile(TIMELINE, [], 6 * fps, fps)
+    on_screen = schedule.speaker_ids != NO_SPEAKER
+
+    assert (schedule.overlay_alpha[on_screen] >= round(0.7 * 255)).all()
+    assert (schedule.overlay_alpha[~on_screen] == 0).all()
+    assert schedule.overlay_alpha[1 * fps] == 255
+    assert schedule.overlay_alpha[0] < schedule.overlay_alpha[6] < 255
+    assert (schedule.caption_ids == -1).all()
+
+
+def test_state_runs_cover_frames_of_equal_state():
+    """Runs tile the timeline and split exactly where speaker, alpha or caption changes"""
+    fps = 15
+    schedule = RenderSchedule.compile(TIMELINE, CAPTIONS, 6 * fps, fps)
+    runs = schedule.state_runs()
+    assert runs[0][0] == 0 and runs[-1][1] == schedule.total_frames
+    assert all(end == next_start for (_, end), (next_start, _) in zip(runs, runs[1:]))
+    states = np.stack([schedule.speaker_ids, schedule.overlay_alpha, schedule.caption_ids], axis=1)
+    for start, end in runs:
+        assert (states[start:end] == states[start]).all()
+        assert end == schedule.total_frames or (states[end] != states[start]).any()
+    assert len(runs) < schedule.total_frames
+
+
+if __name__ == "__main__":
+    test_schedule_matches_linear_scan()
+    test_overlay_alpha_ramps_at_segment_edges()
+    test_state_runs_cover_frames_of_equal_state()
+    print("✅ Render schedule tests passed")
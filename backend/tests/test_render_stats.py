@@ -0,0 +1,50 @@
+"""
+Test Render Stats
+Checks the per-stage timing summary and the process-wide stage histograms
+"""
+
+import os
+import sys
+
+# Add parent directory to Python path so we can import from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering.render_stats import RenderStats, StageHistograms
+
+
+def _chunk_stats(frame_seconds):
+    stats = RenderStats("req_test")
+    for seconds in frame_seconds:
+        stats.record_frame(seconds, 2 * seconds, 3 * seconds)
+    stats.add('mux', 0.5)
+    return stats
+
+
+def test_summary_merges_chunks():
+    stats = _chunk_stats([0.001, 0.002])
+    stats.merge(_chunk_stats([0.003]))
+    summary = stats.as_dict()
+
+    assert summary['frames'] == 3
+    assert summary['stages']['mux'] == {'total_s': 1.0, 'count': 2}
+    composite = summary['stages']['composite']
+    assert composite['count'] == 3
+    assert composite['total_s'] == 0.012
+    assert composite['max_ms'] == 6.0
+
+
+def test_histograms_count_frames_cumulatively():
+    histograms = StageHistograms(buckets_ms=(1, 5))
+    histograms.observe(_chunk_stats([0.0005, 0.001, 0.004, 0.010]))
+    background = histograms.as_dict()['stages']['background']
+
+    # Bucket bounds are inclusive upper limits ("le")
+    assert background['buckets_ms'] == {'1': 2, '5': 3, '+Inf': 4}
+    assert background['count'] == 4
+    assert histograms.as_dict()['renders'] == 1
+
+
+if __name__ == "__main__":
+    test_summary_merges_chunks()
+    test_histograms_count_frames_cumulatively()
+    print("✅ Render stats tests passed")